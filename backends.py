@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Awaitable, Callable, Protocol, TypeVar
+
+from common.models import ResearchReport, WebSearchPlan
+from config import Logger
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RESEARCH_BACKEND = os.getenv("RESEARCH_BACKEND", "openai")
+# The backend a slow stage is hedged to, e.g. `adk`. Hedging is off when it is empty.
+HEDGE_BACKEND = os.getenv("HEDGE_BACKEND", "")
+# Summarize writes the report, so a hedged summarize could write it twice.
+HEDGE_STAGES = {stage for stage in os.getenv("HEDGE_STAGES", "plan,research").split(",") if stage}
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "90"))
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "15"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = 200
+
+_backend: "Backend | None" = None
+
+
+class Backend(Protocol):
+    """The research stages of one agent stack."""
+
+    name: str
+
+    async def plan(self, query: str) -> WebSearchPlan: ...
+
+    async def research(self, query: str, sources: str | None = None,
+                       feedback: str | None = None) -> ResearchReport: ...
+
+    async def summarize(self, title: str, reports: list[str]) -> str: ...
+
+
+# The stacks are imported on first use, so a process using one of them does not load the other.
+class OpenAIBackend:
+    name = "openai"
+
+    async def plan(self, query: str) -> WebSearchPlan:
+        from openai_agents.planner_agent import plan
+        return await plan(query)
+
+    async def research(self, query: str, sources: str | None = None,
+                       feedback: str | None = None) -> ResearchReport:
+        from openai_agents.research_agent import research
+        return await research(query, feedback=feedback, sources=sources)
+
+    async def summarize(self, title: str, reports: list[str]) -> str:
+        from openai_agents.summarize_agent import summarize
+        return await summarize(title, reports)
+
+
+class AdkBackend:
+    name = "adk"
+
+    async def plan(self, query: str) -> WebSearchPlan:
+        from google_adk.planner_agent import plan
+        return await plan(query)
+
+    async def research(self, query: str, sources: str | None = None,
+                       feedback: str | None = None) -> ResearchReport:
+        from google_adk.research_agent import research
+        return await research(query, feedback=feedback, sources=sources)
+
+    async def summarize(self, title: str, reports: list[str]) -> str:
+        from google_adk.summarize_agent import summarize
+        return await summarize(title, reports)
+
+
+@dataclass
+class HedgeStats:
+    stage: str
+    calls: int = 0
+    hedged: int = 0
+    failures: int = 0
+    wins: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+
+class HedgeRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, HedgeStats] = {}
+
+    def record(self, stage: str, hedged: bool, winner: str | None) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(stage, HedgeStats(stage))
+            stats.calls += 1
+            stats.hedged += int(hedged)
+            if winner is None:
+                stats.failures += 1
+            else:
+                stats.wins[winner] = stats.wins.get(winner, 0) + 1
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {stage: {**asdict(stats), "hedge_rate": round(stats.hedge_rate, 4)}
+                    for stage, stats in self._stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+
+hedge_stats = HedgeRegistry()
+
+
+class HedgedBackend:
+    """Runs every stage on `primary`, and also on `secondary` once `primary` is slower than usual.
+
+    The hedge fires after the `percentile` latency of the primary's recent successful calls of the stage (after
+    `default_delay` until there are `min_samples` of them), or right away when the primary fails. The first
+    successful answer wins and the other call is cancelled.
+    """
+
+    def __init__(self, primary: Backend, secondary: Backend, stages: set[str] = HEDGE_STAGES,
+                 percentile: float = HEDGE_PERCENTILE, default_delay: float = HEDGE_DELAY_SECONDS,
+                 min_samples: int = HEDGE_MIN_SAMPLES):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"{primary.name}+{secondary.name}"
+        self.stages = stages
+        # `delay` picks one of the 99 cut points of the latencies.
+        self.percentile = min(99, max(1, int(percentile)))
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._latencies: dict[str, deque[float]] = {}
+
+    def delay(self, stage: str) -> float:
+        latencies = self._latencies.get(stage)
+        if latencies is None or len(latencies) < self.min_samples:
+            return self.default_delay
+        return statistics.quantiles(latencies, n=100, method="inclusive")[self.percentile - 1]
+
+    async def plan(self, query: str) -> WebSearchPlan:
+        return await self._call("plan", lambda backend: backend.plan(query))
+
+    async def research(self, query: str, sources: str | None = None,
+                       feedback: str | None = None) -> ResearchReport:
+        return await self._call("research", lambda backend: backend.research(query, sources=sources,
+                                                                              feedback=feedback))
+
+    async def summarize(self, title: str, reports: list[str]) -> str:
+        return await self._call("summarize", lambda backend: backend.summarize(title, reports))
+
+    async def _timed(self, stage: str, call: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        result = await call
+        self._latencies.setdefault(stage, deque(maxlen=HEDGE_WINDOW)).append(time.perf_counter() - started)
+        return result
+
+    async def _call(self, stage: str, call: Callable[[Backend], Awaitable[T]]) -> T:
+        if stage not in self.stages:
+            return await call(self.primary)
+
+        delay = self.delay(stage)
+        tasks = {asyncio.create_task(self._timed(stage, call(self.primary))): self.primary}
+        errors: list[BaseException] = []
+        hedged = False
+        try:
+            while True:
+                done, _ = await asyncio.wait(tasks, timeout=None if hedged else delay,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = tasks.pop(task)
+                    if task.exception() is None:
+                        hedge_stats.record(stage, hedged, backend.name)
+                        return task.result()
+                    errors.append(task.exception())
+                    Logger.info(f"{stage} on {backend.name} failed: {task.exception()!r}")
+                if not hedged:
+                    hedged = True
+                    reason = "failed" if errors else f"has not answered within {delay:.2f}s"
+                    Logger.info(f"{stage} on {self.primary.name} {reason}, hedging to {self.secondary.name}")
+                    tasks[asyncio.create_task(call(self.secondary))] = self.secondary
+                elif not tasks:
+                    hedge_stats.record(stage, hedged, None)
+                    raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+BACKENDS: dict[str, Callable[[], Backend]] = {
+    "openai": OpenAIBackend,
+    "adk": AdkBackend,
+}
+
+
+def create_backend(name: str = RESEARCH_BACKEND, hedge: str = HEDGE_BACKEND) -> Backend:
+    backend = BACKENDS[name]()
+    if hedge and hedge != name:
+        return HedgedBackend(backend, BACKENDS[hedge]())
+    return backend
+
+
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: Backend | None) -> None:
+    global _backend
+    _backend = backend
@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+
+from backends import hedge_stats
+from common.metrics import metrics
+from common.rate_limit import rate_limit_stats
+from config import Logger, configure_logging, configure_observability
+from openai_agents.cascade import escalation_stats
+from pipeline import run_pipeline, DEFAULT_MAX_CONCURRENCY
+
+DEFAULT_WORKERS = 4
+
+
+def topic_id(record: dict) -> str:
+    return str(record.get("id") or hashlib.sha1(record["topic"].encode()).hexdigest()[:16])
+
+
+def load_topics(path: str) -> list[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"topic": record}
+            record["id"] = topic_id(record)
+            records.append(record)
+    return records
+
+
+def repair_checkpoint(path: str) -> None:
+    """Drop the partial last line a crash can leave behind, so appended results start on a line of their own.
+
+    Works on bytes: the cut can fall in the middle of a multi-byte character.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def load_checkpoint(path: str) -> set[str]:
+    """Ids of the topics that already finished successfully in a previous run of the batch."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind, that topic simply runs again.
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+async def run_batch(input_path: str, output_path: str, workers: int = DEFAULT_WORKERS,
+                    max_concurrency: int = DEFAULT_MAX_CONCURRENCY, speculative: bool = False,
+                    deadline_seconds: float | None = None) -> dict:
+    records = load_topics(input_path)
+    repair_checkpoint(output_path)
+    done = load_checkpoint(output_path)
+    pending = [record for record in records if record["id"] not in done]
+    Logger.info(f"Batch of {len(records)} topics, {len(done)} already done, {len(pending)} to run")
+
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for record in pending:
+        queue.put_nowait(record)
+
+    write_lock = asyncio.Lock()
+    latencies: list[float] = []
+    failed = 0
+    partial = 0
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        async def write(line: dict):
+            async with write_lock:
+                output.write(json.dumps(line, ensure_ascii=False) + "\n")
+                output.flush()
+                os.fsync(output.fileno())
+
+        async def worker():
+            nonlocal failed, partial
+            while not queue.empty():
+                record = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    # A topic that failed before resumes from the stages it completed.
+                    result = await run_pipeline(record["topic"], max_concurrency=max_concurrency,
+                                                speculative=speculative, deadline_seconds=deadline_seconds,
+                                                run_id=f"{os.path.abspath(output_path)}#{record['id']}")
+                    line = {"id": record["id"], "status": "ok", **result.model_dump(mode="json")}
+                    partial += bool(result.dropped)
+                except Exception as e:
+                    failed += 1
+                    line = {"id": record["id"], "status": "error", "topic": record["topic"], "error": repr(e)}
+                    Logger.info(f"Topic {record['id']} failed: {e!r}")
+                elapsed = time.perf_counter() - started
+                latencies.append(elapsed)
+                await write({**line, "latency_seconds": round(elapsed, 3)})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        elapsed = time.perf_counter() - started
+
+    summary = {
+        "topics": len(records),
+        "skipped": len(done),
+        "succeeded": len(pending) - failed,
+        "failed": failed,
+        "partial": partial,
+        "elapsed_seconds": round(elapsed, 3),
+        "topics_per_minute": round(len(pending) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency_p50_seconds": round(percentile(latencies, 50), 3),
+        "latency_p90_seconds": round(percentile(latencies, 90), 3),
+        "latency_p99_seconds": round(percentile(latencies, 99), 3),
+        "escalations": escalation_stats.snapshot(),
+        "hedging": hedge_stats.snapshot(),
+        "rate_limits": rate_limit_stats(),
+    }
+    Logger.info(f"Batch finished: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the research pipeline over a JSONL file of topics.")
+    parser.add_argument("input", help='JSONL file with one {"topic": ..., "id": ...} object per line')
+    parser.add_argument("output", help="JSONL file the results are appended to, also used to resume")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="topics researched concurrently")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="searches researched concurrently within one topic")
+    parser.add_argument("--speculative", action="store_true", help="run the guardrail speculatively")
+    parser.add_argument("--deadline-seconds", type=float,
+                        help="time budget per topic (default PIPELINE_DEADLINE_SECONDS)")
+    parser.add_argument("--metrics", help="write per-stage metrics to this file (.json, otherwise Prometheus text)")
+    args = parser.parse_args()
+
+    configure_logging()
+    configure_observability()
+    summary = asyncio.run(run_batch(args.input, args.output, args.workers, args.max_concurrency, args.speculative,
+                                      args.deadline_seconds))
+    print(json.dumps(summary, indent=2))
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(metrics.to_json() if args.metrics.endswith(".json") else metrics.to_prometheus())
+
+
+if __name__ == '__main__':
+    main()
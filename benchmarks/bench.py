@@ -0,0 +1,361 @@
+"""Offline benchmarks of the research stages against a fake model backend and a stand-in serper MCP server.
+
+    python -m benchmarks.bench --concurrency 1 4 16 --requests 32
+    python -m benchmarks.bench --compare benchmarks/results/<commit>.json
+
+Every scenario / concurrency pair runs in its own process, so peak RSS and MCP server spawns are measured
+per run. Results are saved to `benchmarks/results/<commit>.json`.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import platform
+import resource
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+STUB_SERPER_SERVER = os.path.join(os.path.dirname(__file__), "stub_serper_server.py")
+
+TOPIC = "Due to 2025 year, What is the best model for agentic AI frontier model?"
+REPORTS = [f"Report {index}: " + "Gemini 2.5 Pro leads public agentic benchmarks. " * 40 for index in range(3)]
+
+
+async def _openai_orchestration(index: int):
+    from orchestration_agent import orchestration
+    return await orchestration(f"{TOPIC} #{index}")
+
+
+async def _openai_pipeline(index: int):
+    from orchestration_agent import orchestration
+    return await orchestration(f"{TOPIC} #{index}", mode="pipeline")
+
+
+async def _openai_plan(index: int):
+    from openai_agents import plan
+    return await plan(f"{TOPIC} #{index}")
+
+
+async def _openai_research(index: int):
+    from openai_agents import research
+    return await research(f"{TOPIC} #{index}")
+
+
+async def _openai_summarize(index: int):
+    from openai_agents import summarize
+    return await summarize(f"{TOPIC} #{index}", REPORTS)
+
+
+async def _openai_research_streamed(index: int):
+    from openai_agents.research_agent import research_streamed
+    return [event async for event in research_streamed(f"{TOPIC} #{index}")]
+
+
+async def _openai_summarize_streamed(index: int):
+    from openai_agents.summarize_agent import summarize_streamed
+    return [event async for event in summarize_streamed(f"{TOPIC} #{index}", REPORTS)]
+
+
+async def _adk_plan(index: int):
+    from google_adk.planner_agent import plan
+    return await plan(f"{TOPIC} #{index}")
+
+
+async def _adk_research(index: int):
+    from google_adk.research_agent import research
+    return await research(f"{TOPIC} #{index}")
+
+
+async def _adk_summarize(index: int):
+    from google_adk.summarize_agent import summarize
+    return await summarize(f"{TOPIC} #{index}", REPORTS)
+
+
+async def _adk_research_streamed(index: int):
+    from google_adk.research_agent import research_streamed
+    return [event async for event in research_streamed(f"{TOPIC} #{index}")]
+
+
+async def _adk_summarize_streamed(index: int):
+    from google_adk.summarize_agent import summarize_streamed
+    return [event async for event in summarize_streamed(f"{TOPIC} #{index}", REPORTS)]
+
+
+SCENARIOS: dict[str, Callable[[int], Awaitable]] = {
+    "openai.orchestration": _openai_orchestration,
+    "openai.pipeline": _openai_pipeline,
+    "openai.plan": _openai_plan,
+    "openai.research": _openai_research,
+    "openai.summarize": _openai_summarize,
+    "openai.research_streamed": _openai_research_streamed,
+    "openai.summarize_streamed": _openai_summarize_streamed,
+    "adk.plan": _adk_plan,
+    "adk.research": _adk_research,
+    "adk.summarize": _adk_summarize,
+    "adk.research_streamed": _adk_research_streamed,
+    "adk.summarize_streamed": _adk_summarize_streamed,
+}
+
+
+@dataclass
+class BenchmarkRun:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    throughput_rps: float
+    p50_seconds: float
+    p95_seconds: float
+    p99_seconds: float
+    peak_rss_mb: float
+    children_peak_rss_mb: float
+    mcp_spawns: int
+    error_sample: str | None = None
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _install_fakes(args: argparse.Namespace) -> None:
+    from agents import RunConfig, set_tracing_disabled
+    from benchmarks.fake_models import LatencyProfile, FakeModelProvider, FakeGemini
+    from google_adk.runner import set_model_factory
+    from openai_agents.runner import set_run_config
+
+    profile = LatencyProfile(first_token_seconds=args.first_token_seconds, output_tokens=args.output_tokens,
+                             seconds_per_token=args.seconds_per_token, seed=args.seed)
+    set_tracing_disabled(True)
+    set_run_config(RunConfig(model_provider=FakeModelProvider(profile), tracing_disabled=True))
+    set_model_factory(lambda model: FakeGemini(model=model, profile=profile))
+
+
+async def _run_scenario(scenario: str, concurrency: int, requests: int) -> tuple[list[float], list[str], float]:
+    from common.mcp_pool import close_all_pools
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    async def run_one(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await SCENARIOS[scenario](index)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    # Warm up imports and MCP pools outside of the measured window.
+    await run_one(-1)
+    latencies.clear()
+    errors.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(index) for index in range(requests)))
+    seconds = time.perf_counter() - started
+    await close_all_pools()
+    return latencies, errors, seconds
+
+
+def run_worker(args: argparse.Namespace) -> BenchmarkRun:
+    from batch_runner import percentile
+
+    _install_fakes(args)
+    concurrency = args.concurrency[0]
+    latencies, errors, seconds = asyncio.run(_run_scenario(args.worker, concurrency, args.requests))
+    with open(os.environ["BENCHMARK_SPAWN_LOG"], encoding="utf-8") as file:
+        spawns = sum(1 for line in file if line.strip())
+    return BenchmarkRun(
+        scenario=args.worker,
+        concurrency=concurrency,
+        requests=args.requests,
+        errors=len(errors),
+        seconds=seconds,
+        throughput_rps=len(latencies) / seconds if seconds else 0.0,
+        p50_seconds=percentile(latencies, 50),
+        p95_seconds=percentile(latencies, 95),
+        p99_seconds=percentile(latencies, 99),
+        peak_rss_mb=_peak_rss_mb(resource.RUSAGE_SELF),
+        children_peak_rss_mb=_peak_rss_mb(resource.RUSAGE_CHILDREN),
+        mcp_spawns=spawns,
+        error_sample=errors[0] if errors else None,
+    )
+
+
+def _worker_command(args: argparse.Namespace, scenario: str, concurrency: int) -> list[str]:
+    return [sys.executable, "-m", "benchmarks.bench", "--worker", scenario,
+            "--concurrency", str(concurrency), "--requests", str(args.requests),
+            "--first-token-seconds", str(args.first_token_seconds), "--output-tokens", str(args.output_tokens),
+            "--seconds-per-token", str(args.seconds_per_token), "--seed", str(args.seed)]
+
+
+def spawn_worker(args: argparse.Namespace, scenario: str, concurrency: int, workdir: str) -> BenchmarkRun:
+    spawn_log = os.path.join(workdir, f"{scenario}-{concurrency}.spawns")
+    open(spawn_log, "w").close()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "benchmark",
+        "GOOGLE_API_KEY": "benchmark",
+        "SERPER_API_KEY": "benchmark",
+        "SERPER_MCP_COMMAND": shlex.join([sys.executable, STUB_SERPER_SERVER, "--latency", str(args.search_seconds),
+                                          "--spawn-log", spawn_log]),
+        "BENCHMARK_SPAWN_LOG": spawn_log,
+        "SEARCH_CACHE_ENABLED": "1" if args.search_cache else "0",
+        "SEARCH_CACHE_PATH": os.path.join(workdir, "search.sqlite3"),
+        "RESPONSE_CACHE_ENABLED": "0",
+        # The fake models have no quota to stay under; RATE_LIMIT_ENABLED=1 measures the limiter overhead.
+        "RATE_LIMIT_ENABLED": os.getenv("RATE_LIMIT_ENABLED", "0"),
+        "ADK_SESSION_DB": os.path.join(workdir, "adk_sessions.sqlite3"),
+        "REPORT_SINK": "dir",
+        "REPORT_DIR": os.path.join(workdir, "report"),
+        # Repeated topics would be answered from the index instead of exercising the pipeline.
+        "REPORT_INDEX_ENABLED": "0",
+        "OPIK_TRACK_DISABLE": "true",
+    }
+    completed = subprocess.run(_worker_command(args, scenario, concurrency), env=env, cwd=_repo_root(),
+                               stdout=subprocess.PIPE, stderr=None if args.verbose else subprocess.PIPE,
+                               text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark worker {scenario} x{concurrency} exited with {completed.returncode}:\n"
+                           f"{(completed.stderr or '')[-2000:]}")
+    return BenchmarkRun(**json.loads(completed.stdout.strip().splitlines()[-1]))
+
+
+def _repo_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_repo_root(), capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=_repo_root(),
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(args: argparse.Namespace, runs: list[BenchmarkRun]) -> str:
+    commit = _git_commit()
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{commit}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "profile": {
+                "requests": args.requests,
+                "first_token_seconds": args.first_token_seconds,
+                "output_tokens": args.output_tokens,
+                "seconds_per_token": args.seconds_per_token,
+                "search_seconds": args.search_seconds,
+                "search_cache": args.search_cache,
+                "seed": args.seed,
+            },
+            "runs": [asdict(run) for run in runs],
+        }, file, indent=2)
+    return path
+
+
+def load_results(path: str) -> list[BenchmarkRun]:
+    with open(path, encoding="utf-8") as file:
+        names = {field.name for field in fields(BenchmarkRun)}
+        return [BenchmarkRun(**{key: value for key, value in run.items() if key in names})
+                for run in json.load(file)["runs"]]
+
+
+def compare(baseline: list[BenchmarkRun], current: list[BenchmarkRun], threshold: float) -> list[str]:
+    """Print the change of every run against the baseline and return the regressions beyond `threshold`."""
+    baseline_runs = {(run.scenario, run.concurrency): run for run in baseline}
+    regressions = []
+    print(f"{'scenario':<26} {'conc':>4} {'rps':>16} {'p95 (s)':>18} {'rss (MB)':>16} {'spawns':>8}")
+    for run in current:
+        before = baseline_runs.get((run.scenario, run.concurrency))
+        if before is None:
+            continue
+        throughput = _change(before.throughput_rps, run.throughput_rps)
+        p95 = _change(before.p95_seconds, run.p95_seconds)
+        rss = _change(before.peak_rss_mb, run.peak_rss_mb)
+        print(f"{run.scenario:<26} {run.concurrency:>4} {run.throughput_rps:>8.2f} {throughput:>+7.1%} "
+              f"{run.p95_seconds:>10.3f} {p95:>+7.1%} {run.peak_rss_mb:>8.1f} {rss:>+7.1%} "
+              f"{before.mcp_spawns:>3}->{run.mcp_spawns:<3}")
+        if throughput < -threshold or p95 > threshold or run.errors > before.errors:
+            regressions.append(f"{run.scenario} x{run.concurrency}")
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def print_runs(runs: list[BenchmarkRun]) -> None:
+    print(f"{'scenario':<26} {'conc':>4} {'ok':>4} {'err':>4} {'rps':>8} {'p50 (s)':>8} {'p95 (s)':>8} "
+          f"{'p99 (s)':>8} {'rss (MB)':>9} {'spawns':>6}")
+    for run in runs:
+        print(f"{run.scenario:<26} {run.concurrency:>4} {run.requests - run.errors:>4} {run.errors:>4} "
+              f"{run.throughput_rps:>8.2f} {run.p50_seconds:>8.3f} {run.p95_seconds:>8.3f} {run.p99_seconds:>8.3f} "
+              f"{run.peak_rss_mb:>9.1f} {run.mcp_spawns:>6}")
+        if run.error_sample:
+            print(f"    first error: {run.error_sample[:200]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research stages offline.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=16, help="Requests per scenario and concurrency.")
+    parser.add_argument("--first-token-seconds", type=float, default=0.05)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--seconds-per-token", type=float, default=0.0005)
+    parser.add_argument("--search-seconds", type=float, default=0.05,
+                        help="Latency of the stand-in serper server.")
+    parser.add_argument("--search-cache", action="store_true", help="Keep the search cache enabled.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative throughput / p95 change reported as a regression.")
+    parser.add_argument("--verbose", action="store_true", help="Show the log output of the workers.")
+    parser.add_argument("--worker", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run = run_worker(args)
+        print(json.dumps(asdict(run)))
+        return
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                runs.append(spawn_worker(args, scenario, concurrency, workdir))
+                logger.info(f"{scenario} x{concurrency}: {runs[-1].throughput_rps:.2f} requests/s")
+    print_runs(runs)
+    print(f"Saved {save_results(args, runs)}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), runs, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s : %(message)s")
+    main()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterator
+
+from agents import Model, ModelProvider, ModelResponse, ModelSettings, ModelTracing, Tool, FunctionTool, Handoff, \
+    AgentOutputSchemaBase, TResponseInputItem, Usage
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from openai.types.responses import ResponseOutputMessage, ResponseOutputText, ResponseFunctionToolCall, Response, \
+    ResponseCompletedEvent, ResponseCreatedEvent, ResponseOutputItemAddedEvent, ResponseOutputItemDoneEvent, \
+    ResponseTextDeltaEvent, ResponseUsage
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+_WORDS = ("agentic model frontier reasoning tool search planning latency report evidence source benchmark "
+          "context memory evaluation summary market research throughput token cache workflow").split()
+
+# Arguments the stand-in search server expects, instead of lorem ipsum.
+_QUERY_FIELDS = {"q", "query", "input", "search", "keyword"}
+
+# Tokens per streamed text delta.
+STREAM_CHUNK_TOKENS = 8
+
+
+@dataclass
+class LatencyProfile:
+    """How long a fake model call takes and how much it writes.
+
+    The time to the first token is log-normally distributed around `first_token_seconds`, every generated
+    token then adds `seconds_per_token`.
+    """
+    first_token_seconds: float = 0.05
+    first_token_sigma: float = 0.5
+    output_tokens: int = 200
+    output_tokens_sigma: float = 0.3
+    seconds_per_token: float = 0.0005
+    array_items: int = 3
+    seed: int | None = None
+    _random: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+
+    def sample_output_tokens(self) -> int:
+        return max(1, round(self._random.lognormvariate(0, self.output_tokens_sigma) * self.output_tokens))
+
+    def sample_first_token_seconds(self) -> float:
+        return self._random.lognormvariate(0, self.first_token_sigma) * self.first_token_seconds
+
+    def sample_seconds(self, output_tokens: int) -> float:
+        return self.sample_first_token_seconds() + output_tokens * self.seconds_per_token
+
+    def text(self, tokens: int) -> str:
+        return " ".join(self._random.choice(_WORDS) for _ in range(tokens))
+
+
+def estimate_tokens(value: Any) -> int:
+    return max(1, len(value if isinstance(value, str) else json.dumps(value, default=str)) // 4)
+
+
+def fake_value(schema: dict, profile: LatencyProfile, name: str = "", defs: dict | None = None) -> Any:
+    """Build a value conforming to a JSON schema (or a Gemini schema dump, whose types are upper case)."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].rsplit("/", 1)[-1]], profile, name, defs)
+    for key in ("anyOf", "any_of", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") not in ("null", "NULL")]
+            return fake_value(options[0] if options else {}, profile, name, defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    kind = str(schema.get("type", "string")).lower()
+    if kind == "object":
+        return {key: fake_value(value, profile, key, defs) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), profile, name, defs) for _ in range(profile.array_items)]
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 1
+    if name in _QUERY_FIELDS:
+        return f"benchmark query {profile.text(3)}"
+    return profile.text(max(1, profile.sample_output_tokens() // 4))
+
+
+class FakeModel(Model):
+    """openai-agents model that calls every tool once, in order, then answers with a schema-conforming output."""
+
+    def __init__(self, model: str, profile: LatencyProfile):
+        self.model = model
+        self.profile = profile
+
+    async def get_response(self, system_instructions: str | None, input: str | list[TResponseInputItem],
+                           model_settings: ModelSettings, tools: list[Tool],
+                           output_schema: AgentOutputSchemaBase | None, handoffs: list[Handoff],
+                           tracing: ModelTracing, *, previous_response_id: str | None = None,
+                           conversation_id: str | None = None, prompt: Any = None) -> ModelResponse:
+        output_tokens = self.profile.sample_output_tokens()
+        await asyncio.sleep(self.profile.sample_seconds(output_tokens))
+
+        input_tokens = estimate_tokens(system_instructions or "") + estimate_tokens(input)
+        return ModelResponse(
+            output=[self._output(input, tools, output_schema, output_tokens)],
+            usage=Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens),
+            response_id=None,
+        )
+
+    async def stream_response(self, system_instructions: str | None, input: str | list[TResponseInputItem],
+                              model_settings: ModelSettings, tools: list[Tool],
+                              output_schema: AgentOutputSchemaBase | None, handoffs: list[Handoff],
+                              tracing: ModelTracing, *, previous_response_id: str | None = None,
+                              conversation_id: str | None = None, prompt: Any = None) -> AsyncIterator:
+        """Stream the output of `get_response`: the text arrives in deltas of STREAM_CHUNK_TOKENS tokens."""
+        output_tokens = self.profile.sample_output_tokens()
+        await asyncio.sleep(self.profile.sample_first_token_seconds())
+
+        output = self._output(input, tools, output_schema, output_tokens)
+        response = Response(id=f"resp_{uuid.uuid4().hex}", created_at=time.time(), model=self.model,
+                            object="response", output=[], parallel_tool_calls=False, tool_choice="auto", tools=[])
+        sequence = iter(range(1_000_000))
+        yield ResponseCreatedEvent(type="response.created", response=response, sequence_number=next(sequence))
+        yield ResponseOutputItemAddedEvent(type="response.output_item.added", item=output, output_index=0,
+                                           sequence_number=next(sequence))
+
+        if isinstance(output, ResponseOutputMessage):
+            text = output.content[0].text
+            chunks = max(1, output_tokens // STREAM_CHUNK_TOKENS)
+            size = -(-len(text) // chunks)
+            for start in range(0, len(text), size):
+                await asyncio.sleep(min(STREAM_CHUNK_TOKENS, output_tokens) * self.profile.seconds_per_token)
+                yield ResponseTextDeltaEvent(type="response.output_text.delta", item_id=output.id, output_index=0,
+                                             content_index=0, delta=text[start:start + size], logprobs=[],
+                                             sequence_number=next(sequence))
+        else:
+            await asyncio.sleep(output_tokens * self.profile.seconds_per_token)
+
+        yield ResponseOutputItemDoneEvent(type="response.output_item.done", item=output, output_index=0,
+                                          sequence_number=next(sequence))
+        input_tokens = estimate_tokens(system_instructions or "") + estimate_tokens(input)
+        response = response.model_copy(update={
+            "output": [output],
+            "usage": ResponseUsage(input_tokens=input_tokens, output_tokens=output_tokens,
+                                   total_tokens=input_tokens + output_tokens,
+                                   input_tokens_details=InputTokensDetails(cached_tokens=0),
+                                   output_tokens_details=OutputTokensDetails(reasoning_tokens=0)),
+        })
+        yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=next(sequence))
+
+    def _output(self, input: str | list[TResponseInputItem], tools: list[Tool],
+                output_schema: AgentOutputSchemaBase | None,
+                output_tokens: int) -> ResponseFunctionToolCall | ResponseOutputMessage:
+        called = {_item_field(item, "name") for item in (input if isinstance(input, list) else [])
+                  if _item_field(item, "type") == "function_call"}
+        pending = [tool for tool in tools if isinstance(tool, FunctionTool) and tool.name not in called]
+        if pending:
+            tool = pending[0]
+            return ResponseFunctionToolCall(
+                id=f"fc_{uuid.uuid4().hex}", call_id=f"call_{uuid.uuid4().hex}", type="function_call",
+                name=tool.name, arguments=json.dumps(fake_value(tool.params_json_schema, self.profile)),
+            )
+        if output_schema is not None and not output_schema.is_plain_text():
+            text = json.dumps(fake_value(output_schema.json_schema(), self.profile))
+        else:
+            text = self.profile.text(output_tokens)
+        return ResponseOutputMessage(
+            id=f"msg_{uuid.uuid4().hex}", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+        )
+
+
+class FakeModelProvider(ModelProvider):
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+
+    def get_model(self, model_name: str | None) -> Model:
+        return FakeModel(model_name or "default", self.profile)
+
+
+def _item_field(item: Any, name: str) -> Any:
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+class FakeGemini(BaseLlm):
+    """google-adk model with the same behaviour as `FakeModel`."""
+    profile: LatencyProfile
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        output_tokens = self.profile.sample_output_tokens()
+        await asyncio.sleep(self.profile.sample_first_token_seconds())
+
+        called = {part.function_call.name for content in llm_request.contents for part in content.parts or []
+                  if part.function_call}
+        tools = llm_request.tools_dict
+        # Agents with both tools and an output schema answer through the `set_model_response` tool.
+        pending = [name for name in tools if name != "set_model_response" and name not in called]
+        if pending:
+            part = types.Part(function_call=types.FunctionCall(
+                name=pending[0], args=fake_value(_declaration_schema(tools[pending[0]]), self.profile)))
+        elif "set_model_response" in tools:
+            schema = tools["set_model_response"].output_schema.model_json_schema()
+            part = types.Part(function_call=types.FunctionCall(
+                name="set_model_response", args=fake_value(schema, self.profile)))
+        elif llm_request.config and llm_request.config.response_schema:
+            schema = llm_request.config.response_schema.model_json_schema()
+            part = types.Part(text=json.dumps(fake_value(schema, self.profile)))
+        else:
+            part = types.Part(text=self.profile.text(output_tokens))
+
+        if stream and part.text:
+            # Partial responses first, then the whole text, the way the SSE streaming mode delivers them.
+            chunks = max(1, output_tokens // STREAM_CHUNK_TOKENS)
+            size = -(-len(part.text) // chunks)
+            for start in range(0, len(part.text), size):
+                await asyncio.sleep(min(STREAM_CHUNK_TOKENS, output_tokens) * self.profile.seconds_per_token)
+                yield LlmResponse(content=types.Content(role="model", parts=[
+                    types.Part(text=part.text[start:start + size])]), partial=True)
+        else:
+            await asyncio.sleep(output_tokens * self.profile.seconds_per_token)
+
+        input_tokens = estimate_tokens([content.model_dump(mode="json", exclude_none=True)
+                                        for content in llm_request.contents])
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=input_tokens, candidates_token_count=output_tokens,
+                total_token_count=input_tokens + output_tokens),
+        )
+
+
+def _declaration_schema(tool) -> dict:
+    declaration = tool._get_declaration()
+    if declaration is None:
+        return {}
+    if declaration.parameters_json_schema:
+        return declaration.parameters_json_schema
+    if declaration.parameters:
+        return declaration.parameters.model_dump(mode="json", exclude_none=True)
+    return {}
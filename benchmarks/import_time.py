@@ -0,0 +1,143 @@
+"""Cold-start import time of the entry points and agent modules.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --compare benchmarks/results/import-<commit>.json
+
+Every module is imported in a fresh interpreter `--repeat` times and the median is reported, together with the
+number of modules it loads and which of the heavy dependencies it pulls in. Results are saved to
+`benchmarks/results/import-<commit>.json`.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, fields
+
+from benchmarks.bench import RESULTS_DIR, _change, _git_commit, _repo_root
+
+MODULES = [
+    "config",
+    "openai_agents",
+    "openai_agents.planner_agent",
+    "openai_agents.research_agent",
+    "openai_agents.summarize_agent",
+    "google_adk.planner_agent",
+    "google_adk.research_agent",
+    "pipeline",
+    "orchestration_agent",
+    "batch_runner",
+    "service",
+]
+HEAVY_DEPENDENCIES = ["opik", "agents", "google.adk", "litellm", "tiktoken", "uvicorn"]
+
+# Imports faster than this are within the noise of starting a process.
+MIN_REGRESSION_SECONDS = 0.05
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "modules": len(sys.modules),
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+@dataclass
+class ImportRun:
+    module: str
+    seconds: float
+    min_seconds: float
+    modules: int
+    heavy: list[str]
+
+
+def measure(module: str, repeat: int) -> ImportRun:
+    samples = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_DEPENDENCIES)],
+            cwd=_repo_root(), capture_output=True, text=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    seconds = [sample["seconds"] for sample in samples]
+    return ImportRun(module=module, seconds=round(statistics.median(seconds), 4), min_seconds=round(min(seconds), 4),
+                     modules=samples[-1]["modules"], heavy=samples[-1]["heavy"])
+
+
+def save_results(output_dir: str, repeat: int, runs: list[ImportRun]) -> str:
+    commit = _git_commit()
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"import-{commit}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "runs": [asdict(run) for run in runs],
+        }, file, indent=2)
+    return path
+
+
+def load_results(path: str) -> list[ImportRun]:
+    with open(path, encoding="utf-8") as file:
+        names = {field.name for field in fields(ImportRun)}
+        return [ImportRun(**{key: value for key, value in run.items() if key in names})
+                for run in json.load(file)["runs"]]
+
+
+def compare(baseline: list[ImportRun], current: list[ImportRun], threshold: float) -> list[str]:
+    """Print the change of every module against the baseline and return the regressions beyond `threshold`."""
+    baseline_runs = {run.module: run for run in baseline}
+    regressions = []
+    print(f"{'module':<32} {'seconds':>18} {'modules':>14}  heavy dependencies added")
+    for run in current:
+        before = baseline_runs.get(run.module)
+        if before is None:
+            continue
+        change = _change(before.seconds, run.seconds)
+        added = sorted(set(run.heavy) - set(before.heavy))
+        print(f"{run.module:<32} {run.seconds:>9.3f} {change:>+7.1%} {before.modules:>6}->{run.modules:<6}  "
+              f"{', '.join(added)}")
+        if added or (change > threshold and run.seconds - before.seconds > MIN_REGRESSION_SECONDS):
+            regressions.append(run.module)
+    return regressions
+
+
+def print_runs(runs: list[ImportRun]) -> None:
+    print(f"{'module':<32} {'median (s)':>10} {'min (s)':>8} {'modules':>8}  heavy dependencies")
+    for run in runs:
+        print(f"{run.module:<32} {run.seconds:>10.3f} {run.min_seconds:>8.3f} {run.modules:>8}  {', '.join(run.heavy)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import time of the modules.")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Relative import time change reported as a regression.")
+    args = parser.parse_args()
+
+    runs = [measure(module, args.repeat) for module in args.modules]
+    print_runs(runs)
+    print(f"Saved {save_results(args.output_dir, args.repeat, runs)}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), runs, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Stand-in for `serper-mcp-server` that answers searches with canned results after a configurable delay.
+
+    python benchmarks/stub_serper_server.py --latency 0.05 --spawn-log spawns.log
+
+Every start appends the process id to the spawn log, so the benchmark can count server spawns. The options
+are passed on the command line because MCP stdio clients do not forward the parent environment.
+"""
+import argparse
+import asyncio
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+LATENCY_SECONDS = 0.05
+RESULTS = 5
+
+server = FastMCP("serper")
+
+
+@server.tool()
+async def google_search(q: str, gl: str = "us", hl: str = "en", num: int = 10) -> dict:
+    """Search Google for the given query."""
+    await asyncio.sleep(LATENCY_SECONDS)
+    return {
+        "searchParameters": {"q": q, "gl": gl, "hl": hl, "num": num},
+        "organic": [
+            {
+                "title": f"Result {position} for {q}",
+                "link": f"https://example.com/{position}?q={q.replace(' ', '+')}",
+                "snippet": f"Snippet {position} about {q}. " * 8,
+                "position": position,
+            }
+            for position in range(1, min(num, RESULTS) + 1)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=LATENCY_SECONDS)
+    parser.add_argument("--results", type=int, default=RESULTS)
+    parser.add_argument("--spawn-log")
+    args = parser.parse_args()
+    LATENCY_SECONDS, RESULTS = args.latency, args.results
+
+    if args.spawn_log:
+        with open(args.spawn_log, "a", encoding="utf-8") as file:
+            file.write(f"{os.getpid()}\n")
+    server.run("stdio")
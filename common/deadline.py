@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+# Total time budget of a pipeline run in seconds, 0 for none.
+PIPELINE_DEADLINE_SECONDS = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "0"))
+# Relative share of the budget of every stage, e.g. `guardrail=0.05,plan=0.15,research=0.55,summarize=0.25`.
+PIPELINE_STAGE_SHARES = os.getenv("PIPELINE_STAGE_SHARES", "guardrail=0.05,plan=0.15,research=0.55,summarize=0.25")
+STAGES = ("guardrail", "plan", "research", "summarize")
+
+
+class DeadlineExceeded(TimeoutError):
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"The {budget:.1f}s deadline was exceeded in {stage}")
+        self.stage = stage
+        self.budget = budget
+
+
+def parse_shares(value: str = PIPELINE_STAGE_SHARES) -> dict[str, float]:
+    shares = {stage: 0.25 for stage in STAGES}
+    for item in value.split(","):
+        stage, _, share = item.partition("=")
+        if stage.strip() in shares and share:
+            shares[stage.strip()] = float(share)
+    return shares
+
+
+class Deadline:
+    """A time budget split across the pipeline stages.
+
+    A stage gets its share of what is left, relative to the stages after it, so time a stage does not use is
+    handed on to the later ones and the summary always keeps its part of the budget.
+    """
+
+    def __init__(self, seconds: float, shares: dict[str, float] | None = None):
+        self.seconds = seconds
+        self.shares = shares or parse_shares()
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def stage_timeout(self, stage: str) -> float:
+        later = STAGES[STAGES.index(stage):]
+        total = sum(self.shares[name] for name in later)
+        return self.remaining() * (self.shares[stage] / total if total else 1.0)
+
+    async def run(self, stage: str, call: Awaitable[T]) -> T:
+        """Await `call` within the time of `stage`, cancelling it and raising DeadlineExceeded when it overruns."""
+        try:
+            return await asyncio.wait_for(call, self.stage_timeout(stage))
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage, self.seconds) from None
+
+
+def create_deadline(seconds: float | None = None) -> Deadline | None:
+    """Deadline of `seconds`, or of PIPELINE_DEADLINE_SECONDS when not given; None when there is no budget."""
+    seconds = PIPELINE_DEADLINE_SECONDS if seconds is None else seconds
+    return Deadline(seconds) if seconds > 0 else None
@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import logging
+import os
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Prompt tokens a single summarize call may use per model. Well below the context windows: long prompts make the
+# small summarize models slow and expensive long before they hit the limit.
+MODEL_TOKEN_BUDGETS: dict[str, int] = {
+    "gpt-5": 64_000,
+    "gpt-5-mini": 48_000,
+    "gpt-5-nano": 24_000,
+    "gpt-4o-mini": 24_000,
+    "gemini-2.5-pro": 96_000,
+    "gemini-2.5-flash": 64_000,
+    "gemini-2.5-flash-lite": 32_000,
+}
+DEFAULT_TOKEN_BUDGET = 16_000
+SUMMARIZE_MAX_CONCURRENCY = int(os.getenv("SUMMARIZE_MAX_CONCURRENCY", "4"))
+MAX_REDUCE_LEVELS = 4
+
+SEPARATOR = "\n\n"
+
+
+def token_budget(model: str) -> int:
+    """Budget for `model`, overridable with `SUMMARIZE_TOKEN_BUDGETS=gpt-5-nano=8000,gemini-2.5-flash=32000`."""
+    overrides = dict(item.split("=", 1) for item in os.getenv("SUMMARIZE_TOKEN_BUDGETS", "").split(",") if "=" in item)
+    if model in overrides:
+        return int(overrides[model])
+    return MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+@functools.cache
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads its encodings on first use, which fails offline.
+        logger.debug(f"tiktoken is not available, estimating tokens from the length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split(text: str, max_tokens: int, separator: str = SEPARATOR) -> list[tuple[str, str]]:
+    """Split `text` into pieces of at most `max_tokens`, on paragraph, then line, then word boundaries.
+
+    Every piece comes with the separator it was split from the piece before it on, `separator` for the first one,
+    so the pieces can be joined back the way they were written.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [(text, separator)]
+    for boundary in ("\n\n", "\n", " "):
+        parts = text.split(boundary)
+        if len(parts) > 1:
+            break
+    else:
+        # A single word longer than the budget.
+        size = max_tokens * 4
+        return [(text[start:start + size], separator if start == 0 else "") for start in range(0, len(text), size)]
+
+    pieces: list[tuple[str, str]] = []
+    skipped: str | None = None
+    for index, part in enumerate(parts):
+        for piece, piece_separator in _split(part, max_tokens, separator if index == 0 else boundary):
+            if not piece.strip():
+                # Keep the wider separator of a dropped blank piece for the next one.
+                skipped = skipped if skipped is not None else piece_separator
+                continue
+            pieces.append((piece, skipped if skipped is not None else piece_separator))
+            skipped = None
+    return pieces
+
+
+def chunk(texts: list[str], max_tokens: int) -> list[str]:
+    """Pack the paragraphs of `texts` in order into chunks of at most `max_tokens`.
+
+    Texts are joined with SEPARATOR, the pieces of a split text with the separator they were split on.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        for piece, separator in _split(text, max_tokens):
+            tokens = count_tokens(piece)
+            separator_tokens = count_tokens(separator)
+            if current and current_tokens + separator_tokens + tokens > max_tokens:
+                chunks.append("".join(current))
+                current, current_tokens = [], 0
+            if current:
+                current.append(separator)
+                current_tokens += separator_tokens
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+async def map_reduce(texts: list[str], budget: int, condense: Callable[[str], Awaitable[str]],
+                     max_concurrency: int = SUMMARIZE_MAX_CONCURRENCY) -> list[str]:
+    """Condense `texts` until they fit in `budget` tokens together.
+
+    Texts that already fit are returned unchanged. Otherwise they are packed into chunks of `budget` tokens
+    which are condensed in parallel (map), and the partial summaries are packed and condensed again (reduce)
+    until they fit.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def condense_one(text: str) -> str:
+        async with semaphore:
+            return await condense(text)
+
+    for level in range(MAX_REDUCE_LEVELS):
+        total = sum(count_tokens(text) for text in texts) + count_tokens(SEPARATOR) * max(0, len(texts) - 1)
+        if total <= budget:
+            return texts
+        chunks = chunk(texts, budget)
+        logger.info(f"Condensing {len(texts)} texts ({total} tokens) in {len(chunks)} chunks, level {level + 1}")
+        texts = list(await asyncio.gather(*(condense_one(text) for text in chunks)))
+    logger.warning(f"Summaries still exceed the budget of {budget} tokens after {MAX_REDUCE_LEVELS} levels")
+    return texts
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+DEFAULT_MAX_IDLE_SECONDS = float(os.getenv("MCP_POOL_MAX_IDLE_SECONDS", "300"))
+DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS = 30.0
+DEFAULT_HEALTH_CHECK_TIMEOUT_SECONDS = 10.0
+# Upper bound of a single MCP request; the pipeline deadline cancels calls sooner.
+MCP_TIMEOUT_SECONDS = float(os.getenv("MCP_TIMEOUT_SECONDS", "30"))
+
+_pools: list["MCPServerPool"] = []
+
+
+class _PooledServer(Generic[T]):
+    """A warm server owned by a dedicated task, so it is opened and closed in the same task."""
+
+    def __init__(self, server: T):
+        self.server = server
+        self.leases = 0
+        # Failed a health check while leased; closed once its leases are done.
+        self.unhealthy = False
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: BaseException | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, open_server: Callable[[T], Awaitable[Any]], close_server: Callable[[T], Awaitable[Any]]) -> None:
+        self._task = asyncio.create_task(self._run(open_server, close_server))
+
+    async def wait_ready(self) -> None:
+        """Wait until the server is open, raising the error it failed to open with."""
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            with suppress(Exception, asyncio.CancelledError):
+                await self._task
+
+    async def _run(self, open_server: Callable[[T], Awaitable[Any]],
+                   close_server: Callable[[T], Awaitable[Any]]) -> None:
+        try:
+            await open_server(self.server)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+        try:
+            await self._stop.wait()
+        finally:
+            try:
+                await close_server(self.server)
+            except Exception as e:
+                logger.warning(f"Failed to close pooled MCP server: {e}")
+
+
+class MCPServerPool(Generic[T]):
+    """Keeps up to `size` MCP servers warm and leases them to concurrent runs.
+
+    Servers are spawned lazily, shared between leases (an MCP session multiplexes requests),
+    health-checked before being handed out and restarted when they crash. Servers without
+    leases are closed after `max_idle_seconds`.
+    """
+
+    def __init__(self,
+                 name: str,
+                 factory: Callable[[], T],
+                 open_server: Callable[[T], Awaitable[Any]],
+                 close_server: Callable[[T], Awaitable[Any]],
+                 health_check: Callable[[T], Awaitable[Any]],
+                 size: int = DEFAULT_POOL_SIZE,
+                 max_idle_seconds: float = DEFAULT_MAX_IDLE_SECONDS,
+                 health_check_interval_seconds: float = DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS,
+                 health_check_timeout_seconds: float = DEFAULT_HEALTH_CHECK_TIMEOUT_SECONDS):
+        self.name = name
+        self.size = max(1, size)
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.health_check_timeout_seconds = health_check_timeout_seconds
+        self._factory = factory
+        self._open_server = open_server
+        self._close_server = close_server
+        self._health_check = health_check
+        self._slots: list[_PooledServer[T]] = []
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reaper: asyncio.Task | None = None
+        self.spawned = 0
+        self.restarted = 0
+        _pools.append(self)
+
+    async def start(self) -> None:
+        self._bind_loop()
+        async with self._lock:
+            while len(self._slots) < self.size:
+                self._spawn()
+            slots = list(self._slots)
+        await asyncio.gather(*(slot.wait_ready() for slot in slots))
+        self._ensure_reaper()
+
+    async def close(self) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            self._slots = []
+            return
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        async with self._lock:
+            slots, self._slots = self._slots, []
+        await asyncio.gather(*(slot.stop() for slot in slots))
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[T]:
+        slot = await self._acquire()
+        try:
+            yield slot.server
+        except BaseException:
+            # Make the next lease re-check the server in case the failure came from it.
+            slot.last_checked = 0.0
+            raise
+        finally:
+            slot.leases -= 1
+            slot.last_used = time.monotonic()
+            if slot.unhealthy and slot.leases == 0:
+                await self._retire(slot)
+
+    def _bind_loop(self) -> None:
+        # A pool outlives `asyncio.run` calls, but its servers are bound to the loop they started on.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._slots = []
+            self._reaper = None
+
+    def _spawn(self) -> _PooledServer[T]:
+        """Add a server that starts opening in the background; leases wait for it with `wait_ready`."""
+        slot = _PooledServer(self._factory())
+        slot.start(self._open_server, self._close_server)
+        self._slots.append(slot)
+        self.spawned += 1
+        logger.info(f"Starting pooled MCP server {self.name} ({len(self._slots)}/{self.size})")
+        return slot
+
+    def _reserve(self) -> tuple[_PooledServer[T], bool]:
+        """Lease a slot, spawning one when none is idle and there is room. Returns it and whether it is new."""
+        self._slots = [slot for slot in self._slots if slot.alive]
+        candidates = [slot for slot in self._slots if not slot.unhealthy]
+        idle = [slot for slot in candidates if slot.leases == 0]
+        if idle or (candidates and len(self._slots) >= self.size):
+            slot, spawned = min(idle or candidates, key=lambda s: s.leases), False
+        else:
+            # May briefly exceed `size` while unhealthy servers finish their leases.
+            slot, spawned = self._spawn(), True
+        slot.leases += 1
+        return slot, spawned
+
+    async def _acquire(self) -> _PooledServer[T]:
+        # The lock only guards picking the slot; servers open and are health-checked outside of it, so leases that
+        # can share a warm server do not wait behind another one starting.
+        self._bind_loop()
+        while True:
+            async with self._lock:
+                slot, spawned = self._reserve()
+            try:
+                await slot.wait_ready()
+                healthy = spawned or await self._is_healthy(slot)
+            except BaseException:
+                slot.leases -= 1
+                raise
+            if healthy:
+                self._ensure_reaper()
+                return slot
+
+            async with self._lock:
+                slot.leases -= 1
+                stale = slot.leases == 0
+                if stale:
+                    # Replaced by a new server on the next pass.
+                    if slot in self._slots:
+                        self._slots.remove(slot)
+                    self.restarted += 1
+                else:
+                    # Restarting it would break the calls of its leases; they keep it until they are done.
+                    slot.unhealthy = True
+            if stale:
+                await slot.stop()
+
+    async def _is_healthy(self, slot: _PooledServer[T]) -> bool:
+        now = time.monotonic()
+        if now - slot.last_checked < self.health_check_interval_seconds:
+            return slot.alive
+        try:
+            await asyncio.wait_for(self._health_check(slot.server), self.health_check_timeout_seconds)
+        except Exception as e:
+            logger.warning(f"Pooled MCP server {self.name} failed its health check: {e}")
+            return False
+        slot.last_checked = now
+        return slot.alive
+
+    async def _retire(self, slot: _PooledServer[T]) -> None:
+        async with self._lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+        logger.info(f"Closing unhealthy pooled MCP server {self.name} after its last lease")
+        await slot.stop()
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        while self._slots:
+            await asyncio.sleep(min(self.max_idle_seconds, 30.0))
+            now = time.monotonic()
+            async with self._lock:
+                expired = [slot for slot in self._slots
+                           if slot.leases == 0 and now - slot.last_used >= self.max_idle_seconds]
+                self._slots = [slot for slot in self._slots if slot not in expired]
+            for slot in expired:
+                logger.info(f"Closing idle pooled MCP server {self.name}")
+                await slot.stop()
+
+
+def mcp_server_pool(name: str, factory: Callable[[], T], **kwargs) -> MCPServerPool[T]:
+    """Pool for `agents.mcp.MCPServer` instances (openai-agents)."""
+    return MCPServerPool(
+        name,
+        factory,
+        open_server=lambda server: server.connect(),
+        close_server=lambda server: server.cleanup(),
+        health_check=lambda server: server.list_tools(),
+        **kwargs,
+    )
+
+
+def mcp_toolset_pool(name: str, factory: Callable[[], T], **kwargs) -> MCPServerPool[T]:
+    """Pool for `google.adk.tools.McpToolset` instances."""
+    return MCPServerPool(
+        name,
+        factory,
+        open_server=lambda toolset: toolset.get_tools(),
+        close_server=lambda toolset: toolset.close(),
+        health_check=lambda toolset: toolset.get_tools(),
+        **kwargs,
+    )
+
+
+async def close_all_pools() -> None:
+    await asyncio.gather(*(pool.close() for pool in _pools))
@@ -0,0 +1,192 @@
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# USD per one million (input, output) tokens. Reasoning tokens are billed as output tokens.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-5": (1.25, 10.00),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5-nano": (0.05, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+_queue_seconds: contextvars.ContextVar[float] = contextvars.ContextVar("queue_seconds", default=0.0)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def record_queue_time(seconds: float) -> None:
+    """Attribute time spent waiting for a concurrency slot to the next stage started in this context."""
+    _queue_seconds.set(_queue_seconds.get() + seconds)
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    model: str
+    calls: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    llm_seconds: float = 0.0
+    tool_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+@dataclass
+class StageRecorder:
+    """Collects the measurements of a single stage call while it runs."""
+    stage: str
+    model: str
+    llm_seconds: float = 0.0
+    tool_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    _llm_started: float | None = field(default=None, repr=False)
+    _tools_started: dict[str, list[float]] = field(default_factory=dict, repr=False)
+
+    def llm_start(self) -> None:
+        self._llm_started = time.perf_counter()
+
+    def llm_end(self) -> None:
+        if self._llm_started is not None:
+            self.llm_seconds += time.perf_counter() - self._llm_started
+            self._llm_started = None
+
+    def tool_start(self, call_id: str) -> None:
+        self._tools_started.setdefault(call_id, []).append(time.perf_counter())
+
+    def tool_end(self, call_id: str) -> None:
+        started = self._tools_started.get(call_id)
+        if started:
+            self.tool_seconds += time.perf_counter() - started.pop()
+
+    def add_usage(self, input_tokens: int = 0, output_tokens: int = 0, reasoning_tokens: int = 0) -> None:
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+        self.reasoning_tokens += reasoning_tokens or 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[tuple[str, str], StageMetrics] = {}
+
+    @contextmanager
+    def stage(self, stage: str, model: str) -> Iterator[StageRecorder]:
+        recorder = StageRecorder(stage=stage, model=model)
+        queue_seconds = _queue_seconds.get()
+        _queue_seconds.set(0.0)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield recorder
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            wall_seconds = time.perf_counter() - started
+            self._merge(recorder, wall_seconds, queue_seconds, failed)
+
+    def _merge(self, recorder: StageRecorder, wall_seconds: float, queue_seconds: float, failed: bool) -> None:
+        cost = estimate_cost(recorder.model, recorder.input_tokens, recorder.output_tokens)
+        with self._lock:
+            metrics = self._stages.setdefault((recorder.stage, recorder.model),
+                                              StageMetrics(recorder.stage, recorder.model))
+            metrics.calls += 1
+            metrics.errors += int(failed)
+            metrics.wall_seconds += wall_seconds
+            metrics.queue_seconds += queue_seconds
+            metrics.llm_seconds += recorder.llm_seconds
+            metrics.tool_seconds += recorder.tool_seconds
+            metrics.input_tokens += recorder.input_tokens
+            metrics.output_tokens += recorder.output_tokens
+            metrics.reasoning_tokens += recorder.reasoning_tokens
+            metrics.cost_usd += cost
+        _attach_to_opik_span(recorder, wall_seconds, queue_seconds, cost)
+
+    def snapshot(self) -> list[StageMetrics]:
+        with self._lock:
+            return [StageMetrics(**asdict(metrics)) for metrics in self._stages.values()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self) -> str:
+        return json.dumps([asdict(metrics) for metrics in self.snapshot()], indent=2)
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        for name, kind, help_text in _PROMETHEUS_METRICS:
+            lines.append(f"# HELP agent_stage_{name} {help_text}")
+            lines.append(f"# TYPE agent_stage_{name} {kind}")
+            attribute = name.removesuffix("_total")
+            for metrics in snapshot:
+                labels = f'stage="{_escape(metrics.stage)}",model="{_escape(metrics.model)}"'
+                lines.append(f"agent_stage_{name}{{{labels}}} {getattr(metrics, attribute)}")
+        return "\n".join(lines) + "\n"
+
+
+_PROMETHEUS_METRICS = [
+    ("calls_total", "counter", "Number of stage calls."),
+    ("errors_total", "counter", "Number of stage calls that raised."),
+    ("wall_seconds_total", "counter", "Wall time spent in the stage."),
+    ("queue_seconds_total", "counter", "Time spent waiting for a concurrency slot before the stage started."),
+    ("llm_seconds_total", "counter", "Time spent waiting on the model."),
+    ("tool_seconds_total", "counter", "Time spent in tool (MCP) calls."),
+    ("input_tokens_total", "counter", "Input tokens sent to the model."),
+    ("output_tokens_total", "counter", "Output tokens generated by the model, including reasoning tokens."),
+    ("reasoning_tokens_total", "counter", "Reasoning tokens generated by the model."),
+    ("cost_usd_total", "counter", "Estimated cost in USD."),
+]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _attach_to_opik_span(recorder: StageRecorder, wall_seconds: float, queue_seconds: float, cost: float) -> None:
+    # Without opik imported there is no span, and importing it here would cost seconds on the first call.
+    if "opik" not in sys.modules:
+        return
+    try:
+        from opik import opik_context
+        if opik_context.get_current_span_data() is None:
+            return
+        opik_context.update_current_span(metadata={
+            "stage": recorder.stage,
+            "wall_seconds": wall_seconds,
+            "queue_seconds": queue_seconds,
+            "llm_seconds": recorder.llm_seconds,
+            "tool_seconds": recorder.tool_seconds,
+            "reasoning_tokens": recorder.reasoning_tokens,
+        }, usage={
+            "prompt_tokens": recorder.input_tokens,
+            "completion_tokens": recorder.output_tokens,
+            "total_tokens": recorder.input_tokens + recorder.output_tokens,
+        }, model=recorder.model, total_cost=cost)
+    except Exception as e:
+        logger.debug(f"Could not attach stage metrics to the opik span: {e}")
+
+
+metrics = MetricsRegistry()
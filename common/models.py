@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class WebSearchItem(BaseModel):
+    query: str = Field(description="The search term to use for the web search")
+    reason: str = Field(description="Your reasoning for why this search is important to the query")
+
+
+class WebSearchPlan(BaseModel):
+    searches: list[WebSearchItem] = Field(description="A list of web searches to perform to best answer the query")
+
+
+class ResearchReport(BaseModel):
+    short_summary: str = Field(description="A short 2~3 sentence summary of the findings.")
+    markdown_report: str = Field(description="The final report")
+
+
+class MarkdownReport(BaseModel):
+    title: str = Field(description="The title of the report")
+    markdown: str = Field(description="The summarized report as a markdown document")
+
+
+class EvaluateResult(BaseModel):
+    passed: bool
+    result: str
+    reasoning: str
+    feedback: Optional[str]
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from common.map_reduce import count_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+RATE_LIMIT_BASE_DELAY_SECONDS = 1.0
+RATE_LIMIT_MAX_DELAY_SECONDS = 60.0
+# A call this many times slower than usual counts as a sign of overload, like a 429.
+RATE_LIMIT_LATENCY_FACTOR = float(os.getenv("RATE_LIMIT_LATENCY_FACTOR", "3"))
+# Concurrency is cut at most once per round trip (the usual latency, at most this long), so a burst of 429s from
+# calls that were already in flight halves it only once.
+DECREASE_COOLDOWN_SECONDS = 5.0
+THROTTLE_FACTOR = 0.5
+SLOW_FACTOR = 0.9
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    requests_per_minute: float
+    tokens_per_minute: float | None = None
+    max_concurrency: int = 16
+
+
+# Client-side quotas per model or provider, a little under the published tier-1 limits.
+DEFAULT_RATE_LIMITS: dict[str, RateLimit] = {
+    "gpt-5": RateLimit(450, 450_000),
+    "gpt-5-mini": RateLimit(450, 180_000),
+    "gpt-5-nano": RateLimit(450, 180_000),
+    "gpt-4o-mini": RateLimit(450, 180_000),
+    "gemini-2.5-pro": RateLimit(140, 1_800_000),
+    "gemini-2.5-flash": RateLimit(900, 900_000),
+    "gemini-2.5-flash-lite": RateLimit(3_500, 3_500_000),
+    "serper": RateLimit(250, max_concurrency=8),
+}
+DEFAULT_RATE_LIMIT = RateLimit(300)
+
+_limiters: dict[str, "AdaptiveLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limit_for(key: str) -> RateLimit:
+    """Quota of `key`, overridable with `RATE_LIMITS=gpt-5-nano=500:200000:16,serper=300` (rpm:tpm:concurrency)."""
+    for item in os.getenv("RATE_LIMITS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() == key and value:
+            requests, tokens, concurrency = (value.split(":") + ["", ""])[:3]
+            return RateLimit(float(requests), float(tokens) if tokens else None,
+                             int(concurrency) if concurrency else DEFAULT_RATE_LIMIT.max_concurrency)
+    return DEFAULT_RATE_LIMITS.get(key, DEFAULT_RATE_LIMIT)
+
+
+class TokenBucket:
+    """Refills `per_minute` units a minute, holding at most a tenth of that."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, per_minute / 10)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    async def take(self, amount: float) -> None:
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.level >= amount:
+                self.level -= amount
+                return
+            await asyncio.sleep((amount - self.level) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or refund) the difference between the estimated and the actual usage; the level may go negative."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass
+class LimiterStats:
+    key: str
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    slow: int = 0
+    wait_seconds: float = 0.0
+    concurrency: float = 0.0
+
+
+class AdaptiveLimiter:
+    """Request and token budgets of one model or provider, with AIMD concurrency.
+
+    Every successful call raises the concurrency limit by about one per limit's worth of calls, and a 429 (or a
+    call `RATE_LIMIT_LATENCY_FACTOR` times slower than usual) cuts it multiplicatively.
+    """
+
+    def __init__(self, key: str, limit: RateLimit):
+        self.key = key
+        self.limit = limit
+        self.concurrency = float(limit.max_concurrency)
+        self.requests = TokenBucket(limit.requests_per_minute)
+        self.tokens = TokenBucket(limit.tokens_per_minute) if limit.tokens_per_minute else None
+        self.stats = LimiterStats(key, concurrency=self.concurrency)
+        self._in_flight = 0
+        self._latency: float | None = None
+        self._decreased = 0.0
+        self._changed: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Hold one of the concurrent calls, after taking a request and `tokens` from the budgets."""
+        changed = self._bind_loop()
+        started = time.monotonic()
+        async with changed:
+            await changed.wait_for(lambda: self._in_flight < max(1, int(self.concurrency)))
+            self._in_flight += 1
+        try:
+            await self.requests.take(1)
+            if self.tokens is not None and tokens:
+                await self.tokens.take(tokens)
+            self.stats.requests += 1
+            self.stats.wait_seconds += time.monotonic() - started
+            yield
+        finally:
+            async with changed:
+                # Calls of a loop the limiter has since left no longer count.
+                if changed is self._changed:
+                    self._in_flight -= 1
+                changed.notify_all()
+
+    def _bind_loop(self) -> asyncio.Condition:
+        # A limiter outlives `asyncio.run` calls, but its condition is bound to the loop it first waited on.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Condition()
+            self._in_flight = 0
+        return self._changed
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def on_success(self, seconds: float) -> None:
+        if self._latency is not None and seconds > RATE_LIMIT_LATENCY_FACTOR * self._latency:
+            self.stats.slow += 1
+            self._decrease(SLOW_FACTOR)
+        else:
+            self.concurrency = min(float(self.limit.max_concurrency), self.concurrency + 1 / self.concurrency)
+        self._latency = seconds if self._latency is None else 0.9 * self._latency + 0.1 * seconds
+        self.stats.concurrency = round(self.concurrency, 2)
+
+    def on_throttled(self) -> None:
+        self.stats.throttled += 1
+        self._decrease(THROTTLE_FACTOR)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._decreased < min(DECREASE_COOLDOWN_SECONDS, self._latency or DECREASE_COOLDOWN_SECONDS):
+            return
+        self._decreased = now
+        self.concurrency = max(1.0, self.concurrency * factor)
+        self.stats.concurrency = round(self.concurrency, 2)
+        logger.info(f"Concurrency of {self.key} lowered to {self.concurrency:.1f}")
+
+
+def get_limiter(key: str) -> AdaptiveLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(key, rate_limit_for(key))
+        return limiter
+
+
+def rate_limit_stats() -> dict[str, dict]:
+    with _limiters_lock:
+        return {key: asdict(limiter.stats) for key, limiter in _limiters.items()}
+
+
+def reset_rate_limits() -> None:
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    # openai errors carry `status_code`, google-genai errors `code`.
+    return getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429
+
+
+def retry_delay(attempt: int, error: BaseException | None = None) -> float:
+    """Full-jitter exponential backoff, but never shorter than the server's `Retry-After`."""
+    delay = random.uniform(0, min(RATE_LIMIT_MAX_DELAY_SECONDS, RATE_LIMIT_BASE_DELAY_SECONDS * 2 ** attempt))
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(delay, float(headers.get("retry-after", 0)))
+    except (TypeError, ValueError):
+        return delay
+
+
+async def rate_limited(key: str, call: Callable[[], Awaitable[T]], tokens: int = 0,
+                       usage: Callable[[T], int] | None = None) -> T:
+    """Run `call` within the limits of `key`, retrying it with backoff when it is rate limited.
+
+    `tokens` is the estimated token usage of the call, corrected with `usage(result)` once it is known.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return await call()
+    limiter = get_limiter(key)
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        async with limiter.slot(tokens):
+            started = time.monotonic()
+            try:
+                result = await call()
+            except Exception as e:
+                if not is_rate_limited(e):
+                    raise
+                limiter.on_throttled()
+                if attempt == RATE_LIMIT_MAX_RETRIES:
+                    raise
+                error = e
+            else:
+                limiter.on_success(time.monotonic() - started)
+                if usage is not None:
+                    limiter.record_usage(tokens, usage(result))
+                return result
+        # Back off outside the slot, so waiting retries do not hold the concurrency of the others.
+        delay = retry_delay(attempt, error)
+        limiter.stats.retries += 1
+        logger.info(f"{key} rate limited, retrying in {delay:.1f}s ({attempt + 1}/{RATE_LIMIT_MAX_RETRIES})")
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+@asynccontextmanager
+async def rate_limited_stream(key: str, tokens: int = 0) -> AsyncIterator[None]:
+    """Hold a slot of `key` for a streamed call. Streams are not retried, since their output has been consumed."""
+    if not RATE_LIMIT_ENABLED:
+        yield
+        return
+    limiter = get_limiter(key)
+    async with limiter.slot(tokens):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                limiter.on_throttled()
+            raise
+        limiter.on_success(time.monotonic() - started)
+
+
+def estimate_tokens(input: object) -> int:
+    text = input if isinstance(input, str) else json.dumps(input, ensure_ascii=False, default=str)
+    return count_tokens(text)
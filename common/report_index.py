@@ -0,0 +1,360 @@
+import glob
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Literal
+
+from common.cache_store import DEFAULT_CACHE_DIR
+from common.report_sink import REPORT_DIR
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: a similar topic returns the stored report instead of fresh research.
+REPORT_INDEX_ENABLED = os.getenv("REPORT_INDEX_ENABLED", "0") == "1"
+REPORT_INDEX_DIR = os.getenv("REPORT_INDEX_DIR", os.path.join(DEFAULT_CACHE_DIR, "report_index"))
+# How close the topic of earlier research has to be (idf-weighted Jaccard of their terms) to be reused.
+REPORT_INDEX_REUSE_THRESHOLD = float(os.getenv("REPORT_INDEX_REUSE_THRESHOLD", "0.8"))
+REPORT_INDEX_MAX_AGE_SECONDS = float(os.getenv("REPORT_INDEX_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+# Documents added since the last build are searched from memory until there are this many.
+REPORT_INDEX_PENDING_LIMIT = int(os.getenv("REPORT_INDEX_PENDING_LIMIT", "64"))
+CANDIDATES = 20
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+Source = Literal["research", "summary"]
+
+_TOKEN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were what when where "
+    "which who why will with".split()
+)
+
+_report_index: "ReportIndex | None" = None
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN.findall(text.casefold()) if token not in _STOPWORDS]
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "little")
+
+
+@dataclass
+class IndexedReport:
+    id: int
+    source: Source
+    topic: str
+    text: str
+    created_at: float
+    short_summary: str | None = None
+    path: str | None = None
+    score: float = 0.0
+    similarity: float = 0.0
+
+
+class _Segment:
+    """An immutable, memory-mapped build of the index.
+
+    Files of a generation directory:
+      terms.u64      sorted term hashes
+      offsets.u64    start of each term's postings (one more than the terms)
+      postings.u32   (document, term frequency) pairs
+      lengths.u32    terms per document
+      docs.jsonl     one document per line, `docs.u64` holds the start of each line (one more than the documents)
+    """
+
+    FILES = ("terms.u64", "offsets.u64", "postings.u32", "lengths.u32", "docs.u64", "docs.jsonl")
+
+    def __init__(self, directory: str | None, total_length: int = 0):
+        self.total_length = total_length
+        self._maps: list[mmap.mmap] = []
+        views = {name: self._map(directory, name) for name in self.FILES} if directory else {}
+        self.terms = views.get("terms.u64", memoryview(b"")).cast("Q")
+        self.offsets = views.get("offsets.u64", memoryview(b"")).cast("Q")
+        self.postings = views.get("postings.u32", memoryview(b"")).cast("I")
+        self.lengths = views.get("lengths.u32", memoryview(b"")).cast("I")
+        self.doc_offsets = views.get("docs.u64", memoryview(b"")).cast("Q")
+        self.docs = views.get("docs.jsonl", memoryview(b""))
+
+    def _map(self, directory: str, name: str) -> memoryview:
+        with open(os.path.join(directory, name), "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b"")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def postings_of(self, term_hash: int) -> memoryview:
+        index = bisect_left(self.terms, term_hash)
+        if index == len(self.terms) or self.terms[index] != term_hash:
+            return self.postings[0:0]
+        return self.postings[2 * self.offsets[index]:2 * self.offsets[index + 1]]
+
+    def doc(self, doc_id: int) -> dict:
+        return json.loads(bytes(self.docs[self.doc_offsets[doc_id]:self.doc_offsets[doc_id + 1]]))
+
+    def close(self) -> None:
+        for view in (self.terms, self.offsets, self.postings, self.lengths, self.doc_offsets, self.docs):
+            view.release()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # A view is still in use; the map is closed when it is garbage collected.
+                pass
+
+
+class ReportIndex:
+    """BM25 index of earlier research reports and summaries, stored under `directory`.
+
+    Documents are appended to `pending.jsonl` and searched from memory until `pending_limit` of them have
+    accumulated, then everything is rebuilt into a new memory-mapped generation, so opening the index only maps
+    its files. A document added for the `path` of an earlier one replaces it: the earlier one is tombstoned in
+    `deleted.json` and left out of searches and of the next build. One process should write to an index at a time.
+    """
+
+    def __init__(self, directory: str = REPORT_INDEX_DIR, pending_limit: int = REPORT_INDEX_PENDING_LIMIT):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.pending_limit = pending_limit
+        self._lock = threading.Lock()
+        self._meta = self._read_json("meta.json", {"generation": 0, "documents": 0, "total_length": 0})
+        # Path of a report -> its modification time when it was indexed and the id of its document.
+        self._synced: dict[str, dict] = self._read_json("synced.json", {})
+        self._deleted: set[int] = set(self._read_json("deleted.json", []))
+        self._segment = _Segment(self._generation_dir(self._meta["generation"]) if self._meta["generation"] else None,
+                                 self._meta["total_length"])
+        self._pending: list[dict] = []
+        self._pending_terms: list[Counter] = []
+        self._pending_lengths: list[int] = []
+        pending_path = os.path.join(directory, "pending.jsonl")
+        if os.path.exists(pending_path):
+            with open(pending_path, encoding="utf-8") as file:
+                for line in file:
+                    doc = json.loads(line)
+                    # Documents already in the build survive in pending.jsonl only after an interrupted rebuild.
+                    if doc["id"] >= len(self._segment):
+                        self._append_pending(doc)
+
+    def __len__(self) -> int:
+        return len(self._segment) + len(self._pending)
+
+    def add(self, text: str, source: Source, topic: str, short_summary: str | None = None,
+            path: str | None = None) -> int:
+        with self._lock:
+            doc = {"id": len(self), "source": source, "topic": topic, "created_at": time.time(),
+                   "short_summary": short_summary, "path": path, "text": text}
+            with open(os.path.join(self.directory, "pending.jsonl"), "a", encoding="utf-8") as file:
+                file.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            self._append_pending(doc)
+            if path is not None:
+                self._replace(path, doc["id"])
+            if len(self._pending) >= self.pending_limit:
+                self._rebuild()
+            return doc["id"]
+
+    def sync_reports(self, report_dir: str = REPORT_DIR) -> int:
+        """Index the summaries in `report_dir` that are not indexed yet, with their file name as topic."""
+        added = 0
+        for path in sorted(glob.glob(os.path.join(report_dir, "*.md"))):
+            mtime = os.path.getmtime(path)
+            if self._synced.get(path, {}).get("mtime") == mtime:
+                continue
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+            topic = re.sub(r"-\d+$", "", os.path.splitext(os.path.basename(path))[0])
+            self.add(text, "summary", topic, path=path)
+            added += 1
+        return added
+
+    def search(self, query: str, limit: int = 5, source: Source | None = None,
+               max_age_seconds: float | None = None) -> list[IndexedReport]:
+        """Documents ranked by BM25 against `query`."""
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self)
+            if not terms or not count:
+                return []
+            average_length = (self._segment.total_length + sum(self._pending_lengths)) / count
+            scores: Counter = Counter()
+            for term in terms:
+                postings = self._postings(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings:
+                    if doc_id in self._deleted:
+                        continue
+                    length = self._length(doc_id)
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+            results = []
+            now = time.time()
+            for doc_id, score in scores.most_common():
+                doc = self._doc(doc_id)
+                if source is not None and doc["source"] != source:
+                    continue
+                if max_age_seconds is not None and doc["created_at"] < now - max_age_seconds:
+                    continue
+                results.append(IndexedReport(**doc, score=score))
+                if len(results) == limit:
+                    break
+            return results
+
+    def find_similar(self, topic: str, source: Source, threshold: float = REPORT_INDEX_REUSE_THRESHOLD,
+                     max_age_seconds: float | None = REPORT_INDEX_MAX_AGE_SECONDS) -> IndexedReport | None:
+        """The most recent of the best matching documents whose own topic is at least `threshold` similar."""
+        best = None
+        for report in self.search(topic, CANDIDATES, source, max_age_seconds):
+            report.similarity = self.similarity(topic, report.topic)
+            if report.similarity >= threshold and (
+                    best is None or (report.similarity, report.created_at) > (best.similarity, best.created_at)):
+                best = report
+        return best
+
+    def similarity(self, first: str, second: str) -> float:
+        """idf-weighted Jaccard similarity of the terms of two topics."""
+        first_terms, second_terms = set(tokenize(first)), set(tokenize(second))
+        if not first_terms or not second_terms:
+            return 0.0
+        with self._lock:
+            count = len(self)
+            weights = {term: math.log(1 + (count + 1) / (len(self._postings(term)) + 0.5))
+                       for term in first_terms | second_terms}
+        shared = sum(weights[term] for term in first_terms & second_terms)
+        return shared / sum(weights.values())
+
+    def compact(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._rebuild()
+
+    def stats(self) -> dict:
+        return {"documents": len(self) - len(self._deleted), "pending": len(self._pending),
+                "generation": self._meta["generation"]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._segment.close()
+
+    def _append_pending(self, doc: dict) -> None:
+        terms = Counter(tokenize(doc["topic"] + "\n" + doc["text"]))
+        self._pending.append(doc)
+        self._pending_terms.append(terms)
+        self._pending_lengths.append(sum(terms.values()))
+
+    def _postings(self, term: str) -> list[tuple[int, int]]:
+        postings = self._segment.postings_of(_term_hash(term))
+        found = [(postings[i], postings[i + 1]) for i in range(0, len(postings), 2)]
+        base = len(self._segment)
+        found += [(base + i, terms[term]) for i, terms in enumerate(self._pending_terms) if term in terms]
+        return found
+
+    def _length(self, doc_id: int) -> int:
+        if doc_id < len(self._segment):
+            return self._segment.lengths[doc_id]
+        return self._pending_lengths[doc_id - len(self._segment)]
+
+    def _doc(self, doc_id: int) -> dict:
+        if doc_id < len(self._segment):
+            return self._segment.doc(doc_id)
+        return self._pending[doc_id - len(self._segment)]
+
+    def _rebuild(self) -> None:
+        generation = self._meta["generation"] + 1
+        directory = self._generation_dir(generation)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+        postings: dict[int, list[int]] = {}
+        lengths = array("I")
+        doc_offsets = array("Q", [0])
+        with open(os.path.join(directory, "docs.jsonl"), "wb") as docs:
+            for doc_id in range(len(self)):
+                doc = self._doc(doc_id)
+                if doc_id in self._deleted:
+                    # Ids are positions, so a replaced document keeps its line, without text or postings.
+                    doc = {**doc, "text": ""}
+                    terms = Counter()
+                else:
+                    terms = Counter(tokenize(doc["topic"] + "\n" + doc["text"]))
+                for term, frequency in terms.items():
+                    postings.setdefault(_term_hash(term), []).extend((doc_id, frequency))
+                lengths.append(sum(terms.values()))
+                docs.write(json.dumps(doc, ensure_ascii=False).encode() + b"\n")
+                doc_offsets.append(docs.tell())
+
+        term_hashes = array("Q", sorted(postings))
+        offsets = array("Q", [0])
+        flat = array("I")
+        for term_hash in term_hashes:
+            flat.extend(postings[term_hash])
+            offsets.append(len(flat) // 2)
+        for name, values in (("terms.u64", term_hashes), ("offsets.u64", offsets), ("postings.u32", flat),
+                             ("lengths.u32", lengths), ("docs.u64", doc_offsets)):
+            with open(os.path.join(directory, name), "wb") as file:
+                values.tofile(file)
+
+        previous = self._meta["generation"]
+        self._meta = {"generation": generation, "documents": len(lengths), "total_length": sum(lengths)}
+        self._write_json("meta.json", self._meta)
+        open(os.path.join(self.directory, "pending.jsonl"), "w").close()
+        self._segment.close()
+        self._segment = _Segment(directory, self._meta["total_length"])
+        self._pending, self._pending_terms, self._pending_lengths = [], [], []
+        if previous:
+            shutil.rmtree(self._generation_dir(previous), ignore_errors=True)
+        logger.info(f"Rebuilt the report index: {len(lengths)} documents, {len(term_hashes)} terms")
+
+    def _replace(self, path: str, doc_id: int) -> None:
+        previous = self._synced.get(path, {}).get("id")
+        if previous is not None and previous != doc_id:
+            self._deleted.add(previous)
+            self._write_json("deleted.json", sorted(self._deleted))
+        self._synced[path] = {"mtime": os.path.getmtime(path) if os.path.exists(path) else None, "id": doc_id}
+        self._write_json("synced.json", self._synced)
+
+    def _generation_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f"gen-{generation}")
+
+    def _read_json(self, name: str, default):
+        try:
+            with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return default
+
+    def _write_json(self, name: str, value) -> None:
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(value, file, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+
+def get_report_index() -> ReportIndex | None:
+    global _report_index
+    if not REPORT_INDEX_ENABLED:
+        return None
+    if _report_index is None:
+        _report_index = ReportIndex()
+        if os.getenv("REPORT_SINK", "dir") == "dir":
+            added = _report_index.sync_reports()
+            if added:
+                logger.info(f"Indexed {added} reports from {REPORT_DIR}")
+    return _report_index
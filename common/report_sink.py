@@ -0,0 +1,160 @@
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Callable
+
+REPORT_DIR = os.getenv("REPORT_DIR", "report")
+REPORT_ARCHIVE = os.getenv("REPORT_ARCHIVE", os.path.join(REPORT_DIR, "reports.zip"))
+MAX_FILENAME_LENGTH = 120
+
+_report_sink: "ReportSink | None" = None
+
+
+def _default_file_mode() -> int:
+    # The umask can only be read by setting it, so read it once at import instead of racing other threads.
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp creates staging files readable by the owner only; reports get the mode `open(path, "w")` would give.
+REPORT_FILE_MODE = _default_file_mode()
+
+
+def sanitize_filename(title: str) -> str:
+    name = unicodedata.normalize("NFKC", title)
+    name = re.sub(r'[\x00-\x1f\x7f/\\:*?"<>|]+', "_", name)
+    name = " ".join(name.split()).strip(" ._")
+    return name[:MAX_FILENAME_LENGTH].rstrip(" ._") or "report"
+
+
+def _candidate_names(title: str, suffix: str = ".md"):
+    base = sanitize_filename(title)
+    yield f"{base}{suffix}"
+    index = 2
+    while True:
+        yield f"{base}-{index}{suffix}"
+        index += 1
+
+
+class ReportStream:
+    """Markdown written incrementally to a staging file and published to the sink on commit."""
+
+    def __init__(self, part_path: str, publish: Callable[[str], str]):
+        self.part_path = part_path
+        self._publish = publish
+        self._file = open(part_path, "w", encoding="utf-8")
+        self.path: str | None = None
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+        self._file.flush()
+
+    def commit(self) -> str:
+        self._file.close()
+        self.path = self._publish(self.part_path)
+        return self.path
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+    def __enter__(self) -> "ReportStream":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        elif not self._file.closed:
+            self.commit()
+
+
+class ReportSink(ABC):
+    def write(self, title: str, markdown: str) -> str:
+        with self.open_stream(title) as stream:
+            stream.write(markdown)
+        return stream.path
+
+    def open_stream(self, title: str) -> ReportStream:
+        staging_dir = self._staging_dir()
+        if staging_dir:
+            os.makedirs(staging_dir, exist_ok=True)
+        fd, part_path = tempfile.mkstemp(prefix=".", suffix=".md.part", dir=staging_dir)
+        try:
+            os.fchmod(fd, REPORT_FILE_MODE)
+        finally:
+            os.close(fd)
+        return ReportStream(part_path, lambda path: self._publish(path, title))
+
+    def _staging_dir(self) -> str | None:
+        return None
+
+    @abstractmethod
+    def _publish(self, part_path: str, title: str) -> str:
+        """Move the finished staging file into the sink and return where it ended up."""
+
+
+class LocalDirSink(ReportSink):
+    """Writes `<directory>/<title>.md`, adding `-2`, `-3`, ... instead of overwriting an existing report."""
+
+    def __init__(self, directory: str = REPORT_DIR):
+        self.directory = directory
+
+    def _staging_dir(self) -> str:
+        return self.directory
+
+    def _publish(self, part_path: str, title: str) -> str:
+        try:
+            for name in _candidate_names(title):
+                path = os.path.join(self.directory, name)
+                try:
+                    # A hard link publishes the complete file atomically and fails instead of clobbering.
+                    os.link(part_path, path)
+                    return path
+                except FileExistsError:
+                    continue
+        finally:
+            os.remove(part_path)
+
+
+class ZipArchiveSink(ReportSink):
+    """Appends reports as deflate-compressed members of a single zip archive."""
+
+    def __init__(self, path: str = REPORT_ARCHIVE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _publish(self, part_path: str, title: str) -> str:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            with self._lock, zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+                existing = set(archive.namelist())
+                name = next(name for name in _candidate_names(title) if name not in existing)
+                archive.write(part_path, arcname=name)
+        finally:
+            os.remove(part_path)
+        return f"{self.path}:{name}"
+
+
+REPORT_SINKS: dict[str, Callable[[], ReportSink]] = {
+    "dir": LocalDirSink,
+    "zip": ZipArchiveSink,
+}
+
+
+def get_report_sink() -> ReportSink:
+    global _report_sink
+    if _report_sink is None:
+        _report_sink = REPORT_SINKS[os.getenv("REPORT_SINK", "dir")]()
+    return _report_sink
+
+
+def set_report_sink(sink: ReportSink) -> None:
+    global _report_sink
+    _report_sink = sink
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from common.cache_store import SqliteCache, DEFAULT_CACHE_DIR
+
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "response_cache.sqlite3"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "256"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+
+def normalize_exact(text: str) -> str:
+    return text
+
+
+def normalize_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+def normalize_semantic(text: str) -> str:
+    # Whitespace and case folding plus trailing punctuation, so "AI agents?" and "ai  agents" share a key.
+    return re.sub(r"[\s?!.]+$", "", normalize_whitespace(text).casefold())
+
+
+NORMALIZERS: dict[str, Callable[[str], str]] = {
+    "exact": normalize_exact,
+    "whitespace": normalize_whitespace,
+    "semantic": normalize_semantic,
+}
+
+_response_cache: "ResponseCache | None" = None
+
+
+class ResponseCache:
+    """Two-tier cache for agent outputs: an in-memory LRU in front of a persistent SqliteCache.
+
+    Entries expire from both tiers after `ttl_seconds`.
+    """
+
+    def __init__(self,
+                 store: SqliteCache | None,
+                 memory_entries: int = RESPONSE_CACHE_MEMORY_ENTRIES,
+                 ttl_seconds: float | None = RESPONSE_CACHE_TTL_SECONDS,
+                 normalize: Callable[[str], str] = normalize_semantic):
+        self.store = store
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.normalize = normalize
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        # key -> (value, expires_at)
+        self._memory: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+
+    def key(self, model: str, instructions: str, model_settings: dict[str, Any], output_type: str, input: str) -> str:
+        payload = {
+            "model": model,
+            "instructions": hashlib.sha256(instructions.encode()).hexdigest(),
+            "model_settings": model_settings,
+            "output_type": output_type,
+            "input": self.normalize(input),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._memory[key]
+
+        stored = self.store.get_entry(key) if self.store is not None else None
+        if stored is None:
+            self.misses += 1
+            return None
+        self.persistent_hits += 1
+        value = stored[0].decode()
+        self._remember(key, value, stored[1])
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        self._remember(key, value, time.time() + self.ttl_seconds if self.ttl_seconds is not None else None)
+        if self.store is not None:
+            self.store.put(key, value.encode(), self.ttl_seconds)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def _remember(self, key: str, value: str, expires_at: float | None) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+def get_response_cache() -> ResponseCache | None:
+    global _response_cache
+    if os.getenv("RESPONSE_CACHE_ENABLED", "0") != "1":
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            SqliteCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_BYTES),
+            normalize=NORMALIZERS[os.getenv("RESPONSE_CACHE_NORMALIZE", "semantic")],
+        )
+    return _response_cache
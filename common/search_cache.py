@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+from typing import Any
+
+from common.cache_store import SqliteCache, DEFAULT_CACHE_DIR
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "search_cache.sqlite3"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Argument names that hold free-text queries, which are also case folded.
+_QUERY_ARGUMENTS = {"q", "query", "search", "keyword"}
+
+_search_cache: "SearchCache | None" = None
+
+
+def _normalize_value(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.casefold() if name in _QUERY_ARGUMENTS else value
+    if isinstance(value, dict):
+        return {k: _normalize_value(k, v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_normalize_value(name, v) for v in value]
+    return value
+
+
+def search_cache_key(tool_name: str, arguments: dict[str, Any] | None) -> str:
+    normalized = {
+        "tool": tool_name,
+        "arguments": _normalize_value("", arguments or {}),
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class SearchCache:
+    """Content-addressed cache of search tool results keyed on the normalized tool call."""
+
+    def __init__(self, store: SqliteCache, ttl_seconds: float | None = SEARCH_CACHE_TTL_SECONDS):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
+
+    def get(self, tool_name: str, arguments: dict[str, Any] | None) -> str | None:
+        value = self.store.get(search_cache_key(tool_name, arguments))
+        return value.decode() if value is not None else None
+
+    def put(self, tool_name: str, arguments: dict[str, Any] | None, result: str) -> None:
+        self.store.put(search_cache_key(tool_name, arguments), result.encode(), self.ttl_seconds)
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+def get_search_cache() -> SearchCache | None:
+    global _search_cache
+    if os.getenv("SEARCH_CACHE_ENABLED", "1") != "1":
+        return None
+    if _search_cache is None:
+        _search_cache = SearchCache(SqliteCache(SEARCH_CACHE_PATH, SEARCH_CACHE_MAX_BYTES))
+    return _search_cache
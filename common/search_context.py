@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from common.map_reduce import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PREPROCESS = os.getenv("SEARCH_PREPROCESS", "1") == "1"
+SEARCH_FETCH_PAGES = os.getenv("SEARCH_FETCH_PAGES", "0") == "1"
+SEARCH_TOKEN_BUDGET = int(os.getenv("SEARCH_TOKEN_BUDGET", "3000"))
+SEARCH_FETCH_MAX_CONNECTIONS = int(os.getenv("SEARCH_FETCH_MAX_CONNECTIONS", "16"))
+SEARCH_FETCH_PER_HOST = int(os.getenv("SEARCH_FETCH_PER_HOST", "2"))
+SEARCH_FETCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_FETCH_TIMEOUT_SECONDS", "10"))
+SEARCH_FETCH_MAX_BYTES = int(os.getenv("SEARCH_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+SEARCH_FETCH_PAGES_PER_QUERY = int(os.getenv("SEARCH_FETCH_PAGES_PER_QUERY", "3"))
+
+# Query parameters that only track the click and never change the page.
+_TRACKING_PARAMETERS = {"gclid", "fbclid", "msclkid", "ref", "ref_src", "mc_cid", "mc_eid", "igshid"}
+_SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "button"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "tr", "td", "blockquote", "pre", "br",
+               "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption"}
+_MIN_PARAGRAPH_CHARACTERS = 40
+# Sources of a query without results, so the research agent does not fall back to searching it again.
+NO_RESULTS = "No search results."
+_WORD = re.compile(r"\w+")
+
+_page_fetcher: "PageFetcher | None" = None
+
+
+@dataclass
+class SearchHit:
+    url: str
+    title: str
+    snippet: str
+    query: str
+    position: int
+    paragraphs: list[str] = field(default_factory=list)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of `url`: lower-case host without `www.`, no fragment, tracking parameters or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMETERS)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, urlencode(query), ""))
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(_WORD.findall(text.casefold()))
+
+
+def parse_search_results(query: str, result: dict) -> list[SearchHit]:
+    """Organic results of a serper response."""
+    hits = []
+    for position, item in enumerate(result.get("organic") or [], start=1):
+        if item.get("link"):
+            hits.append(SearchHit(url=item["link"], title=item.get("title", ""), snippet=item.get("snippet", ""),
+                                  query=query, position=item.get("position", position)))
+    return hits
+
+
+def dedupe(hits: list[SearchHit]) -> dict[str, list[SearchHit]]:
+    """Group `hits` by query, keeping every page once: under the query it ranks best for.
+
+    Pages are compared on their normalized URL, and pages with the same snippet (mirrors, syndicated copies)
+    count as the same page.
+    """
+    best: dict[str, SearchHit] = {}
+    snippets: dict[str, str] = {}
+    for hit in hits:
+        url = normalize_url(hit.url)
+        snippet = _normalize_text(hit.snippet)
+        url = snippets.setdefault(snippet, url) if snippet else url
+        if url not in best or hit.position < best[url].position:
+            best[url] = hit
+
+    grouped: dict[str, list[SearchHit]] = {hit.query: [] for hit in hits}
+    for hit in best.values():
+        grouped[hit.query].append(hit)
+    for query_hits in grouped.values():
+        query_hits.sort(key=lambda hit: hit.position)
+    return grouped
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs: list[str] = []
+        self._current: list[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._current.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self._current).split())
+        self._current = []
+        if len(text) >= _MIN_PARAGRAPH_CHARACTERS:
+            self.paragraphs.append(text)
+
+
+def extract_text(html: str) -> list[str]:
+    """Paragraphs of the main text of `html`, without scripts, navigation, headers, footers and short fragments."""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    extractor._flush()
+    return extractor.paragraphs
+
+
+class PageFetcher:
+    """Fetches pages through one pooled client, with at most `per_host` requests per host at a time."""
+
+    def __init__(self, max_connections: int = SEARCH_FETCH_MAX_CONNECTIONS, per_host: int = SEARCH_FETCH_PER_HOST,
+                 timeout_seconds: float = SEARCH_FETCH_TIMEOUT_SECONDS, max_bytes: int = SEARCH_FETCH_MAX_BYTES):
+        self.per_host = per_host
+        self.max_bytes = max_bytes
+        self.client = httpx.AsyncClient(
+            timeout=timeout_seconds,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; llm-agent-playground)"},
+        )
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(self, url: str) -> list[str]:
+        """Paragraphs of the page at `url`, or none when it cannot be fetched or is not HTML or text."""
+        try:
+            semaphore = self._hosts.setdefault(urlsplit(url).netloc.lower(), asyncio.Semaphore(self.per_host))
+            async with semaphore, self.client.stream("GET", url) as response:
+                content_type = response.headers.get("content-type", "")
+                if response.status_code != 200 or not content_type.startswith(("text/html", "text/plain")):
+                    return []
+                body = bytearray()
+                async for data in response.aiter_bytes():
+                    body += data
+                    if len(body) >= self.max_bytes:
+                        break
+                text = body.decode(response.encoding or "utf-8", errors="replace")
+        except Exception as e:
+            # Invalid URLs (httpx.InvalidURL is not an HTTPError), unknown charsets and the like mean no page.
+            logger.debug(f"Fetching {url} failed: {e!r}")
+            return []
+        if content_type.startswith("text/plain"):
+            return [paragraph for paragraph in (" ".join(p.split()) for p in text.split("\n\n"))
+                    if len(paragraph) >= _MIN_PARAGRAPH_CHARACTERS]
+        return extract_text(text)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def get_page_fetcher() -> PageFetcher:
+    global _page_fetcher
+    if _page_fetcher is None:
+        _page_fetcher = PageFetcher()
+    return _page_fetcher
+
+
+async def close_page_fetcher() -> None:
+    global _page_fetcher
+    if _page_fetcher is not None:
+        await _page_fetcher.close()
+        _page_fetcher = None
+
+
+def _score(query_terms: set[str], paragraph: str) -> float:
+    words = _WORD.findall(paragraph.casefold())
+    if not words:
+        return 0.0
+    matches = sum(1 for word in words if word in query_terms)
+    # Coverage of the query dominates; density breaks ties between paragraphs covering the same terms.
+    return len(query_terms.intersection(words)) + matches / len(words)
+
+
+def format_context(query: str, hits: list[SearchHit], max_tokens: int = SEARCH_TOKEN_BUDGET) -> str:
+    """Sources of `query` within `max_tokens`: every title and snippet first, then the page paragraphs that
+    best match the query, each kept under its source and in page order."""
+    query_terms = set(_WORD.findall(query.casefold()))
+    used = 0
+    heads = []
+    for index, hit in enumerate(hits, start=1):
+        head = f"[{index}] {hit.title}\n{hit.url}\n{hit.snippet}".strip()
+        tokens = count_tokens(head)
+        if used + tokens > max_tokens:
+            break
+        heads.append(head)
+        used += tokens
+
+    ranked = sorted(((_score(query_terms, paragraph), index, order, paragraph)
+                     for index, hit in enumerate(hits[:len(heads)])
+                     for order, paragraph in enumerate(hit.paragraphs)), reverse=True)
+    kept: dict[int, list[tuple[int, str]]] = {}
+    for score, index, order, paragraph in ranked:
+        if score <= 0:
+            break
+        tokens = count_tokens(paragraph)
+        if used + tokens > max_tokens:
+            continue
+        kept.setdefault(index, []).append((order, paragraph))
+        used += tokens
+
+    sections = []
+    for index, head in enumerate(heads):
+        paragraphs = [paragraph for _, paragraph in sorted(kept.get(index, []))]
+        sections.append("\n".join([head, *paragraphs]))
+    return "\n\n".join(sections)
+
+
+async def build_search_context(queries: list[str], search: Callable[[str], Awaitable[dict]],
+                               fetch_pages: bool = SEARCH_FETCH_PAGES,
+                               max_tokens: int = SEARCH_TOKEN_BUDGET, timeout: float | None = None) -> dict[str, str]:
+    """Search every query, dedupe the results across queries and return the trimmed sources of each query.
+
+    Queries whose search fails or is still running after `timeout` seconds are left out, page fetches still
+    running then are cancelled. Queries without results get `NO_RESULTS`.
+    """
+    started = time.monotonic()
+    tasks = {asyncio.create_task(search(query)): query for query in queries}
+    done, pending = await asyncio.wait(tasks, timeout=timeout) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+        logger.warning(f"Search for {tasks[task]!r} did not finish within {timeout:.1f}s")
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    hits: list[SearchHit] = []
+    searched: list[str] = []
+    for task, query in tasks.items():
+        if task not in done:
+            continue
+        if task.exception() is not None:
+            logger.warning(f"Search for {query!r} failed: {task.exception()!r}")
+            continue
+        hits += parse_search_results(query, task.result())
+        searched.append(query)
+    grouped = dedupe(hits)
+    logger.info(f"{len(hits)} search results, {sum(map(len, grouped.values()))} after dedup")
+
+    if fetch_pages:
+        fetcher = get_page_fetcher()
+        fetched = [hit for query_hits in grouped.values() for hit in query_hits[:SEARCH_FETCH_PAGES_PER_QUERY]]
+        fetches = [asyncio.ensure_future(fetcher.fetch(hit.url)) for hit in fetched]
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        if fetches:
+            await asyncio.wait(fetches, timeout=remaining)
+        for hit, fetch in zip(fetched, fetches):
+            if fetch.done():
+                hit.paragraphs = fetch.result()
+            else:
+                fetch.cancel()
+        await asyncio.gather(*fetches, return_exceptions=True)
+
+    contexts = {}
+    for query in searched:
+        query_hits = grouped.get(query)
+        if not query_hits:
+            # Every page went to another query; it gets its own results again, without the fetched text.
+            query_hits = sorted((hit for hit in hits if hit.query == query), key=lambda hit: hit.position)
+        contexts[query] = format_context(query, query_hits, max_tokens) if query_hits else NO_RESULTS
+    return contexts
+
+
+def search_result_json(content: list) -> dict:
+    """The JSON object in the text content of an MCP tool result."""
+    for item in content:
+        text = getattr(item, "text", None)
+        if text:
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                continue
+    return {}
@@ -0,0 +1,38 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+
+@dataclass
+class StreamEvent:
+    type: Literal["token", "tool_call", "tool_output", "final"]
+    text: str = ""
+    name: str | None = None
+    data: Any = None
+    elapsed_seconds: float = 0.0
+    time_to_first_token_seconds: float | None = None
+
+
+class FirstTokenTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        return self.first_token_at - self.started if self.first_token_at is not None else None
+
+    def describe(self) -> str:
+        ttft = self.time_to_first_token
+        return f"{self.elapsed:.2f}s, time to first token {f'{ttft:.2f}s' if ttft is not None else 'n/a'}"
+
+    def event(self, type: str, text: str = "", **kwargs) -> StreamEvent:
+        if type == "token" and self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        return StreamEvent(type=type, text=text, elapsed_seconds=self.elapsed,
+                           time_to_first_token_seconds=self.time_to_first_token, **kwargs)
+
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from common.cache_store import DEFAULT_CACHE_DIR
+
+M = TypeVar("M", bound=BaseModel)
+
+WORKFLOW_DB = os.getenv("WORKFLOW_DB", os.path.join(DEFAULT_CACHE_DIR, "workflows.sqlite3"))
+WORKFLOW_TTL_SECONDS = float(os.getenv("WORKFLOW_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+_workflow_store: "WorkflowStore | None" = None
+
+
+class Workflow:
+    """The checkpoints of one run. Every stage output is stored under its stage and an optional key."""
+
+    def __init__(self, store: "WorkflowStore", run_id: str, topic: str, status: str):
+        self.store = store
+        self.run_id = run_id
+        self.topic = topic
+        self.status = status
+
+    def load(self, stage: str, model: type[M], key: str = "") -> M | None:
+        value = self.store._load(self.run_id, stage, key)
+        return model.model_validate_json(value) if value is not None else None
+
+    def load_all(self, stage: str, model: type[M]) -> dict[str, M]:
+        return {key: model.model_validate_json(value) for key, value in self.store._load_all(self.run_id, stage)}
+
+    def save(self, stage: str, value: BaseModel, key: str = "") -> None:
+        self.store._save(self.run_id, stage, key, value.model_dump_json())
+
+    def delete(self, stage: str, key: str | None = None) -> None:
+        self.store._delete(self.run_id, stage, key)
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        self.status = status
+        self.store._set_status(self.run_id, status, error)
+
+
+@dataclass
+class WorkflowRun:
+    run_id: str
+    topic: str
+    status: str
+    error: str | None
+    created_at: float
+    updated_at: float
+    checkpoints: int
+
+
+class WorkflowStore:
+    """Durable stage checkpoints of pipeline runs, keyed by run ID, in SQLite.
+
+    Every checkpoint is committed as soon as it is saved, so a run that crashes or fails can be resumed from the
+    stages it completed. Runs not updated for `ttl_seconds` are removed.
+    """
+
+    def __init__(self, path: str = WORKFLOW_DB, ttl_seconds: float | None = WORKFLOW_TTL_SECONDS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " topic TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " run_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, stage, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_updated_at ON runs (updated_at)")
+        self.prune()
+
+    def open(self, run_id: str, topic: str) -> Workflow:
+        """The run `run_id`, started now unless it exists. A run ID cannot be reused for another topic."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, topic, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, topic, "running", now, now),
+            )
+            stored_topic, status = self._conn.execute(
+                "SELECT topic, status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if stored_topic != topic:
+            raise ValueError(f"Run {run_id} is a run of another topic: {stored_topic!r}")
+        return Workflow(self, run_id, topic, status)
+
+    def get(self, run_id: str) -> WorkflowRun | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.run_id, r.topic, r.status, r.error, r.created_at, r.updated_at,"
+                " (SELECT COUNT(*) FROM checkpoints c WHERE c.run_id = r.run_id)"
+                " FROM runs r WHERE r.run_id = ?", (run_id,)).fetchone()
+        return WorkflowRun(*row) if row is not None else None
+
+    def delete_run(self, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.execute("COMMIT")
+
+    def prune(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        expires = time.time() - self.ttl_seconds
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (expires,))
+            removed = self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (expires,)).rowcount
+            self._conn.execute("COMMIT")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, run_id: str, stage: str, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM checkpoints WHERE run_id = ? AND stage = ? AND key = ?",
+                                     (run_id, stage, key)).fetchone()
+        return row[0] if row is not None else None
+
+    def _load_all(self, run_id: str, stage: str) -> list[tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute("SELECT key, value FROM checkpoints WHERE run_id = ? AND stage = ?",
+                                      (run_id, stage)).fetchall()
+
+    def _save(self, run_id: str, stage: str, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, key, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, stage, key, value, now),
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            self._conn.execute("COMMIT")
+
+    def _delete(self, run_id: str, stage: str, key: str | None) -> None:
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM checkpoints WHERE run_id = ? AND stage = ?", (run_id, stage))
+            else:
+                self._conn.execute("DELETE FROM checkpoints WHERE run_id = ? AND stage = ? AND key = ?",
+                                   (run_id, stage, key))
+
+    def _set_status(self, run_id: str, status: str, error: str | None) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                               (status, error, time.time(), run_id))
+
+
+def get_workflow_store() -> WorkflowStore:
+    global _workflow_store
+    if _workflow_store is None:
+        _workflow_store = WorkflowStore()
+    return _workflow_store
+
+
+def set_workflow_store(store: WorkflowStore | None) -> None:
+    global _workflow_store
+    _workflow_store = store
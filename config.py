@@ -2,17 +2,16 @@ import logging
 import os
 from typing import Any
 
-import opik
 from dotenv import load_dotenv
 
+# Settings are read from the environment when the modules are imported, so `.env` is loaded first.
 load_dotenv(override=True)
-logging.basicConfig(
-    format='%(asctime)s [%(levelname)s] %(name)s : %(message)s',
-    level=logging.INFO,
-    handlers=[logging.StreamHandler()]
-)
 logger = logging.getLogger("agent_app")
 
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s : %(message)s'
+
+_observability_enabled = False
+
 
 class Logger:
     @staticmethod
@@ -20,7 +19,20 @@ class Logger:
         logger.info(message)
 
 
+def configure_logging(level: int = logging.INFO):
+    logging.basicConfig(format=LOG_FORMAT, level=level, handlers=[logging.StreamHandler()])
+
+
 def configure_observability():
+    # opik takes seconds to import, so it is only imported by the entry points that enable tracing.
+    import opik
+
+    global _observability_enabled
     opik.configure(
         api_key=os.getenv("OPIK_API_KEY")
     )
+    _observability_enabled = True
+
+
+def observability_enabled() -> bool:
+    return _observability_enabled
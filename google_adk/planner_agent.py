@@ -2,25 +2,14 @@ import asyncio
 import logging
 
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
-from opik.integrations.adk import OpikTracer, track_adk_agent_recursive
-from pydantic import BaseModel, Field
 
-from config import Logger, configure_observability
-from google_adk.runner import run_agent
+from common.models import WebSearchItem, WebSearchPlan
+from config import Logger, configure_logging, configure_observability
+from google_adk.runner import run_agent, create_model, track_agent
 
 logger = logging.getLogger(__name__)
 
 
-class WebSearchItem(BaseModel):
-    query: str = Field(description="The search term to use for the web search")
-    reason: str = Field(description="Your reasoning for why this search is important to the query")
-
-
-class WebSearchPlan(BaseModel):
-    searches: list[WebSearchItem] = Field(description="A list of web searches to perform to best answer the query")
-
-
 def create_planner_agent() -> LlmAgent:
     return LlmAgent(
         name="planner_agent",
@@ -28,7 +17,7 @@ def create_planner_agent() -> LlmAgent:
             You are a helpful research assistant. Your job is to help me find information about a topic.
             Output 1 terms to query for.
         """,
-        model=Gemini(model="gemini-2.5-flash"),
+        model=create_model("gemini-2.5-flash"),
         output_schema=WebSearchPlan,
         output_key="web_search_plan",
     )
@@ -36,20 +25,17 @@ def create_planner_agent() -> LlmAgent:
 
 async def plan(query: str) -> WebSearchPlan:
     agent = create_planner_agent()
-    multi_agent_tracer = OpikTracer(
-        name="planner-agent",
-        project_name="adk-multi-agent-demo"
-    )
-    track_adk_agent_recursive(agent, multi_agent_tracer)
+    track_agent(agent, "planner-agent")
 
     final_answer = None
-    async for event in run_agent(app_name="planner", user_id="test_user", session_id="test_session", agent=agent,
-                                 query=query):
+    async for event in run_agent(app_name="planner", user_id="test_user", agent=agent,
+                                 query=query, stage="plan"):
         final_answer = event
         Logger.info(final_answer)
     return WebSearchPlan.model_validate_json(final_answer)
 
 
 if __name__ == '__main__':
+    configure_logging()
     configure_observability()
     asyncio.run(plan("Due to 2025 year, What is the best model for agentic AI frontier model?"))
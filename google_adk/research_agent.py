@@ -1,70 +1,152 @@
 import asyncio
+import json
 import logging
 import os
+import shlex
+from typing import Any, AsyncIterator, Optional
 
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
-from google.adk.tools import McpToolset
-from google.adk.tools.mcp_tool import StdioConnectionParams
+from google.adk.tools import McpToolset, BaseTool, ToolContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.mcp_tool import McpTool, StdioConnectionParams
 from mcp import StdioServerParameters
-from opik.integrations.adk import OpikTracer, track_adk_agent_recursive
-from pydantic import BaseModel, Field
 
-from config import Logger, configure_observability
-from google_adk.runner import run_agent
+from common.mcp_pool import MCP_TIMEOUT_SECONDS, mcp_toolset_pool
+from common.models import ResearchReport
+from common.rate_limit import rate_limited
+from common.search_cache import get_search_cache
+from common.streaming import StreamEvent
+from config import Logger, configure_logging, configure_observability
+from google_adk.runner import run_agent, stream_agent, create_model, track_agent
 
 logger = logging.getLogger(__name__)
 
+SERPER_TOOL_PREFIX = "serper"
 
-class ResearchReport(BaseModel):
-    short_summary: str = Field(description="A short 2~3 sentence summary of the findings.")
-    markdown_report: str = Field(description="The final report")
 
+class RateLimitedMcpTool(McpTool):
+    """Sends its calls under the serper rate limit, like the openai_agents research agent's `CachedSearchServer`."""
 
-research_mcp_server_tool = McpToolset(
-    tool_name_prefix="serper",
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command="uvx",
-            args=["serper-mcp-server"],
-            env={"SERPER_API_KEY": os.getenv("SERPER_API_KEY")}
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        run = super().run_async
+        return await rate_limited("serper", lambda: run(args=args, tool_context=tool_context))
+
+
+class RateLimitedMcpToolset(McpToolset):
+    async def get_tools(self, readonly_context: ReadonlyContext | None = None) -> list[BaseTool]:
+        return [RateLimitedMcpTool(mcp_tool=tool.raw_mcp_tool, mcp_session_manager=self._mcp_session_manager)
+                for tool in await super().get_tools(readonly_context)]
+
+
+def _build_research_toolset() -> McpToolset:
+    # SERPER_MCP_COMMAND swaps in a local stand-in server, e.g. for tests and benchmarks.
+    command, *args = shlex.split(os.getenv("SERPER_MCP_COMMAND", "uvx serper-mcp-server"))
+    return RateLimitedMcpToolset(
+        tool_name_prefix=SERPER_TOOL_PREFIX,
+        connection_params=StdioConnectionParams(
+            server_params=StdioServerParameters(
+                command=command,
+                args=args,
+                env={"SERPER_API_KEY": os.getenv("SERPER_API_KEY", "")}
+            ),
+            timeout=MCP_TIMEOUT_SECONDS
         ),
-        timeout=30
-    ),
-)
+    )
+
+
+research_toolset_pool = mcp_toolset_pool("serper", _build_research_toolset)
+
+
+# Function call ids answered from the cache, so the after-callback does not store them again.
+_cached_calls: set[str] = set()
+
+
+def _is_search_tool(tool: BaseTool) -> bool:
+    # Other tools, like the `set_model_response` tool ADK adds for the output schema, are not cached.
+    return tool.name.startswith(f"{SERPER_TOOL_PREFIX}_")
+
+
+def _search_cache_tool_name(tool: BaseTool) -> str:
+    # Share entries with the openai_agents research agent, whose tools are not prefixed.
+    return tool.name.removeprefix(f"{SERPER_TOOL_PREFIX}_")
 
 
-def create_research_agent() -> LlmAgent:
+def lookup_search_cache(tool: BaseTool, args: dict[str, Any], tool_context: ToolContext) -> Optional[dict]:
+    cache = get_search_cache()
+    if cache is None or not _is_search_tool(tool):
+        return None
+    cached = cache.get(_search_cache_tool_name(tool), args)
+    if cached is None:
+        return None
+    _cached_calls.add(tool_context.function_call_id)
+    return json.loads(cached)
+
+
+def store_search_cache(tool: BaseTool, args: dict[str, Any], tool_context: ToolContext,
+                       tool_response: dict) -> Optional[dict]:
+    if not _is_search_tool(tool):
+        return None
+    if tool_context.function_call_id in _cached_calls:
+        _cached_calls.discard(tool_context.function_call_id)
+        return None
+    cache = get_search_cache()
+    if cache is not None and isinstance(tool_response, dict) and not tool_response.get("isError"):
+        cache.put(_search_cache_tool_name(tool), args, json.dumps(tool_response, ensure_ascii=False))
+    return None
+
+
+def create_research_agent(toolset: McpToolset | None) -> LlmAgent:
+    """Research agent searching with `toolset`, or working from the sources in its input when there is none."""
     return LlmAgent(
         name="research_agent",
         instruction="""
                 You are a senior researcher tasked with writing a cohesive report for a research query.
                 You will be provided original query, and return the following data output.
+                When sources are provided, base the report on them and cite them by their [number].
                 """,
-        model=Gemini(model="gemini-2.5-flash"),
-        tools=[research_mcp_server_tool],
+        model=create_model("gemini-2.5-flash"),
+        tools=[toolset] if toolset is not None else [],
+        before_tool_callback=lookup_search_cache,
+        after_tool_callback=store_search_cache,
         output_schema=ResearchReport,
         output_key="research_report"
     )
 
 
-async def research(query: str, feedback: str | None = None) -> ResearchReport:
-    agent = create_research_agent()
-    opik_tracer = OpikTracer(
-        name="research-agent",
-        project_name="adk-multi-agent-demo"
-    )
-    track_adk_agent_recursive(agent, opik_tracer)
-
+async def _run_research(agent: LlmAgent, query: str) -> ResearchReport:
+    track_agent(agent, "research-agent")
     final_answer = None
-    async for event in run_agent(app_name="research", user_id="test_user", session_id="test_session", agent=agent,
-                                 query=query):
+    async for event in run_agent(app_name="research", user_id="test_user", agent=agent,
+                                 query=query, stage="research"):
         final_answer = event
         Logger.info(final_answer)
-    await research_mcp_server_tool.close()
     return ResearchReport.model_validate_json(final_answer)
 
 
+def _research_prompt(query: str, feedback: str | None) -> str:
+    return f"query: {query}\n feedback: {feedback}" if feedback else query
+
+
+async def research(query: str, feedback: str | None = None, sources: str | None = None) -> ResearchReport:
+    """Research `query`, from `sources` (see `common.search_context`) when given, otherwise with the search tool."""
+    query = _research_prompt(query, feedback)
+    if sources:
+        return await _run_research(create_research_agent(None), f"{query}\n sources:\n{sources}")
+    async with research_toolset_pool.lease() as toolset:
+        return await _run_research(create_research_agent(toolset), query)
+
+
+async def research_streamed(query: str, feedback: str | None = None) -> AsyncIterator[StreamEvent]:
+    async with research_toolset_pool.lease() as toolset:
+        agent = create_research_agent(toolset)
+        async for event in stream_agent(app_name="research", user_id="test_user",
+                                        agent=agent, query=_research_prompt(query, feedback), stage="research"):
+            if event.type == "final":
+                event.data = ResearchReport.model_validate_json(event.data)
+            yield event
+
+
 if __name__ == '__main__':
+    configure_logging()
     configure_observability()
     asyncio.run(research("Due to 2025 year, What is the best model for agentic AI frontier model?"))
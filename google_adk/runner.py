@@ -1,16 +1,148 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
 from google.adk import Runner
 from google.adk.agents import LlmAgent
-from google.adk.sessions import InMemorySessionService
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.apps import App
+from google.adk.models import LlmRequest, LlmResponse, BaseLlm, Gemini
+from google.adk.plugins import BasePlugin
+from google.adk.sessions import Session
+from google.adk.tools import BaseTool, ToolContext
 from google.genai import types
 
-session_service = InMemorySessionService()
+from common.metrics import metrics, StageRecorder
+from common.rate_limit import rate_limited, rate_limited_stream, estimate_tokens
+from common.streaming import StreamEvent, FirstTokenTimer
+from config import Logger, observability_enabled
+from google_adk.session_store import get_session_service, new_session_id
+
+_model_factory: Callable[[str], BaseLlm] = lambda model: Gemini(model=model)
+
+
+def track_agent(agent: LlmAgent, name: str) -> None:
+    """Trace `agent` and its sub-agents with opik once `configure_observability()` has been called."""
+    if not observability_enabled():
+        return
+    from opik.integrations.adk import OpikTracer, track_adk_agent_recursive
+    track_adk_agent_recursive(agent, OpikTracer(name=name, project_name="adk-multi-agent-demo"))
+
+
+def create_model(model: str) -> BaseLlm:
+    return _model_factory(model)
+
+
+def set_model_factory(factory: Callable[[str], BaseLlm]) -> None:
+    """Build every agent model with `factory`, e.g. to swap in a local stand-in for Gemini."""
+    global _model_factory
+    _model_factory = factory
+
+
+class MetricsPlugin(BasePlugin):
+    def __init__(self, recorder: StageRecorder):
+        super().__init__(name="metrics")
+        self.recorder = recorder
+
+    async def before_model_callback(self, *, callback_context: CallbackContext,
+                                    llm_request: LlmRequest) -> Optional[LlmResponse]:
+        self.recorder.llm_start()
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext,
+                                   llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        self.recorder.llm_end()
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            reasoning_tokens = usage.thoughts_token_count or 0
+            # Gemini reports thinking tokens apart from the candidates, but bills them as output.
+            self.recorder.add_usage(usage.prompt_token_count, (usage.candidates_token_count or 0) + reasoning_tokens,
+                                    reasoning_tokens)
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any],
+                                   tool_context: ToolContext) -> Optional[dict]:
+        self.recorder.tool_start(tool_context.function_call_id or tool.name)
+        return None
+
+    async def after_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext,
+                                  result: dict) -> Optional[dict]:
+        self.recorder.tool_end(tool_context.function_call_id or tool.name)
+        return None
+
+
+def model_name(agent: LlmAgent) -> str:
+    return agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", None) or "default"
+
+
+def _create_runner(app_name: str, agent: LlmAgent, recorder: StageRecorder) -> Runner:
+    app = App(name=app_name, root_agent=agent, plugins=[MetricsPlugin(recorder)])
+    return Runner(app=app, session_service=get_session_service())
+
+
+# Runs on the same session are serialized, so their events do not interleave.
+_session_locks: weakref.WeakValueDictionary[tuple[str, str, str], asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+@asynccontextmanager
+async def _session(app_name: str, user_id: str, session_id: str | None) -> AsyncIterator[Session]:
+    """Hold the session `session_id` (a new one when omitted) exclusively, creating it if it does not exist."""
+    session_id = session_id or new_session_id()
+    lock = _session_locks.setdefault((app_name, user_id, session_id), asyncio.Lock())
+    async with lock:
+        session_service = get_session_service()
+        session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            session = await session_service.create_session(app_name=app_name, user_id=user_id,
+                                                           session_id=session_id)
+        yield session
+
+
+async def run_agent(app_name: str, user_id: str, query: str, agent: LlmAgent, stage: str | None = None,
+                    session_id: str | None = None):
+    """Run the agent and yield its final responses. Every call gets its own session unless `session_id` is given."""
+    with metrics.stage(stage or agent.name, model_name(agent)) as recorder:
+        async def run() -> list[str]:
+            # A retried run without `session_id` starts over on a new session.
+            async with _session(app_name, user_id, session_id) as session:
+                runner = _create_runner(app_name, agent, recorder)
+                return [event.content.parts[0].text
+                        async for event in runner.run_async(user_id=user_id, session_id=session.id,
+                                                            new_message=types.UserContent(query))
+                        if event.is_final_response() and event.content]
+
+        # The final responses are collected first, so a rate limited run can be retried as a whole.
+        for answer in await rate_limited(model_name(agent), run, tokens=estimate_tokens(query),
+                                         usage=lambda _: recorder.input_tokens + recorder.output_tokens):
+            yield answer
 
 
-async def run_agent(app_name: str, user_id: str, session_id: str, query: str, agent: LlmAgent):
-    await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
+async def stream_agent(app_name: str, user_id: str, query: str, agent: LlmAgent, stage: str | None = None,
+                       session_id: str | None = None) -> AsyncIterator[StreamEvent]:
+    with metrics.stage(stage or agent.name, model_name(agent)) as recorder:
+        async with rate_limited_stream(model_name(agent), estimate_tokens(query)), \
+                _session(app_name, user_id, session_id) as session:
+            runner = _create_runner(app_name, agent, recorder)
+            timer = FirstTokenTimer()
+            final_answer = None
 
-    runner = Runner(agent=agent, app_name=app_name, session_service=session_service)
+            async for event in runner.run_async(user_id=user_id, session_id=session.id,
+                                                new_message=types.UserContent(query),
+                                                run_config=RunConfig(streaming_mode=StreamingMode.SSE)):
+                for function_call in event.get_function_calls():
+                    yield timer.event("tool_call", name=function_call.name, data=function_call.args)
+                for function_response in event.get_function_responses():
+                    yield timer.event("tool_output", name=function_response.name, data=function_response.response)
+                if event.partial and event.content and event.content.parts:
+                    text = "".join(part.text for part in event.content.parts if part.text)
+                    if text:
+                        yield timer.event("token", text)
+                elif event.is_final_response() and event.content and event.content.parts:
+                    final_answer = event.content.parts[0].text
 
-    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=types.UserContent(query)):
-        if event.is_final_response() and event.content:
-            yield event.content.parts[0].text
+            Logger.info(f"{agent.name} streamed in {timer.describe()}")
+            yield timer.event("final", data=final_answer)
@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+from common.cache_store import DEFAULT_CACHE_DIR
+
+ADK_SESSION_STORE = os.getenv("ADK_SESSION_STORE", "sqlite")
+ADK_SESSION_DB = os.getenv("ADK_SESSION_DB", os.path.join(DEFAULT_CACHE_DIR, "adk_sessions.sqlite3"))
+ADK_SESSION_TTL_SECONDS = float(os.getenv("ADK_SESSION_TTL_SECONDS", str(24 * 60 * 60)))
+ADK_SESSION_MAX_SESSIONS = int(os.getenv("ADK_SESSION_MAX_SESSIONS", "1000"))
+
+_session_service: BaseSessionService | None = None
+
+
+class SqliteSessionService(BaseSessionService):
+    """Persistent ADK sessions with TTL and least-recently-updated eviction.
+
+    Sessions not updated for `ttl_seconds` expire, and the oldest sessions are evicted once there are more than
+    `max_sessions`. State is kept per session: `app:` and `user:` prefixed keys are not shared between sessions.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float | None = ADK_SESSION_TTL_SECONDS,
+                 max_sessions: int = ADK_SESSION_MAX_SESSIONS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " app_name TEXT NOT NULL,"
+            " user_id TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " last_update_time REAL NOT NULL,"
+            " PRIMARY KEY (app_name, user_id, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_update ON sessions (last_update_time)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " app_name TEXT NOT NULL,"
+            " user_id TEXT NOT NULL,"
+            " session_id TEXT NOT NULL,"
+            " timestamp REAL NOT NULL,"
+            " event BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS events_session ON events (app_name, user_id, session_id)")
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state or {},
+                          last_update_time=time.time())
+        with self._lock:
+            self._evict(session.last_update_time)
+            try:
+                self._conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, state, last_update_time) VALUES (?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(session.state), session.last_update_time),
+                )
+            except sqlite3.IntegrityError:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        query = "SELECT event FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        args: list[Any] = [app_name, user_id, session_id]
+        if config and config.after_timestamp:
+            query += " AND timestamp >= ?"
+            args.append(config.after_timestamp)
+        query += " ORDER BY seq"
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None or self._expired(row[1], time.time()):
+                return None
+            events = [Event.model_validate_json(zlib.decompress(event))
+                      for (event,) in self._conn.execute(query, args)]
+        if config and config.num_recent_events:
+            events = events[-config.num_recent_events:]
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=json.loads(row[0]),
+                       events=events, last_update_time=row[1])
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        query = "SELECT user_id, id, state, last_update_time FROM sessions WHERE app_name = ?"
+        args: list[Any] = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            args.append(user_id)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=row_user_id, id=session_id, state=json.loads(state),
+                    last_update_time=last_update_time)
+            for row_user_id, session_id, state, last_update_time in rows
+            if not self._expired(last_update_time, now)
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._delete([(app_name, user_id, session_id)])
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                updated = self._conn.execute(
+                    "UPDATE sessions SET state = ?, last_update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (json.dumps(session.state, default=str), session.last_update_time,
+                     session.app_name, session.user_id, session.id),
+                ).rowcount
+                # A session evicted while it is still running keeps working in memory, but is not stored again.
+                if updated:
+                    self._conn.execute(
+                        "INSERT INTO events (app_name, user_id, session_id, timestamp, event) VALUES (?, ?, ?, ?, ?)",
+                        (session.app_name, session.user_id, session.id, event.timestamp,
+                         zlib.compress(event.model_dump_json(exclude_none=True).encode())),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return event
+
+    def stats(self) -> dict:
+        with self._lock:
+            (sessions,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            (events,) = self._conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        return {"sessions": sessions, "events": events, "evictions": self.evictions}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, last_update_time: float, now: float) -> bool:
+        return self.ttl_seconds is not None and last_update_time <= now - self.ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        evicted = []
+        if self.ttl_seconds is not None:
+            evicted += self._conn.execute(
+                "SELECT app_name, user_id, id FROM sessions WHERE last_update_time <= ?", (now - self.ttl_seconds,)
+            ).fetchall()
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        # Leave room for the session being created.
+        overflow = count - len(evicted) - self.max_sessions + 1
+        if overflow > 0:
+            evicted += self._conn.execute(
+                "SELECT app_name, user_id, id FROM sessions WHERE last_update_time > ? ORDER BY last_update_time "
+                "LIMIT ?", (now - self.ttl_seconds if self.ttl_seconds is not None else float("-inf"), overflow)
+            ).fetchall()
+        if evicted:
+            self._delete(evicted)
+            self.evictions += len(evicted)
+
+    def _delete(self, keys: list[tuple[str, str, str]]) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", keys)
+            self._conn.executemany("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", keys)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+
+SESSION_STORES = {
+    "sqlite": lambda: SqliteSessionService(ADK_SESSION_DB),
+    "memory": InMemorySessionService,
+}
+
+
+def get_session_service() -> BaseSessionService:
+    global _session_service
+    if _session_service is None:
+        _session_service = SESSION_STORES[ADK_SESSION_STORE]()
+    return _session_service
+
+
+def set_session_service(session_service: BaseSessionService) -> None:
+    global _session_service
+    _session_service = session_service
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
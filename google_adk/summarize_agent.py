@@ -1,64 +1,103 @@
 import asyncio
 import logging
-import os
+from typing import AsyncIterator
 
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
-from google.adk.tools import McpToolset
-from google.adk.tools.mcp_tool import StdioConnectionParams
-from mcp import StdioServerParameters
-from opik.integrations.adk import OpikTracer, track_adk_agent_recursive
 
-from config import Logger, configure_observability
-from google_adk.runner import run_agent
+from common.map_reduce import map_reduce, token_budget, count_tokens
+from common.models import MarkdownReport
+from common.report_sink import get_report_sink
+from common.streaming import StreamEvent
+from config import Logger, configure_logging, configure_observability
+from google_adk.runner import run_agent, stream_agent, create_model, model_name, track_agent
 
 logger = logging.getLogger(__name__)
 
 
-summarize_mcp_tool = McpToolset(
-    tool_name_prefix="filesystem",
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command="npx",
-            args=["-y", "@modelcontextprotocol/server-filesystem", f"{os.getcwd()}"]
-        ),
-        timeout=30
-    )
-)
-
 def create_summarize_agent() -> LlmAgent:
     return LlmAgent(
         name="summarize_agent",
         instruction="""
             You are a summarizer that given report to summarize to markdown and korean language.
 
-            1. Create a markdown file to the `report` directory and the file name is `title.md`.
-            2. The file content has to fill by your summarize result.
+            Return the given title and the markdown document of your summarize result.
+        """,
+        model=create_model("gemini-2.5-flash"),
+        output_schema=MarkdownReport,
+        output_key="markdown_report",
+    )
+
+
+def create_condense_agent() -> LlmAgent:
+    return LlmAgent(
+        name="condense_agent",
+        instruction="""
+            You condense a part of a set of research reports so that it can be summarized together with the others.
 
-            Respond only the file path.
+            Keep every key finding, number, date, name and source URL, drop repetition and filler.
+            Respond only the condensed notes as markdown bullet points, in the language of the given text.
         """,
-        model=Gemini(model="gemini-2.5-flash"),
-        tools=[summarize_mcp_tool]
+        model=create_model("gemini-2.5-flash"),
     )
 
+
+async def condense(text: str) -> str:
+    final_answer = ""
+    async for event in run_agent(app_name="summarize", user_id="test_user", agent=create_condense_agent(),
+                                 query=text, stage="summarize.map"):
+        final_answer = event
+    return final_answer
+
+
+async def summarize_input(title: str, reports: list[str], model: str) -> str:
+    """Build the summarize prompt, condensing the reports first when they exceed the token budget of `model`."""
+    prefix = f"title: {title}\n reports: "
+    reports = await map_reduce(reports, token_budget(model) - count_tokens(prefix), condense)
+    return prefix + "\n\n".join(reports)
+
+
 async def summarize(title: str, reports: list[str]) -> str:
     agent = create_summarize_agent()
-    opik_tracer = OpikTracer(
-        name="summarize-agent",
-        project_name="adk-multi-agent-demo"
-    )
-    track_adk_agent_recursive(agent, opik_tracer)
+    track_agent(agent, "summarize-agent")
 
     final_answer = None
-    async for event in run_agent(app_name="research", user_id="test_user", session_id="test_session", agent=agent,
-                                 query=f"title: {title}\n reports: " + "\n\n".join(reports)):
+    async for event in run_agent(app_name="research", user_id="test_user", agent=agent,
+                                 query=await summarize_input(title, reports, model_name(agent)), stage="summarize"):
         final_answer = event
-        Logger.info(final_answer)
-    await summarize_mcp_tool.close()
-    return final_answer
+    report = MarkdownReport.model_validate_json(final_answer)
+    path = get_report_sink().write(title, report.markdown)
+    Logger.info(path)
+    return path
+
+
+def create_streaming_summarize_agent() -> LlmAgent:
+    return LlmAgent(
+        name="streaming_summarize_agent",
+        instruction="""
+            You are a summarizer that given report to summarize to markdown and korean language.
+
+            Respond only the markdown document, starting with a `# title` heading.
+        """,
+        model=create_model("gemini-2.5-flash"),
+    )
+
+
+async def summarize_streamed(title: str, reports: list[str]) -> AsyncIterator[StreamEvent]:
+    agent = create_streaming_summarize_agent()
+    with get_report_sink().open_stream(title) as stream:
+        async for event in stream_agent(app_name="research", user_id="test_user",
+                                        agent=agent, query=await summarize_input(title, reports, model_name(agent)),
+                                        stage="summarize"):
+            if event.type == "token":
+                stream.write(event.text)
+            elif event.type == "final":
+                event.data = stream.commit()
+                Logger.info(f"Result of the summarization: {event.data}")
+            yield event
 
 
 if __name__ == '__main__':
+    configure_logging()
     configure_observability()
     asyncio.run(
         summarize(
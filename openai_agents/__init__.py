@@ -1,5 +1,40 @@
-from .evaluator_agent import create_evaluate_agent
-from .guardrail_agent import research_guardrail, create_guardrail_agent
-from .planner_agent import create_planner_agent
-from .research_agent import create_research_agent, create_research_mcp_server
-from .summarize_agent import create_summarize_agent, create_summarize_mcp_server
\ No newline at end of file
+"""Agents of the research workflow, imported on first use so a single agent does not load the others."""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .evaluator_agent import create_evaluate_agent, evaluate
+    from .guardrail_agent import research_guardrail, create_guardrail_agent, check_research_work
+    from .planner_agent import create_planner_agent, plan
+    from .research_agent import create_research_agent, create_research_mcp_server, research
+    from .summarize_agent import create_summarize_agent, summarize, write_report_output
+
+_EXPORTS = {
+    "create_evaluate_agent": "evaluator_agent",
+    "evaluate": "evaluator_agent",
+    "research_guardrail": "guardrail_agent",
+    "create_guardrail_agent": "guardrail_agent",
+    "check_research_work": "guardrail_agent",
+    "create_planner_agent": "planner_agent",
+    "plan": "planner_agent",
+    "create_research_agent": "research_agent",
+    "create_research_mcp_server": "research_agent",
+    "research": "research_agent",
+    "create_summarize_agent": "summarize_agent",
+    "summarize": "summarize_agent",
+    "write_report_output": "summarize_agent",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable
+
+from agents import Agent, ModelSettings, ModelBehaviorError, MaxTurnsExceeded, TResponseInputItem
+from openai.types import Reasoning
+from pydantic import ValidationError
+
+from config import Logger
+from openai_agents.runner import run_agent, RejectedOutputError
+
+# Failures that a stronger model or more reasoning effort can fix.
+ESCALATING_ERRORS = (ModelBehaviorError, ValidationError, RejectedOutputError, MaxTurnsExceeded)
+
+
+@dataclass(frozen=True)
+class Tier:
+    model: str
+    effort: str | None = None
+
+    def apply(self, agent: Agent) -> Agent:
+        model_settings = agent.model_settings
+        if self.effort is not None:
+            model_settings = model_settings.resolve(ModelSettings(reasoning=Reasoning(effort=self.effort)))
+        return agent.clone(model=self.model, model_settings=model_settings)
+
+    def __str__(self) -> str:
+        return f"{self.model}:{self.effort}" if self.effort else self.model
+
+
+# Cheapest first. The last tier is the configuration the agents used before the cascade.
+DEFAULT_CASCADES: dict[str, list[Tier]] = {
+    "plan": [Tier("gpt-5-nano", "low"), Tier("gpt-5-mini", "low"), Tier("gpt-5-mini", "high")],
+    "research": [Tier("gpt-5-nano", "minimal"), Tier("gpt-5-nano", "low")],
+    "evaluate": [Tier("gpt-5-nano", "low"), Tier("gpt-5-mini", "minimal"), Tier("gpt-5-mini", "low")],
+}
+
+
+def parse_tiers(value: str) -> list[Tier]:
+    """Parse `gpt-5-nano:low,gpt-5-mini:high` into tiers."""
+    tiers = []
+    for item in value.split(","):
+        model, _, effort = item.strip().partition(":")
+        if model:
+            tiers.append(Tier(model, effort or None))
+    return tiers
+
+
+def cascade_for(stage: str) -> list[Tier] | None:
+    """Tiers of `stage`, overridable with e.g. `MODEL_CASCADE_PLAN=gpt-5-mini:low,gpt-5:medium`."""
+    if os.getenv("MODEL_CASCADE_ENABLED", "1") != "1":
+        return None
+    value = os.getenv(f"MODEL_CASCADE_{stage.upper()}")
+    return parse_tiers(value) if value else DEFAULT_CASCADES.get(stage)
+
+
+@dataclass
+class EscalationStats:
+    stage: str
+    calls: int = 0
+    escalated_calls: int = 0
+    escalations: int = 0
+    failures: int = 0
+    resolved_by: dict[str, int] = field(default_factory=dict)
+    reasons: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated_calls / self.calls if self.calls else 0.0
+
+
+class EscalationRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, EscalationStats] = {}
+
+    def record(self, stage: str, resolved_by: Tier | None, errors: list[Exception]) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(stage, EscalationStats(stage))
+            # Every error but the one of the last tier moved the call to the next tier.
+            escalations = len(errors) - int(resolved_by is None)
+            stats.calls += 1
+            stats.escalations += escalations
+            stats.escalated_calls += int(escalations > 0)
+            if resolved_by is None:
+                stats.failures += 1
+            else:
+                stats.resolved_by[str(resolved_by)] = stats.resolved_by.get(str(resolved_by), 0) + 1
+            for error in errors:
+                stats.reasons[type(error).__name__] = stats.reasons.get(type(error).__name__, 0) + 1
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {stage: {**asdict(stats), "escalation_rate": round(stats.escalation_rate, 4)}
+                    for stage, stats in self._stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+
+escalation_stats = EscalationRegistry()
+
+
+async def run_cascade(agent: Agent, input: str | list[TResponseInputItem], stage: str,
+                      validate: Callable[[Any], Awaitable[str | None]] | None = None, **kwargs) -> Any:
+    """Run `agent` on the cheapest tier of `stage`, escalating to the next tier when its output is invalid.
+
+    An output is invalid when it does not parse into the agent's output type, the run runs out of turns, or
+    `validate` rejects it. The agent runs unchanged when `stage` has no cascade.
+    """
+    tiers = cascade_for(stage)
+    if not tiers:
+        return await run_agent(agent, input, stage=stage, validate=validate, **kwargs)
+
+    errors: list[Exception] = []
+    for index, tier in enumerate(tiers):
+        try:
+            output = await run_agent(tier.apply(agent), input, stage=stage, validate=validate, **kwargs)
+        except ESCALATING_ERRORS as e:
+            errors.append(e)
+            if index == len(tiers) - 1:
+                escalation_stats.record(stage, None, errors)
+                raise
+            reason = str(e).splitlines()[0] if str(e) else ""
+            Logger.info(f"{stage} on {tier} failed ({type(e).__name__}: {reason}), escalating to {tiers[index + 1]}")
+            continue
+        escalation_stats.record(stage, tier, errors)
+        return output
@@ -1,15 +1,42 @@
 import asyncio
+import re
 
 from agents import Agent, input_guardrail, RunContextWrapper, TResponseInputItem, \
     GuardrailFunctionOutput, Runner, trace
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+from config import configure_logging
+from openai_agents.runner import run_agent
+
 
 class ResearchWorkOutput(BaseModel):
     is_research_work: bool = Field(description="Whether or not the query requires research work")
 
 
+# Inputs that obviously are not research work and can be rejected without calling the model.
+_NON_RESEARCH_PATTERNS = [
+    re.compile(r"^\W*(hi|hello|hey|yo|thanks|thank you|bye|good (morning|afternoon|evening|night))\b\W*$"),
+    re.compile(r"\b(what|who)('s| is| are)? (my|your) (name|age|birthday|password|address|phone number)\b"),
+    re.compile(r"\bwho am i\b"),
+    re.compile(r"\b(who|what) are you\b"),
+    re.compile(r"^\W*(ok|okay|yes|no|sure|test)\W*$"),
+]
+
+
+def prefilter_research_work(input: str | list[TResponseInputItem]) -> bool | None:
+    """Cheap local check: False for obvious non-research input, None when the model has to decide."""
+    if not isinstance(input, str):
+        return None
+    text = " ".join(input.split()).casefold()
+    # Length alone says nothing: "RAG" or "GPU" are research topics.
+    if not re.search(r"\w", text):
+        return False
+    if any(pattern.search(text) for pattern in _NON_RESEARCH_PATTERNS):
+        return False
+    return None
+
+
 def create_guardrail_agent() -> Agent:
     return Agent(
         name="Guardrail agent",
@@ -19,15 +46,21 @@ def create_guardrail_agent() -> Agent:
     )
 
 
+async def check_research_work(input: str | list[TResponseInputItem], context=None) -> ResearchWorkOutput:
+    if prefilter_research_work(input) is False:
+        return ResearchWorkOutput(is_research_work=False)
+    return await run_agent(create_guardrail_agent(), input, cache=True, stage="guardrail", context=context)
+
+
 @input_guardrail
 async def research_guardrail(
         ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(create_guardrail_agent(), input, context=ctx.context)
+    output = await check_research_work(input, context=ctx.context)
 
     return GuardrailFunctionOutput(
-        output_info=result.final_output,
-        tripwire_triggered=not result.final_output.is_research_work,
+        output_info=output,
+        tripwire_triggered=not output.is_research_work,
     )
 
 
@@ -46,5 +79,6 @@ async def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     load_dotenv()
     asyncio.run(main())
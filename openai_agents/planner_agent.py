@@ -1,19 +1,11 @@
 import asyncio
 
-from agents import Agent, Runner, ModelSettings
+from agents import Agent, ModelSettings
 from openai.types import Reasoning
-from pydantic import BaseModel, Field
 
-from config import Logger
-
-
-class WebSearchItem(BaseModel):
-    query: str = Field(description="The search term to use for the web search")
-    reason: str = Field(description="Your reasoning for why this search is important to the query")
-
-
-class WebSearchPlan(BaseModel):
-    searches: list[WebSearchItem] = Field(description="A list of web searches to perform to best answer the query")
+from common.models import WebSearchItem, WebSearchPlan
+from config import Logger, configure_logging
+from openai_agents.cascade import run_cascade
 
 
 def create_planner_agent() -> Agent:
@@ -29,13 +21,19 @@ def create_planner_agent() -> Agent:
     )
 
 
+async def validate_plan(web_search_plan: WebSearchPlan) -> str | None:
+    if not web_search_plan.searches or any(not item.query.strip() for item in web_search_plan.searches):
+        return "The plan has no searches or an empty query"
+    return None
+
+
 async def plan(query: str) -> WebSearchPlan:
     agent = create_planner_agent()
-    response = await Runner.run(agent, query)
-    web_search_plan = response.final_output
+    web_search_plan = await run_cascade(agent, query, stage="plan", cache=True, validate=validate_plan)
     Logger.info(web_search_plan.model_dump_json())
     return web_search_plan
 
 
 if __name__ == '__main__':
+    configure_logging()
     asyncio.run(plan("Due to 2025 year, What is the best model for agentic AI frontier model?"))
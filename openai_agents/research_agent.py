@@ -1,49 +1,151 @@
 import asyncio
 import logging
 import os
+import shlex
+from contextlib import AbstractAsyncContextManager
+from typing import Any, AsyncIterator
 
-from agents import Agent, Runner, ModelSettings
-from agents.mcp import MCPServerStdio, MCPServerStdioParams
+from agents import Agent, ModelSettings, RunContextWrapper
+from agents.mcp import MCPServer, MCPServerStdio, MCPServerStdioParams
+from mcp.types import CallToolResult, GetPromptResult, ListPromptsResult, Tool as MCPTool
 from openai.types import Reasoning
-from pydantic import BaseModel, Field
 
-from config import Logger
+from common.mcp_pool import MCP_TIMEOUT_SECONDS, mcp_server_pool
+from common.models import ResearchReport
+from common.rate_limit import rate_limited
+from common.search_cache import SearchCache, get_search_cache
+from common.search_context import search_result_json
+from common.streaming import StreamEvent
+from config import Logger, configure_logging
+from openai_agents.cascade import run_cascade
+from openai_agents.evaluator_agent import evaluate
+from openai_agents.runner import stream_agent
 
 logger = logging.getLogger(__name__)
 
+# Also escalate research whose report the evaluator rejects. Costs one evaluator call per report.
+RESEARCH_EVALUATE = os.getenv("RESEARCH_EVALUATE", "0") == "1"
+SERPER_SEARCH_TOOL = "google_search"
 
-class ResearchReport(BaseModel):
-    short_summary: str = Field(description="A short 2~3 sentence summary of the findings.")
-    markdown_report: str = Field(description="The final report")
 
+def _build_research_mcp_server() -> MCPServerStdio:
+    # SERPER_MCP_COMMAND swaps in a local stand-in server, e.g. for tests and benchmarks.
+    command, *args = shlex.split(os.getenv("SERPER_MCP_COMMAND", "uvx serper-mcp-server"))
+    params = MCPServerStdioParams(command=command, args=args,
+                                  env={"SERPER_API_KEY": os.getenv("SERPER_API_KEY", "")})
+    return MCPServerStdio(params=params, name="serper mcp server", client_session_timeout_seconds=MCP_TIMEOUT_SECONDS)
 
-def create_research_mcp_server() -> MCPServerStdio:
-    params = MCPServerStdioParams(command="uvx", args=["serper-mcp-server"],
-                                  env={"SERPER_API_KEY": os.getenv("SERPER_API_KEY")})
-    return MCPServerStdio(params=params, name="serper mcp server", client_session_timeout_seconds=30)
 
+research_mcp_pool = mcp_server_pool("serper mcp server", _build_research_mcp_server)
 
-def create_research_agent(server: MCPServerStdio) -> Agent:
+
+def create_research_mcp_server() -> AbstractAsyncContextManager[MCPServerStdio]:
+    return research_mcp_pool.lease()
+
+
+class CachedSearchServer(MCPServer):
+    """Serves search tool calls from `cache` when possible and sends the others under the serper rate limit."""
+
+    def __init__(self, server: MCPServer, cache: SearchCache | None):
+        super().__init__(use_structured_content=server.use_structured_content)
+        self.server = server
+        self.cache = cache
+
+    @property
+    def name(self) -> str:
+        return self.server.name
+
+    async def connect(self):
+        await self.server.connect()
+
+    async def cleanup(self):
+        await self.server.cleanup()
+
+    async def list_tools(self, run_context: RunContextWrapper[Any] | None = None,
+                         agent: Any | None = None) -> list[MCPTool]:
+        return await self.server.list_tools(run_context, agent)
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any] | None) -> CallToolResult:
+        cached = self.cache.get(tool_name, arguments) if self.cache is not None else None
+        if cached is not None:
+            return CallToolResult.model_validate_json(cached)
+
+        result = await rate_limited("serper", lambda: self.server.call_tool(tool_name, arguments))
+        if not result.isError and self.cache is not None:
+            self.cache.put(tool_name, arguments, result.model_dump_json(exclude_none=True))
+        return result
+
+    async def list_prompts(self) -> ListPromptsResult:
+        return await self.server.list_prompts()
+
+    async def get_prompt(self, name: str, arguments: dict[str, Any] | None = None) -> GetPromptResult:
+        return await self.server.get_prompt(name, arguments)
+
+
+def with_search_cache(server: MCPServer) -> MCPServer:
+    return CachedSearchServer(server, get_search_cache())
+
+
+async def search(query: str) -> dict:
+    """Raw serper results of `query`, through the server pool and the search cache."""
+    async with create_research_mcp_server() as server:
+        result = await with_search_cache(server).call_tool(SERPER_SEARCH_TOOL, {"q": query})
+    if result.isError:
+        raise RuntimeError(f"Search failed: {search_result_json(result.content) or result.content}")
+    if isinstance(result.structuredContent, dict) and "organic" in result.structuredContent:
+        return result.structuredContent
+    return search_result_json(result.content)
+
+
+def create_research_agent(server: MCPServer | None) -> Agent:
+    """Research agent searching with `server`, or working from the sources in its input when there is none."""
     return Agent(
         name="Research agent",
         instructions="""
                 You are a senior researcher tasked with writing a cohesive report for a research query.
                 You will be provided original query, ann return the following data output.
+                When sources are provided, base the report on them and cite them by their [number].
                 """,
         model="gpt-5-nano",
         model_settings=ModelSettings(reasoning=Reasoning(effort="low")),
-        mcp_servers=[server],
+        mcp_servers=[with_search_cache(server)] if server is not None else [],
         output_type=ResearchReport,
     )
 
 
-async def research(query: str, feedback: str | None = None) -> ResearchReport:
+async def validate_report(report: ResearchReport) -> str | None:
+    if not report.short_summary.strip() or not report.markdown_report.strip():
+        return "The report is empty"
+    if RESEARCH_EVALUATE:
+        evaluation = await evaluate(report.markdown_report)
+        if not evaluation.passed:
+            return evaluation.feedback
+    return None
+
+
+async def research(query: str, feedback: str | None = None, sources: str | None = None) -> ResearchReport:
+    """Research `query`, from `sources` (see `common.search_context`) when given, otherwise with the search tool."""
+    if sources:
+        result = await run_cascade(create_research_agent(None),
+                                   f"query: {query}\n feedback: {feedback}\n sources:\n{sources}",
+                                   stage="research", validate=validate_report, max_turns=3)
+    else:
+        async with create_research_mcp_server() as server:
+            agent = create_research_agent(server)
+            result = await run_cascade(agent, f"query: {query}\n feedback: {feedback}", stage="research",
+                                       validate=validate_report, max_turns=3)
+    Logger.info(result.model_dump_json())
+    return result
+
+
+async def research_streamed(query: str, feedback: str | None = None) -> AsyncIterator[StreamEvent]:
     async with create_research_mcp_server() as server:
         agent = create_research_agent(server)
-        result = await Runner.run(agent, f"query: {query}\n feedback: {feedback}", max_turns=3)
-        Logger.info(result.final_output.model_dump_json())
-        return result.final_output
+        async for event in stream_agent(agent, f"query: {query}\n feedback: {feedback}", stage="research",
+                                        max_turns=3):
+            yield event
 
 
 if __name__ == '__main__':
+    configure_logging()
     asyncio.run(research("Due to 2025 year, What is the best model for agentic AI frontier model?"))
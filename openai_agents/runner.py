@@ -0,0 +1,183 @@
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from agents import Agent, Runner, TResponseInputItem, RawResponsesStreamEvent, RunItemStreamEvent, RunHooks, \
+    RunContextWrapper, Tool, ModelResponse, RunConfig, FunctionTool, function_tool, Model
+from pydantic import BaseModel
+
+from common.metrics import metrics, StageRecorder
+from common.rate_limit import rate_limited, rate_limited_stream, estimate_tokens
+from common.response_cache import ResponseCache, get_response_cache
+from common.streaming import StreamEvent, FirstTokenTimer
+from config import Logger
+
+_run_config: RunConfig | None = None
+
+
+class RejectedOutputError(Exception):
+    """The final output of a run was rejected by its validator."""
+
+
+def get_run_config() -> RunConfig | None:
+    return _run_config
+
+
+def set_run_config(run_config: RunConfig | None) -> None:
+    """Use `run_config` for every run that does not pass its own, e.g. to swap in another model provider."""
+    global _run_config
+    _run_config = run_config
+
+
+class MetricsHooks(RunHooks):
+    def __init__(self, recorder: StageRecorder):
+        self.recorder = recorder
+
+    async def on_llm_start(self, context: RunContextWrapper, agent: Agent, system_prompt: str | None,
+                           input_items: list[TResponseInputItem]) -> None:
+        self.recorder.llm_start()
+
+    async def on_llm_end(self, context: RunContextWrapper, agent: Agent, response: ModelResponse) -> None:
+        self.recorder.llm_end()
+
+    async def on_tool_start(self, context: RunContextWrapper, agent: Agent, tool: Tool) -> None:
+        self.recorder.tool_start(tool.name)
+
+    async def on_tool_end(self, context: RunContextWrapper, agent: Agent, tool: Tool, result: str) -> None:
+        self.recorder.tool_end(tool.name)
+
+
+class RateLimitedModel(Model):
+    """Takes a slot of the rate limiter for every model call, instead of one for the whole run."""
+
+    def __init__(self, wrapped: Model, model: str):
+        self.wrapped = wrapped
+        self.model = model
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, **kwargs) -> ModelResponse:
+        return await rate_limited(
+            self.model,
+            lambda: self.wrapped.get_response(system_instructions, input, model_settings, tools, output_schema,
+                                              handoffs, tracing, **kwargs),
+            tokens=estimate_tokens(input), usage=lambda response: response.usage.total_tokens)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                              tracing, **kwargs) -> AsyncIterator:
+        async with rate_limited_stream(self.model, estimate_tokens(input)):
+            async for event in self.wrapped.stream_response(system_instructions, input, model_settings, tools,
+                                                            output_schema, handoffs, tracing, **kwargs):
+                yield event
+
+
+def model_name(agent: Agent) -> str:
+    return agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", None) or "default"
+
+
+def _record_usage(recorder: StageRecorder, result) -> None:
+    usage = result.context_wrapper.usage
+    recorder.add_usage(usage.input_tokens, usage.output_tokens, usage.output_tokens_details.reasoning_tokens)
+
+
+def _total_tokens(result) -> int:
+    return result.context_wrapper.usage.total_tokens
+
+
+def _cache_key(cache: ResponseCache, agent: Agent, input: str) -> str | None:
+    # Dynamic instructions and non-string models can not be hashed reliably, so they are never cached.
+    if not isinstance(agent.instructions, str) or not isinstance(agent.model, str):
+        return None
+    output_type = getattr(agent.output_type, "__name__", str(agent.output_type))
+    return cache.key(agent.model, agent.instructions, agent.model_settings.to_json_dict(), output_type, input)
+
+
+def _dump_output(output: Any) -> str:
+    if isinstance(output, BaseModel):
+        return output.model_dump_json()
+    return json.dumps(output, ensure_ascii=False)
+
+
+def _load_output(agent: Agent, value: str) -> Any:
+    if isinstance(agent.output_type, type) and issubclass(agent.output_type, BaseModel):
+        return agent.output_type.model_validate_json(value)
+    return json.loads(value)
+
+
+async def run_agent(agent: Agent, input: str | list[TResponseInputItem], cache: bool = False,
+                    stage: str | None = None, validate: Callable[[Any], Awaitable[str | None]] | None = None,
+                    limit_per_call: bool = False, **kwargs) -> Any:
+    """Run the agent and return its final output, recording its metrics under `stage`.
+
+    `cache=True` is meant for agents with a deterministic structured output. It only takes effect
+    when the response cache is enabled (`RESPONSE_CACHE_ENABLED=1`).
+    `validate` returns the reason to reject an output, which raises `RejectedOutputError` and is not cached.
+    `limit_per_call=True` takes a rate limiter slot per model call rather than for the whole run, for agents
+    whose tools run other agents: a slot held while they run could leave none for them.
+    """
+    with metrics.stage(stage or agent.name, model_name(agent)) as recorder:
+        response_cache = get_response_cache() if cache and isinstance(input, str) else None
+        key = _cache_key(response_cache, agent, input) if response_cache is not None else None
+        if key is not None:
+            cached = response_cache.get(key)
+            if cached is not None:
+                return _load_output(agent, cached)
+
+        hooks = kwargs.pop("hooks", None) or MetricsHooks(recorder)
+        run_config = kwargs.pop("run_config", None) or _run_config
+        if limit_per_call:
+            model = agent.model if isinstance(agent.model, Model) else \
+                (run_config or RunConfig()).model_provider.get_model(agent.model)
+            result = await Runner.run(agent.clone(model=RateLimitedModel(model, model_name(agent))), input,
+                                      hooks=hooks, run_config=run_config, **kwargs)
+        else:
+            result = await rate_limited(model_name(agent),
+                                        lambda: Runner.run(agent, input, hooks=hooks, run_config=run_config,
+                                                           **kwargs),
+                                        tokens=estimate_tokens(input), usage=_total_tokens)
+        _record_usage(recorder, result)
+        if validate is not None:
+            reason = await validate(result.final_output)
+            if reason:
+                raise RejectedOutputError(reason)
+        if key is not None:
+            response_cache.put(key, _dump_output(result.final_output))
+        return result.final_output
+
+
+def agent_tool(agent: Agent, tool_name: str, tool_description: str, stage: str,
+               run: Callable[..., Awaitable[Any]] | None = None,
+               output_extractor: Callable[[Any], Awaitable[str]] | None = None, **kwargs) -> FunctionTool:
+    """`agent.as_tool`, but the sub-agent runs through `run` (`run_agent` by default, or `run_cascade`) with the
+    rate limiter and the metrics of `stage`. `output_extractor` turns its final output into the tool result."""
+
+    @function_tool(name_override=tool_name, description_override=tool_description)
+    async def run_tool(context: RunContextWrapper, input: str) -> str:
+        output = await (run or run_agent)(agent, input, stage=stage, context=context.context, **kwargs)
+        if output_extractor is not None:
+            return await output_extractor(output)
+        return output if isinstance(output, str) else _dump_output(output)
+
+    return run_tool
+
+
+async def stream_agent(agent: Agent, input: str | list[TResponseInputItem], stage: str | None = None,
+                       **kwargs) -> AsyncIterator[StreamEvent]:
+    """Run the agent streamed, yielding text deltas and tool events, then a final event with the output."""
+    with metrics.stage(stage or agent.name, model_name(agent)) as recorder:
+        timer = FirstTokenTimer()
+        async with rate_limited_stream(model_name(agent), estimate_tokens(input)):
+            result = Runner.run_streamed(agent, input, hooks=kwargs.pop("hooks", None) or MetricsHooks(recorder),
+                                         run_config=kwargs.pop("run_config", None) or _run_config, **kwargs)
+            async for event in result.stream_events():
+                if isinstance(event, RawResponsesStreamEvent):
+                    if event.data.type == "response.output_text.delta":
+                        yield timer.event("token", event.data.delta)
+                elif isinstance(event, RunItemStreamEvent):
+                    if event.name == "tool_called":
+                        yield timer.event("tool_call", name=getattr(event.item.raw_item, "name", None),
+                                          data=getattr(event.item.raw_item, "arguments", None))
+                    elif event.name == "tool_output":
+                        yield timer.event("tool_output", data=event.item.output)
+
+        _record_usage(recorder, result)
+        Logger.info(f"{agent.name} streamed in {timer.describe()}")
+        yield timer.event("final", data=result.final_output)
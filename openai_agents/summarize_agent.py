@@ -1,47 +1,101 @@
 import asyncio
-import os
+from typing import AsyncIterator
 
-from agents import Agent, Runner, ModelSettings
-from agents.mcp import MCPServerStdioParams, MCPServerStdio
+from agents import Agent, ModelSettings
 from openai.types import Reasoning
 
-from config import Logger
+from common.map_reduce import map_reduce, token_budget, count_tokens
+from common.models import MarkdownReport
+from common.report_sink import get_report_sink
+from common.streaming import StreamEvent
+from config import Logger, configure_logging
+from openai_agents.runner import run_agent, stream_agent
+
+
+async def condense(text: str) -> str:
+    return await run_agent(create_condense_agent(), text, stage="summarize.map")
+
+
+async def summarize_input(title: str, reports: list[str], model: str) -> str:
+    """Build the summarize prompt, condensing the reports first when they exceed the token budget of `model`."""
+    prefix = f"title: {title}\n reports: "
+    reports = await map_reduce(reports, token_budget(model) - count_tokens(prefix), condense)
+    return prefix + "\n\n".join(reports)
 
 
 async def summarize(title: str, reports: list[str]) -> str:
-    async with create_summarize_mcp_server() as server:
-        agent = create_summarize_agent(server)
-        result = await Runner.run(agent, f"title: {title}\n reports: " + "\n\n".join(reports))
-        Logger.info(f"Result of the summarization: {result.final_output}")
-        return result.final_output
+    agent = create_summarize_agent()
+    result = await run_agent(agent, await summarize_input(title, reports, agent.model), stage="summarize")
+    path = get_report_sink().write(title, result.markdown)
+    Logger.info(f"Result of the summarization: {path}")
+    return path
 
 
-def create_summarize_mcp_server() -> MCPServerStdio:
-    params = MCPServerStdioParams(
-        command="npx",
-        args=["-y", "@modelcontextprotocol/server-filesystem", f"{os.getcwd()}"],
-    )
-    return MCPServerStdio(params=params, name="file system mcp server", client_session_timeout_seconds=30)
+async def write_report_output(report: MarkdownReport) -> str:
+    """`agent_tool` output extractor that stores the report and hands only its path back to the caller."""
+    return get_report_sink().write(report.title, report.markdown)
+
+
+async def summarize_streamed(title: str, reports: list[str]) -> AsyncIterator[StreamEvent]:
+    """Stream the summary and write it to the report sink as it is generated.
 
+    The final event carries the report path instead of the raw model output.
+    """
+    agent = create_streaming_summarize_agent()
+    with get_report_sink().open_stream(title) as stream:
+        async for event in stream_agent(agent, await summarize_input(title, reports, agent.model),
+                                        stage="summarize"):
+            if event.type == "token":
+                stream.write(event.text)
+            elif event.type == "final":
+                event.data = stream.commit()
+                Logger.info(f"Result of the summarization: {event.data}")
+            yield event
 
-def create_summarize_agent(server: MCPServerStdio) -> Agent:
+
+def create_summarize_agent() -> Agent:
     return Agent(
         name="Summarize agent",
         instructions="""
             You are a summarizer that given report to summarize to markdown and korean language.
             
-            1. Create a markdown file to the `report` directory and the file name is `{title}.md`.
-            2. The file content has to fill by your summarize result.
+            Return the given title and the markdown document of your summarize result.
+        """,
+        model="gpt-5-nano",
+        model_settings=ModelSettings(reasoning=Reasoning(effort="medium")),
+        output_type=MarkdownReport,
+    )
+
+
+def create_condense_agent() -> Agent:
+    return Agent(
+        name="Condense agent",
+        instructions="""
+            You condense a part of a set of research reports so that it can be summarized together with the others.
+            
+            Keep every key finding, number, date, name and source URL, drop repetition and filler.
+            Respond only the condensed notes as markdown bullet points, in the language of the given text.
+        """,
+        model="gpt-5-nano",
+        model_settings=ModelSettings(reasoning=Reasoning(effort="low")),
+    )
+
+
+def create_streaming_summarize_agent() -> Agent:
+    return Agent(
+        name="Streaming summarize agent",
+        instructions="""
+            You are a summarizer that given report to summarize to markdown and korean language.
             
-            Respond only the file path.
+            Respond only the markdown document, starting with a `# {title}` heading.
         """,
         model="gpt-5-nano",
         model_settings=ModelSettings(reasoning=Reasoning(effort="medium")),
-        mcp_servers=[server],
     )
 
 
 if __name__ == '__main__':
+    configure_logging()
     asyncio.run(
         summarize(
             title="Ai report",
@@ -1,26 +1,40 @@
 import asyncio
 import logging
 from contextlib import AsyncExitStack
+from typing import Literal
 
-from agents import Agent, trace, Runner, ModelSettings
+from agents import Agent, trace, ModelSettings
 from openai.types import Reasoning
 
-from openai_agents import create_research_mcp_server, create_summarize_mcp_server, create_planner_agent, create_research_agent, \
-    create_summarize_agent, create_guardrail_agent
-from configuration import configure_all
+from openai_agents import create_research_mcp_server, create_planner_agent, create_research_agent, \
+    create_summarize_agent, create_guardrail_agent, write_report_output
+from openai_agents.cascade import run_cascade
+from openai_agents.planner_agent import validate_plan
+from openai_agents.research_agent import validate_report
+from openai_agents.runner import agent_tool, run_agent
+from config import configure_logging, configure_observability
+from pipeline import run_pipeline, DEFAULT_MAX_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
 
-async def orchestration(topic: str):
+async def orchestration(topic: str, mode: Literal["agent", "pipeline"] = "agent",
+                        max_concurrency: int = DEFAULT_MAX_CONCURRENCY, speculative: bool = False,
+                        deadline_seconds: float | None = None, run_id: str | None = None):
+    """Research `topic`. In pipeline mode, a `run_id` makes the run resumable (see `run_pipeline`)."""
+    if mode == "pipeline":
+        result = await run_pipeline(topic, max_concurrency=max_concurrency, speculative=speculative,
+                                    deadline_seconds=deadline_seconds, run_id=run_id)
+        logger.info(result.report_path)
+        return result
+
     async with AsyncExitStack() as stack:
         research_mcp_server = await stack.enter_async_context(create_research_mcp_server())
-        summarize_mcp_server = await stack.enter_async_context(create_summarize_mcp_server())
 
         guardrail_agent = create_guardrail_agent()
         planner_agent = create_planner_agent()
         research_agent = create_research_agent(research_mcp_server)
-        summarize_agent = create_summarize_agent(summarize_mcp_server)
+        summarize_agent = create_summarize_agent()
 
         agent = Agent(
             name="Orchestrator agent",
@@ -36,32 +50,26 @@ async def orchestration(topic: str):
                 3. summarize
                 """,
             tools=[
-                guardrail_agent.as_tool(
-                    tool_name="guardrail",
-                    tool_description="Guardrail a research plan for the given research topic."
-                ),
-                planner_agent.as_tool(
-                    tool_name="plan",
-                    tool_description="Plan a research plan for the given research topic."
-                ),
-                research_agent.as_tool(
-                    tool_name="research",
-                    tool_description="Research on the given topic"
-                ),
-                summarize_agent.as_tool(
-                    tool_name="summarize",
-                    tool_description="Summarize the research result to markdown file"
-                )
+                agent_tool(guardrail_agent, "guardrail", "Guardrail a research plan for the given research topic.",
+                           stage="guardrail", cache=True),
+                agent_tool(planner_agent, "plan", "Plan a research plan for the given research topic.",
+                           stage="plan", run=run_cascade, cache=True, validate=validate_plan),
+                agent_tool(research_agent, "research", "Research on the given topic",
+                           stage="research", run=run_cascade, validate=validate_report, max_turns=3),
+                agent_tool(summarize_agent, "summarize", "Summarize the research result to markdown file",
+                           stage="summarize", output_extractor=write_report_output),
             ],
             model="gpt-5-mini",
             model_settings=ModelSettings(reasoning=Reasoning(effort="low")),
         )
 
         with trace("Research workflow"):
-            result = await Runner.run(agent, topic)
-            logger.info(result.final_output)
+            final_output = await run_agent(agent, topic, stage="orchestrate", limit_per_call=True)
+            logger.info(final_output)
+            return final_output
 
 
 if __name__ == '__main__':
-    configure_all()
+    configure_logging()
+    configure_observability()
     asyncio.run(orchestration("What is my name?"))
@@ -0,0 +1,341 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel, Field
+
+from backends import get_backend
+from common.deadline import Deadline, DeadlineExceeded, create_deadline
+from common.metrics import record_queue_time
+from common.models import EvaluateResult, ResearchReport, WebSearchItem, WebSearchPlan
+from common.report_index import get_report_index
+from common.search_context import SEARCH_PREPROCESS, build_search_context
+from common.workflow_store import Workflow, get_workflow_store
+from config import Logger
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 4
+# Rounds of evaluating the research reports and researching the rejected ones again with the feedback.
+PIPELINE_EVALUATE_ROUNDS = int(os.getenv("PIPELINE_EVALUATE_ROUNDS", "0"))
+
+
+class PipelineResult(BaseModel):
+    topic: str
+    is_research_work: bool
+    web_search_plan: WebSearchPlan | None = None
+    reports: list[ResearchReport] = Field(default_factory=list)
+    report_path: str | None = None
+    # The report of an earlier run on a similar topic was returned instead of researching again.
+    reused: bool = False
+    run_id: str | None = None
+    # Searches cancelled at the deadline; the summary covers the other ones.
+    dropped: list[WebSearchItem] = Field(default_factory=list)
+
+
+@dataclass
+class SpeculationStats:
+    prefiltered: int = 0
+    speculated: int = 0
+    wasted: int = 0
+
+    @property
+    def wasted_rate(self) -> float:
+        return self.wasted / self.speculated if self.speculated else 0.0
+
+
+speculation_stats = SpeculationStats()
+
+
+async def _within(deadline: Deadline | None, stage: str, call: Awaitable[T]) -> T:
+    return await call if deadline is None else await deadline.run(stage, call)
+
+
+async def research_all(web_search_plan: WebSearchPlan, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                       timeout: float | None = None,
+                       on_report: Callable[[WebSearchItem, ResearchReport], None] | None = None
+                       ) -> list[ResearchReport | None]:
+    """Research every search of the plan, in its order, calling `on_report` as each report is done.
+
+    With a `timeout`, research still running after it is cancelled and its report left as None.
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    sources: dict[str, str] = {}
+    if SEARCH_PREPROCESS:
+        from openai_agents.research_agent import search
+
+        # Search all queries up front so overlapping results reach the research model only once. Queries whose
+        # search misses half of the timeout are searched by the research agent instead.
+        sources = await build_search_context([item.query for item in web_search_plan.searches], search,
+                                             timeout=None if timeout is None else timeout / 2)
+
+    async def research_one(item: WebSearchItem) -> ResearchReport:
+        queued = time.perf_counter()
+        async with semaphore:
+            record_queue_time(time.perf_counter() - queued)
+            report = await get_backend().research(item.query, sources=sources.get(item.query))
+        if on_report is not None:
+            on_report(item, report)
+        return report
+
+    tasks = [asyncio.create_task(research_one(item)) for item in web_search_plan.searches]
+    try:
+        if tasks:
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+            await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_EXCEPTION)
+        return [task.result() if task.done() else None for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def research_missing(web_search_plan: WebSearchPlan, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           timeout: float | None = None,
+                           on_report: Callable[[WebSearchItem, ResearchReport], None] | None = None
+                           ) -> list[ResearchReport | None]:
+    """research_all, reusing the indexed research of searches similar to ones researched recently."""
+    index = get_report_index()
+    if index is None:
+        return await research_all(web_search_plan, max_concurrency, timeout, on_report)
+
+    reports: list[ResearchReport | None] = []
+    for item in web_search_plan.searches:
+        hit = index.find_similar(item.query, "research")
+        reports.append(None if hit is None else ResearchReport(short_summary=hit.short_summary or "",
+                                                               markdown_report=hit.text))
+    missing = [item for item, report in zip(web_search_plan.searches, reports) if report is None]
+    if len(missing) < len(reports):
+        Logger.info(f"Reusing {len(reports) - len(missing)} of {len(reports)} searches from the report index")
+
+    for item, report in zip(web_search_plan.searches, reports):
+        if report is not None and on_report is not None:
+            on_report(item, report)
+    researched = (await research_all(WebSearchPlan(searches=missing), max_concurrency, timeout, on_report)
+                  if missing else [])
+    for item, report in zip(missing, researched):
+        if report is not None:
+            index.add(report.markdown_report, "research", item.query, short_summary=report.short_summary)
+    researched_reports = iter(researched)
+    return [report if report is not None else next(researched_reports) for report in reports]
+
+
+async def _research(web_search_plan: WebSearchPlan, max_concurrency: int, timeout: float | None,
+                    workflow: Workflow | None) -> list[ResearchReport | None]:
+    """research_missing, skipping the searches `workflow` has researched already and checkpointing the others."""
+    if workflow is None:
+        return await research_missing(web_search_plan, max_concurrency, timeout)
+    done = workflow.load_all("research", ResearchReport)
+    missing = [item for item in web_search_plan.searches if item.query not in done]
+    if len(missing) < len(web_search_plan.searches):
+        Logger.info(f"Run {workflow.run_id}: {len(web_search_plan.searches) - len(missing)} of "
+                    f"{len(web_search_plan.searches)} searches researched already")
+    researched = iter(await research_missing(
+        WebSearchPlan(searches=missing), max_concurrency, timeout,
+        on_report=lambda item, report: workflow.save("research", report, key=item.query),
+    ) if missing else [])
+    return [done[item.query] if item.query in done else next(researched) for item in web_search_plan.searches]
+
+
+async def revise_rejected(searches: list[WebSearchItem], reports: list[ResearchReport | None],
+                          rounds: int = PIPELINE_EVALUATE_ROUNDS, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                          workflow: Workflow | None = None) -> None:
+    """Evaluate the reports and research the searches of the rejected ones again with the evaluator's feedback,
+    at most `rounds` times. Only rejected searches are researched again; `reports` is updated in place."""
+    from openai_agents.evaluator_agent import evaluate
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    index = get_report_index()
+    passed: set[int] = set()
+
+    async def evaluate_one(i: int) -> EvaluateResult:
+        evaluation = workflow.load("evaluate", EvaluateResult, key=searches[i].query) if workflow else None
+        if evaluation is None:
+            async with semaphore:
+                evaluation = await evaluate(reports[i].markdown_report)
+            if workflow is not None:
+                workflow.save("evaluate", evaluation, key=searches[i].query)
+        return evaluation
+
+    async def revise(i: int, feedback: str | None) -> None:
+        query = searches[i].query
+        async with semaphore:
+            reports[i] = await get_backend().research(query, feedback=feedback)
+        if workflow is not None:
+            workflow.save("research", reports[i], key=query)
+            workflow.delete("evaluate", key=query)
+        if index is not None:
+            index.add(reports[i].markdown_report, "research", query, short_summary=reports[i].short_summary)
+
+    for round_ in range(1, rounds + 1):
+        pending = [i for i, report in enumerate(reports) if report is not None and i not in passed]
+        evaluations = await asyncio.gather(*(evaluate_one(i) for i in pending))
+        passed.update(i for i, evaluation in zip(pending, evaluations) if evaluation.passed)
+        rejected = [(i, evaluation.feedback) for i, evaluation in zip(pending, evaluations) if not evaluation.passed]
+        if not rejected:
+            return
+        Logger.info(f"Evaluator rejected {len(rejected)} of {len(pending)} reports, researching them again "
+                    f"({round_}/{rounds}): {[searches[i].query for i, _ in rejected]}")
+        await asyncio.gather(*(revise(i, feedback) for i, feedback in rejected))
+
+
+async def _speculate(topic: str, max_concurrency: int, speculate_research: bool,
+                     deadline: Deadline | None = None, workflow: Workflow | None = None
+                     ) -> tuple[WebSearchPlan, list[ResearchReport | None] | None] | None:
+    """Run the guardrail and the downstream work together, cancelling the work if the tripwire triggers.
+
+    Speculative research goes through `_research` like the main flow, reusing indexed reports and checkpointing.
+    """
+    from openai_agents.guardrail_agent import check_research_work
+
+    async def plan_and_research() -> tuple[WebSearchPlan, list[ResearchReport | None] | None]:
+        web_search_plan = await _within(deadline, "plan", get_backend().plan(topic))
+        reports = None
+        if speculate_research:
+            timeout = deadline.stage_timeout("research") if deadline is not None else None
+            reports = await _research(web_search_plan, max_concurrency, timeout, workflow)
+        return web_search_plan, reports
+
+    speculation_stats.speculated += 1
+    work = asyncio.create_task(plan_and_research())
+    try:
+        guardrail_output = await _within(deadline, "guardrail", check_research_work(topic))
+    except BaseException:
+        work.cancel()
+        await asyncio.gather(work, return_exceptions=True)
+        raise
+
+    if not guardrail_output.is_research_work:
+        work.cancel()
+        await asyncio.gather(work, return_exceptions=True)
+        speculation_stats.wasted += 1
+        Logger.info(f"Speculative work discarded after the guardrail tripwire "
+                    f"({speculation_stats.wasted}/{speculation_stats.speculated} wasted, "
+                    f"{speculation_stats.wasted_rate:.0%})")
+        return None
+    return await work
+
+
+async def run_pipeline(topic: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                       speculative: bool = False, speculate_research: bool = False,
+                       deadline_seconds: float | None = None, run_id: str | None = None,
+                       evaluate_rounds: int = PIPELINE_EVALUATE_ROUNDS) -> PipelineResult:
+    """Research `topic` end to end.
+
+    `deadline_seconds` (PIPELINE_DEADLINE_SECONDS by default) is the time budget of the run, split across the
+    stages. Research still running when its share is used up is cancelled and the summary is written from the
+    research that finished; the cancelled searches are listed in `PipelineResult.dropped`. The run fails with
+    DeadlineExceeded only when no research finished or another stage overruns.
+
+    With a `run_id`, the plan, every research report, evaluation and the result are checkpointed in the workflow
+    store, and running the same `run_id` again resumes from what was completed. A finished run returns its result.
+    """
+    workflow = get_workflow_store().open(run_id, topic) if run_id is not None else None
+    if workflow is not None:
+        result = workflow.load("result", PipelineResult)
+        if result is not None:
+            Logger.info(f"Run {run_id} has finished already: {result.report_path}")
+            return result
+    try:
+        result = await _run_pipeline(topic, max_concurrency, speculative, speculate_research,
+                                     create_deadline(deadline_seconds), workflow, evaluate_rounds)
+    except asyncio.CancelledError:
+        # Resumable like a failed run, but the run itself did not fail.
+        if workflow is not None:
+            workflow.finish("interrupted")
+        raise
+    except Exception as e:
+        if workflow is not None:
+            workflow.finish("failed", repr(e))
+        raise
+    if workflow is not None:
+        result.run_id = run_id
+        workflow.save("result", result)
+        workflow.finish("done")
+    return result
+
+
+async def _run_pipeline(topic: str, max_concurrency: int, speculative: bool, speculate_research: bool,
+                        deadline: Deadline | None, workflow: Workflow | None,
+                        evaluate_rounds: int) -> PipelineResult:
+    from agents import trace
+    from openai_agents.guardrail_agent import check_research_work, prefilter_research_work
+
+    if prefilter_research_work(topic) is False:
+        speculation_stats.prefiltered += 1
+        Logger.info(f"Pre-filter rejected the topic, it does not require research work: {topic}")
+        return PipelineResult(topic=topic, is_research_work=False)
+
+    index = get_report_index()
+    # A topic summarized before has passed the guardrail already.
+    summary = index.find_similar(topic, "summary") if index is not None else None
+    if summary is not None:
+        logger.warning(f"Returning the cached report of {summary.topic!r} ({summary.similarity:.0%} similar, indexed "
+                       f"{time.time() - summary.created_at:.0f}s ago) for {topic!r} instead of researching it: "
+                       f"{summary.path}")
+        return PipelineResult(topic=topic, is_research_work=True, report_path=summary.path, reused=True)
+
+    with trace("Research pipeline"):
+        reports = None
+        # A planned run has passed the guardrail already.
+        web_search_plan = workflow.load("plan", WebSearchPlan) if workflow is not None else None
+        planned = web_search_plan is not None
+        if planned:
+            Logger.info(f"Resuming run {workflow.run_id} after planning")
+        elif speculative:
+            speculation = await _speculate(topic, max_concurrency, speculate_research, deadline, workflow)
+            if speculation is None:
+                return PipelineResult(topic=topic, is_research_work=False)
+            web_search_plan, reports = speculation
+        else:
+            guardrail_output = await _within(deadline, "guardrail", check_research_work(topic))
+            if not guardrail_output.is_research_work:
+                Logger.info(f"Guardrail rejected the topic, it does not require research work: {topic}")
+                return PipelineResult(topic=topic, is_research_work=False)
+            web_search_plan = await _within(deadline, "plan", get_backend().plan(topic))
+        if workflow is not None and not planned:
+            workflow.save("plan", web_search_plan)
+
+        timeout = deadline.stage_timeout("research") if deadline is not None else None
+        research_until = time.monotonic() + timeout if timeout is not None else None
+        if reports is None:
+            reports = await _research(web_search_plan, max_concurrency, timeout, workflow)
+        if evaluate_rounds > 0:
+            revision = revise_rejected(web_search_plan.searches, reports, evaluate_rounds, max_concurrency, workflow)
+            if research_until is None:
+                await revision
+            else:
+                # Evaluation shares the research time; the revisions done by then are kept.
+                try:
+                    await asyncio.wait_for(revision, max(0.0, research_until - time.monotonic()))
+                except asyncio.TimeoutError:
+                    Logger.info("Deadline reached while evaluating, summarizing the reports as they are")
+        dropped = [item for item, report in zip(web_search_plan.searches, reports) if report is None]
+        reports = [report for report in reports if report is not None]
+        if dropped:
+            if not reports:
+                raise DeadlineExceeded("research", deadline.seconds)
+            Logger.info(f"Deadline reached, summarizing {len(reports)} of {len(web_search_plan.searches)} searches, "
+                        f"dropped: {[item.query for item in dropped]}")
+        report_path = await _within(deadline, "summarize", get_backend().summarize(
+            topic, [report.markdown_report for report in reports]))
+
+    # A summary of only part of the searches would be reused for later runs of the topic as if it were complete.
+    if index is not None and not dropped and report_path and os.path.isfile(report_path):
+        with open(report_path, encoding="utf-8") as file:
+            index.add(file.read(), "summary", topic, path=report_path)
+
+    return PipelineResult(
+        topic=topic,
+        is_research_work=True,
+        web_search_plan=web_search_plan,
+        reports=reports,
+        report_path=report_path,
+        dropped=dropped,
+    )
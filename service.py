@@ -0,0 +1,326 @@
+"""HTTP front-end for the research pipeline.
+
+    python service.py
+    curl -X POST localhost:8000/research -H 'X-Client-Id: me' -d '{"topic": "..."}'
+    curl localhost:8000/research/<job_id>
+    curl -N localhost:8000/research/<job_id>/events
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Literal
+
+import uvicorn
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from common.mcp_pool import close_all_pools
+from common.metrics import metrics
+from common.rate_limit import rate_limit_stats
+from common.search_context import close_page_fetcher
+from config import Logger, configure_logging, configure_observability
+from openai_agents.research_agent import research_mcp_pool
+from pipeline import run_pipeline, DEFAULT_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "64"))
+SERVICE_MAX_JOBS_PER_CLIENT = int(os.getenv("SERVICE_MAX_JOBS_PER_CLIENT", "4"))
+SERVICE_JOB_TTL_SECONDS = float(os.getenv("SERVICE_JOB_TTL_SECONDS", "3600"))
+RETRY_AFTER_SECONDS = 5
+
+JobStatus = Literal["queued", "running", "done", "error", "cancelled"]
+
+
+@dataclass
+class Job:
+    id: str
+    topic: str
+    key: str
+    client_id: str
+    deadline_seconds: float | None = None
+    status: JobStatus = "queued"
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    result: dict | None = None
+    error: str | None = None
+    subscribers: int = 1
+    events: list[dict] = field(default_factory=list)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+    def publish(self, status: JobStatus, **data: Any) -> None:
+        self.status = status
+        self.events.append({"status": status, "time": time.time(), **data})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def watch(self) -> AsyncIterator[dict]:
+        """Yield every status event of the job, from the first one until it finishes."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "topic": self.topic,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "subscribers": self.subscribers,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class Backpressure(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def coalesce_key(topic: str) -> str:
+    return " ".join(topic.split()).casefold()
+
+
+class ResearchService:
+    """Runs submitted topics on a fixed set of workers behind a bounded queue.
+
+    Submitting a topic that is already queued or running returns the existing job (single-flight), so
+    concurrent duplicate requests share one pipeline run. A full queue or a client with too many unfinished
+    jobs is rejected with `Backpressure`.
+    """
+
+    def __init__(self, workers: int = SERVICE_WORKERS, queue_size: int = SERVICE_QUEUE_SIZE,
+                 max_jobs_per_client: int = SERVICE_MAX_JOBS_PER_CLIENT,
+                 job_ttl_seconds: float = SERVICE_JOB_TTL_SECONDS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.workers = workers
+        self.max_jobs_per_client = max_jobs_per_client
+        self.job_ttl_seconds = job_ttl_seconds
+        self.max_concurrency = max_concurrency
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=queue_size)
+        self.jobs: dict[str, Job] = {}
+        self.coalesced = 0
+        self.rejected = 0
+        self._in_flight: dict[str, Job] = {}
+        self._client_jobs: dict[str, int] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers. Running jobs and the jobs still queued finish as cancelled."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self.queue.empty():
+            job = self.queue.get_nowait()
+            self._cancel(job)
+            self._release(job)
+            self.queue.task_done()
+
+    def submit(self, topic: str, client_id: str, deadline_seconds: float | None = None) -> tuple[Job, bool]:
+        """Queue `topic` and return its job and whether it joined an in-flight job for the same topic.
+
+        A joined job keeps the deadline it was submitted with.
+        """
+        self._prune()
+        key = coalesce_key(topic)
+        job = self._in_flight.get(key)
+        if job is not None:
+            job.subscribers += 1
+            self.coalesced += 1
+            return job, True
+
+        if self._client_jobs.get(client_id, 0) >= self.max_jobs_per_client:
+            self.rejected += 1
+            raise Backpressure(f"Client {client_id} already has {self.max_jobs_per_client} unfinished jobs")
+        job = Job(id=uuid.uuid4().hex, topic=topic, key=key, client_id=client_id, deadline_seconds=deadline_seconds)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Backpressure("The job queue is full")
+
+        self.jobs[job.id] = job
+        self._in_flight[key] = job
+        self._client_jobs[client_id] = self._client_jobs.get(client_id, 0) + 1
+        job.publish("queued", position=self.queue.qsize())
+        return job, False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "in_flight": len(self._in_flight),
+            "jobs": len(self.jobs),
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.publish("running")
+        started = time.perf_counter()
+        try:
+            result = await run_pipeline(job.topic, max_concurrency=self.max_concurrency,
+                                        deadline_seconds=job.deadline_seconds)
+            job.result = result.model_dump(mode="json")
+            job.finished_at = time.time()
+            job.publish("done", result=job.result, seconds=round(time.perf_counter() - started, 3))
+        except Exception as e:
+            Logger.info(f"Job {job.id} failed: {e!r}")
+            job.error = repr(e)
+            job.finished_at = time.time()
+            job.publish("error", error=job.error)
+        except asyncio.CancelledError:
+            self._cancel(job)
+            raise
+        finally:
+            self._release(job)
+
+    def _cancel(self, job: Job) -> None:
+        Logger.info(f"Job {job.id} was cancelled")
+        job.error = "The service stopped before the job finished"
+        job.finished_at = time.time()
+        job.publish("cancelled", error=job.error)
+
+    def _release(self, job: Job) -> None:
+        self._in_flight.pop(job.key, None)
+        remaining = self._client_jobs.get(job.client_id, 1) - 1
+        if remaining > 0:
+            self._client_jobs[job.client_id] = remaining
+        else:
+            self._client_jobs.pop(job.client_id, None)
+
+    def _prune(self) -> None:
+        expires = time.time() - self.job_ttl_seconds
+        for job_id in [job.id for job in self.jobs.values() if job.finished and job.finished_at < expires]:
+            del self.jobs[job_id]
+
+
+def _client_id(request: Request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
+
+def _too_many_requests(reason: str) -> JSONResponse:
+    return JSONResponse({"error": reason}, status_code=429, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+async def submit_research(request: Request) -> JSONResponse:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return JSONResponse({"error": "The body must be JSON"}, status_code=400)
+    topic = body.get("topic") if isinstance(body, dict) else None
+    if not isinstance(topic, str) or not topic.strip():
+        return JSONResponse({"error": "`topic` is required"}, status_code=400)
+    deadline_seconds = body.get("deadline_seconds")
+    if deadline_seconds is not None and (isinstance(deadline_seconds, bool) or
+                                         not isinstance(deadline_seconds, (int, float)) or deadline_seconds <= 0):
+        return JSONResponse({"error": "`deadline_seconds` must be a positive number"}, status_code=400)
+
+    service: ResearchService = request.app.state.service
+    try:
+        job, coalesced = service.submit(topic, _client_id(request), deadline_seconds)
+    except Backpressure as e:
+        return _too_many_requests(e.reason)
+    return JSONResponse({**job.to_dict(), "coalesced": coalesced}, status_code=202,
+                        headers={"Location": f"/research/{job.id}"})
+
+
+def _get_job(request: Request) -> Job | None:
+    return request.app.state.service.jobs.get(request.path_params["job_id"])
+
+
+async def get_research(request: Request) -> JSONResponse:
+    job = _get_job(request)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+async def research_events(request: Request):
+    job = _get_job(request)
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+
+    async def events():
+        async for event in job.watch():
+            yield {"event": event["status"], "data": json.dumps(event, ensure_ascii=False)}
+
+    return EventSourceResponse(events())
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok", **request.app.state.service.stats(), "rate_limits": rate_limit_stats()})
+
+
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(service: ResearchService | None = None, warm_pools: bool = True) -> Starlette:
+    service = service or ResearchService()
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        app.state.service = service
+        if warm_pools:
+            # Spawn the MCP servers before the first request instead of on it.
+            await research_mcp_pool.start()
+        await service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+            await close_all_pools()
+            await close_page_fetcher()
+
+    return Starlette(
+        routes=[
+            Route("/research", submit_research, methods=["POST"]),
+            Route("/research/{job_id}", get_research, methods=["GET"]),
+            Route("/research/{job_id}/events", research_events, methods=["GET"]),
+            Route("/healthz", health, methods=["GET"]),
+            Route("/metrics", prometheus_metrics, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+if __name__ == "__main__":
+    configure_logging()
+    configure_observability()
+    uvicorn.run(create_app(), host=SERVICE_HOST, port=SERVICE_PORT)
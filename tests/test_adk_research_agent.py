@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from mcp.types import CallToolResult, TextContent, Tool
+
+from common import rate_limit
+from common.cache_store import SqliteCache
+from common.models import ResearchReport
+from common.search_cache import SearchCache
+from common.streaming import StreamEvent
+from google_adk import research_agent
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch) -> SearchCache:
+    cache = SearchCache(SqliteCache(str(tmp_path / "search.sqlite3"), 1024 * 1024))
+    monkeypatch.setattr(research_agent, "get_search_cache", lambda: cache)
+    return cache
+
+
+def _call(tool_name: str, call_id: str = "call-1"):
+    return SimpleNamespace(name=tool_name), SimpleNamespace(function_call_id=call_id)
+
+
+def test_search_results_are_cached(cache):
+    tool, context = _call("serper_google_search")
+    args = {"q": "agentic ai"}
+    assert research_agent.lookup_search_cache(tool, args, context) is None
+    research_agent.store_search_cache(tool, args, context, {"organic": []})
+
+    assert research_agent.lookup_search_cache(tool, args, _call("serper_google_search", "call-2")[1]) == \
+        {"organic": []}
+    # Shared with the openai_agents research agent, whose tool names are not prefixed.
+    assert cache.get("google_search", args) is not None
+
+
+def test_other_tools_are_not_cached(cache):
+    tool, context = _call("set_model_response")
+    args = {"short_summary": "s", "markdown_report": "r"}
+    assert research_agent.lookup_search_cache(tool, args, context) is None
+    research_agent.store_search_cache(tool, args, context, {"short_summary": "s", "markdown_report": "r"})
+
+    assert cache.misses == 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_streamed_research_passes_the_feedback(monkeypatch):
+    prompts = []
+
+    @asynccontextmanager
+    async def lease():
+        yield None
+
+    async def stream_agent(app_name, user_id, agent, query, stage):
+        prompts.append(query)
+        yield StreamEvent(type="final", data='{"short_summary": "s", "markdown_report": "r"}')
+
+    monkeypatch.setattr(research_agent.research_toolset_pool, "lease", lease)
+    monkeypatch.setattr(research_agent, "stream_agent", stream_agent)
+
+    async def collect():
+        return [event async for event in research_agent.research_streamed("agentic ai", feedback="add numbers")]
+
+    events = asyncio.run(collect())
+    assert prompts == ["query: agentic ai\n feedback: add numbers"]
+    assert events[-1].data == ResearchReport(short_summary="s", markdown_report="r")
+
+
+def test_search_tool_calls_are_rate_limited(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "retry_delay", lambda attempt, error=None: 0.0)
+    rate_limit.reset_rate_limits()
+    calls = []
+
+    class RateLimited(Exception):
+        status_code = 429
+
+    class Session:
+        async def call_tool(self, name, arguments):
+            calls.append((name, arguments))
+            if len(calls) == 1:
+                raise RateLimited()
+            return CallToolResult(content=[TextContent(type="text", text="results")])
+
+    class SessionManager:
+        async def create_session(self, headers=None):
+            return Session()
+
+    tool = research_agent.RateLimitedMcpTool(mcp_tool=Tool(name="google_search", inputSchema={"type": "object"}),
+                                             mcp_session_manager=SessionManager())
+    result = asyncio.run(tool.run_async(args={"q": "agentic ai"}, tool_context=None))
+
+    assert result["content"][0]["text"] == "results"
+    assert calls == [("google_search", {"q": "agentic ai"})] * 2
+    assert rate_limit.rate_limit_stats()["serper"]["throttled"] == 1
+    rate_limit.reset_rate_limits()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backends import HedgedBackend, create_backend, hedge_stats
+from common.models import WebSearchPlan
+
+
+class FakeBackend:
+    def __init__(self, name: str, seconds: float = 0.0, error: Exception | None = None):
+        self.name = name
+        self.seconds = seconds
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def plan(self, query: str) -> WebSearchPlan:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return WebSearchPlan(searches=[{"query": self.name, "reason": query}])
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    hedge_stats.reset()
+    yield
+    hedge_stats.reset()
+
+
+def _plan(backend: HedgedBackend) -> WebSearchPlan:
+    return asyncio.run(backend.plan("agentic ai"))
+
+
+def test_a_fast_primary_is_not_hedged():
+    primary, secondary = FakeBackend("primary"), FakeBackend("secondary")
+
+    assert _plan(HedgedBackend(primary, secondary, default_delay=1)).searches[0].query == "primary"
+    assert secondary.calls == 0
+    assert hedge_stats.snapshot()["plan"]["hedged"] == 0
+
+
+def test_a_slow_primary_is_hedged_and_cancelled():
+    primary, secondary = FakeBackend("primary", seconds=10), FakeBackend("secondary")
+
+    assert _plan(HedgedBackend(primary, secondary, default_delay=0.05)).searches[0].query == "secondary"
+    assert primary.cancelled == 1
+    assert hedge_stats.snapshot()["plan"]["wins"] == {"secondary": 1}
+
+
+def test_a_failing_primary_is_hedged_right_away():
+    primary = FakeBackend("primary", error=RuntimeError("down"))
+    secondary = FakeBackend("secondary")
+
+    assert _plan(HedgedBackend(primary, secondary, default_delay=10)).searches[0].query == "secondary"
+
+
+def test_the_first_error_is_raised_when_both_fail():
+    primary = FakeBackend("primary", error=RuntimeError("primary down"))
+    secondary = FakeBackend("secondary", error=RuntimeError("secondary down"))
+
+    with pytest.raises(RuntimeError, match="primary down"):
+        _plan(HedgedBackend(primary, secondary, default_delay=10))
+    assert hedge_stats.snapshot()["plan"]["failures"] == 1
+
+
+def test_stages_that_are_not_hedged_run_on_the_primary_only():
+    primary, secondary = FakeBackend("primary", error=RuntimeError("down")), FakeBackend("secondary")
+
+    with pytest.raises(RuntimeError):
+        _plan(HedgedBackend(primary, secondary, stages={"research"}, default_delay=0))
+    assert secondary.calls == 0
+
+
+def test_the_delay_follows_the_primary_latency():
+    backend = HedgedBackend(FakeBackend("primary"), FakeBackend("secondary"), percentile=90, default_delay=5,
+                            min_samples=10)
+    for _ in range(10):
+        _plan(backend)
+
+    assert backend.delay("plan") < 1
+    assert backend.delay("research") == 5
+
+
+@pytest.mark.parametrize("percentile, expected", [(0, 1), (100, 99), (99.9, 99), (50, 50)])
+def test_the_percentile_is_clamped(percentile, expected):
+    backend = HedgedBackend(FakeBackend("primary"), FakeBackend("secondary"), percentile=percentile, min_samples=2)
+    for _ in range(2):
+        _plan(backend)
+
+    assert backend.percentile == expected
+    assert backend.delay("plan") < 1
+
+
+def test_create_backend():
+    assert create_backend("adk", "").name == "adk"
+    assert create_backend("openai", "adk").name == "openai+adk"
+
+
+def test_importing_the_pipeline_does_not_load_an_agent_stack():
+    code = ("import sys, pipeline; "
+            "print(sorted({m.split('.')[0] for m in sys.modules} & {'agents', 'openai_agents', 'google_adk'}))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+
+    assert output.strip() == "[]"
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+import batch_runner
+from batch_runner import load_checkpoint, repair_checkpoint
+from pipeline import PipelineResult
+
+
+def _line(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode()
+
+
+def _truncated_korean_checkpoint(path) -> None:
+    done = _line({"id": "a", "status": "ok", "report_path": "에이전트 AI.md"})
+    cut = _line({"id": "b", "status": "ok", "report_path": "프런티어 모델.md"})
+    # Cut the second line in the middle of a three-byte character.
+    position = cut.index("모".encode()) + 1
+    path.write_bytes(done + cut[:position])
+
+
+def test_repair_drops_a_partial_multi_byte_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _truncated_korean_checkpoint(path)
+
+    repair_checkpoint(str(path))
+
+    assert path.read_bytes() == _line({"id": "a", "status": "ok", "report_path": "에이전트 AI.md"})
+    assert load_checkpoint(str(path)) == {"a"}
+
+
+@pytest.mark.parametrize("content", [b"", b'{"id": "a", "status": "ok"}\n', b'{"id": "a", "stat'])
+def test_repair_keeps_complete_lines(tmp_path, content):
+    path = tmp_path / "results.jsonl"
+    path.write_bytes(content)
+
+    repair_checkpoint(str(path))
+
+    assert path.read_bytes() == (content if content.endswith(b"\n") else b"")
+
+
+def test_a_batch_resumes_after_a_truncated_korean_line(tmp_path, monkeypatch):
+    topics = tmp_path / "topics.jsonl"
+    topics.write_text('{"id": "a", "topic": "에이전트 AI"}\n{"id": "b", "topic": "프런티어 모델"}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    _truncated_korean_checkpoint(output)
+    researched = []
+
+    async def run_pipeline(topic: str, **kwargs) -> PipelineResult:
+        researched.append(topic)
+        return PipelineResult(topic=topic, is_research_work=True, report_path=f"{topic}.md")
+
+    monkeypatch.setattr(batch_runner, "run_pipeline", run_pipeline)
+
+    summary = asyncio.run(batch_runner.run_batch(str(topics), str(output), workers=1))
+
+    assert researched == ["프런티어 모델"]
+    assert summary["skipped"] == 1 and summary["succeeded"] == 1
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [line["id"] for line in lines] == ["a", "b"]
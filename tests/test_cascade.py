@@ -0,0 +1,20 @@
+import pytest
+
+from openai_agents.cascade import DEFAULT_CASCADES, Tier, parse_tiers
+from openai_agents.evaluator_agent import create_evaluate_agent
+from openai_agents.planner_agent import create_planner_agent
+from openai_agents.research_agent import create_research_agent
+
+
+@pytest.mark.parametrize("stage, create_agent", [
+    ("plan", create_planner_agent),
+    ("research", lambda: create_research_agent(None)),
+    ("evaluate", create_evaluate_agent),
+])
+def test_last_tier_is_the_agent_configuration(stage, create_agent):
+    agent = create_agent()
+    assert DEFAULT_CASCADES[stage][-1] == Tier(agent.model, agent.model_settings.reasoning.effort)
+
+
+def test_parse_tiers():
+    assert parse_tiers("gpt-5-nano:low, gpt-5-mini") == [Tier("gpt-5-nano", "low"), Tier("gpt-5-mini", None)]
@@ -0,0 +1,33 @@
+import asyncio
+
+from agents import Agent, RunConfig
+
+from benchmarks.fake_models import FakeModelProvider, LatencyProfile
+from common.models import ResearchReport
+from openai_agents.runner import stream_agent
+
+
+def _stream(agent: Agent) -> list:
+    run_config = RunConfig(model_provider=FakeModelProvider(LatencyProfile(first_token_seconds=0.001, seed=0)),
+                           tracing_disabled=True)
+
+    async def collect():
+        return [event async for event in stream_agent(agent, "agentic ai", run_config=run_config)]
+
+    return asyncio.run(collect())
+
+
+def test_text_is_streamed_in_deltas():
+    events = _stream(Agent(name="Writer", instructions="Write.", model="fake"))
+
+    tokens = [event.text for event in events if event.type == "token"]
+    assert len(tokens) > 1
+    assert events[-1].type == "final"
+    assert "".join(tokens) == events[-1].data
+
+
+def test_structured_output_is_streamed():
+    events = _stream(Agent(name="Researcher", instructions="Research.", model="fake", output_type=ResearchReport))
+
+    assert isinstance(events[-1].data, ResearchReport)
+    assert any(event.type == "token" for event in events)
@@ -0,0 +1,13 @@
+import pytest
+
+from openai_agents.guardrail_agent import prefilter_research_work
+
+
+@pytest.mark.parametrize("topic", ["RAG", "MCP", "GPU", "LLM", "AI", "  rag  "])
+def test_short_acronym_topics_are_left_to_the_model(topic):
+    assert prefilter_research_work(topic) is None
+
+
+@pytest.mark.parametrize("topic", ["", "   ", "?!", "hello", "Thanks!", "what is your name", "ok"])
+def test_obvious_non_research_input_is_rejected(topic):
+    assert prefilter_research_work(topic) is False
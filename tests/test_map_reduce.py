@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from common import map_reduce
+from common.map_reduce import chunk, count_tokens
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count four characters a token, as without tiktoken, so the sizes below do not depend on the encoding.
+    monkeypatch.setattr(map_reduce, "_encoding", lambda: None)
+
+
+def test_texts_that_fit_are_packed_together():
+    assert chunk(["alpha", "beta", "gamma"], 100) == ["alpha\n\nbeta\n\ngamma"]
+
+
+def test_paragraphs_are_rejoined_with_blank_lines():
+    paragraph = "word " * 30
+    chunks = chunk(["\n\n".join([paragraph.strip()] * 4)], 80)
+
+    assert len(chunks) == 2
+    assert all(text == f"{paragraph.strip()}\n\n{paragraph.strip()}" for text in chunks)
+
+
+def test_lines_are_rejoined_with_newlines():
+    lines = [f"- finding {index}: agentic models lead the benchmarks" for index in range(40)]
+    chunks = chunk(["\n".join(lines)], 100)
+
+    assert len(chunks) > 1
+    assert all("\n\n" not in text and count_tokens(text) <= 100 for text in chunks)
+    assert "\n".join(chunks) == "\n".join(lines)
+
+
+def test_words_are_rejoined_with_spaces():
+    text = "alpha beta gamma delta. " * 200
+    chunks = chunk([text], 300)
+
+    assert len(chunks) > 1
+    assert all("\n" not in piece and count_tokens(piece) <= 300 for piece in chunks)
+    assert " ".join(chunks) == text.strip()
+
+
+def test_long_words_are_cut():
+    chunks = chunk(["x" * 100], 10)
+
+    assert chunks == ["x" * 40, "x" * 40, "x" * 20]
+
+
+def test_map_reduce_condenses_until_the_texts_fit():
+    async def condense(text: str) -> str:
+        return text[:20]
+
+    texts = asyncio.run(map_reduce.map_reduce(["report " * 100] * 4, 50, condense))
+
+    assert sum(count_tokens(text) for text in texts) <= 50
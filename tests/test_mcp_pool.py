@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from common.mcp_pool import MCPServerPool
+
+
+class FakeServer:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+
+async def _open(server: FakeServer) -> None:
+    pass
+
+
+async def _close(server: FakeServer) -> None:
+    server.closed = True
+
+
+async def _health_check(server: FakeServer) -> None:
+    if not server.healthy:
+        raise RuntimeError("unhealthy")
+
+
+def _pool(size: int = 1) -> MCPServerPool[FakeServer]:
+    return MCPServerPool("test", FakeServer, _open, _close, _health_check, size=size,
+                         health_check_interval_seconds=0)
+
+
+def test_leases_share_a_healthy_server():
+    async def scenario():
+        pool = _pool()
+        async with pool.lease() as first, pool.lease() as second:
+            assert first is second
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_idle_unhealthy_server_is_restarted():
+    async def scenario():
+        pool = _pool()
+        async with pool.lease() as first:
+            pass
+        first.healthy = False
+        async with pool.lease() as second:
+            assert second is not first
+        assert first.closed
+        assert pool.restarted == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_leased_unhealthy_server_is_kept_until_its_leases_are_done():
+    async def scenario():
+        pool = _pool()
+        async with pool.lease() as first:
+            first.healthy = False
+            async with pool.lease() as second:
+                assert second is not first
+            assert not first.closed
+        assert first.closed
+        async with pool.lease() as third:
+            assert third is second
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_leases_do_not_wait_for_each_other_to_start():
+    async def slow_open(server: FakeServer) -> None:
+        await asyncio.sleep(0.2)
+
+    async def scenario():
+        pool = MCPServerPool("test", FakeServer, slow_open, _close, _health_check, size=2)
+
+        async def lease() -> FakeServer:
+            async with pool.lease() as server:
+                return server
+
+        started = time.monotonic()
+        servers = await asyncio.gather(*(lease() for _ in range(4)))
+        assert time.monotonic() - started < 0.35
+        assert pool.spawned == 2
+        assert len({id(server) for server in servers}) == 2
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_lease_does_not_wait_for_the_health_check_of_another_server():
+    checking = asyncio.Event()
+    slow = []
+
+    async def health_check(server: FakeServer) -> None:
+        if server in slow:
+            checking.set()
+            await asyncio.sleep(0.5)
+
+    async def scenario():
+        pool = MCPServerPool("test", FakeServer, _open, _close, health_check, size=2,
+                             health_check_interval_seconds=0)
+        async with pool.lease() as first, pool.lease() as second:
+            slow.append(first)
+        checked = asyncio.create_task(pool.lease().__aenter__())
+        await checking.wait()
+        started = time.monotonic()
+        async with pool.lease() as other:
+            assert other is second
+        assert time.monotonic() - started < 0.25
+        checked.cancel()
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_start_does_not_hold_the_slot():
+    attempts = []
+
+    async def flaky_open(server: FakeServer) -> None:
+        attempts.append(server)
+        if len(attempts) == 1:
+            raise RuntimeError("failed to start")
+
+    async def scenario():
+        pool = MCPServerPool("test", FakeServer, flaky_open, _close, _health_check, size=1)
+        with pytest.raises(RuntimeError):
+            async with pool.lease():
+                pass
+        async with pool.lease() as server:
+            assert server is attempts[1]
+        await pool.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from agents import Agent, RunConfig
+
+from benchmarks.fake_models import FakeModelProvider, LatencyProfile
+from common import rate_limit
+from common.metrics import metrics
+from common.models import WebSearchPlan
+from openai_agents import runner
+from openai_agents.runner import agent_tool, run_agent
+
+
+@pytest.fixture(autouse=True)
+def fake_models(monkeypatch):
+    provider = FakeModelProvider(LatencyProfile(first_token_seconds=0.001, seed=0))
+    monkeypatch.setattr(runner, "_run_config", RunConfig(model_provider=provider, tracing_disabled=True))
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    # One call of the model at a time: a slot held across a tool's run would leave none for the tool.
+    monkeypatch.setenv("RATE_LIMITS", "fake=60000:0:1")
+    rate_limit.reset_rate_limits()
+    metrics.reset()
+    yield
+    rate_limit.reset_rate_limits()
+    metrics.reset()
+
+
+def test_agent_tools_run_through_the_limiter_and_metrics():
+    planner = Agent(name="Planner", instructions="Plan.", model="fake", output_type=WebSearchPlan)
+    orchestrator = Agent(name="Orchestrator", instructions="Orchestrate.", model="fake",
+                         tools=[agent_tool(planner, "plan", "Plan the research.", stage="plan")])
+
+    output = asyncio.run(asyncio.wait_for(
+        run_agent(orchestrator, "agentic ai", stage="orchestrate", limit_per_call=True), timeout=10))
+
+    assert isinstance(output, str)
+    stages = {stage.stage: stage for stage in metrics.snapshot()}
+    assert stages["plan"].calls == 1 and stages["plan"].output_tokens > 0
+    assert stages["orchestrate"].calls == 1
+    # Two orchestrator calls around the tool call, and the planner's.
+    assert rate_limit.rate_limit_stats()["fake"]["requests"] == 3
+
+
+def test_agent_tool_output_extractor():
+    written = []
+
+    async def extract(plan: WebSearchPlan) -> str:
+        written.append(plan)
+        return "report.md"
+
+    planner = Agent(name="Planner", instructions="Plan.", model="fake", output_type=WebSearchPlan)
+    tool = agent_tool(planner, "plan", "Plan the research.", stage="plan", output_extractor=extract)
+    orchestrator = Agent(name="Orchestrator", instructions="Orchestrate.", model="fake", tools=[tool])
+
+    asyncio.run(run_agent(orchestrator, "agentic ai", stage="orchestrate", limit_per_call=True))
+
+    assert len(written) == 1 and isinstance(written[0], WebSearchPlan)
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import pipeline
+from backends import set_backend
+from common.models import ResearchReport, WebSearchItem, WebSearchPlan
+from common.report_index import ReportIndex
+from common.workflow_store import WorkflowStore
+from openai_agents import guardrail_agent
+
+TOPIC = "What is the best model for agentic AI?"
+QUERIES = ["agentic coding benchmarks", "frontier model pricing"]
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self):
+        self.researched: list[str] = []
+        self.blocked: set[str] = set()
+
+    async def plan(self, query: str) -> WebSearchPlan:
+        return WebSearchPlan(searches=[WebSearchItem(reason="r", query=query) for query in QUERIES])
+
+    async def research(self, query: str, sources: str | None = None, feedback: str | None = None) -> ResearchReport:
+        self.researched.append(query)
+        if query in self.blocked:
+            await asyncio.sleep(3600)
+        return ResearchReport(short_summary=f"summary of {query}", markdown_report=f"report of {query}")
+
+    async def summarize(self, title: str, reports: list[str]) -> str:
+        return ""
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    set_backend(backend)
+
+    async def check_research_work(topic: str):
+        return SimpleNamespace(is_research_work=True)
+
+    monkeypatch.setattr(guardrail_agent, "check_research_work", check_research_work)
+    monkeypatch.setattr(pipeline, "SEARCH_PREPROCESS", False)
+    yield backend
+    set_backend(None)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch) -> ReportIndex:
+    index = ReportIndex(str(tmp_path / "index"))
+    monkeypatch.setattr(pipeline, "get_report_index", lambda: index)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> WorkflowStore:
+    store = WorkflowStore(str(tmp_path / "workflows.sqlite3"))
+    monkeypatch.setattr(pipeline, "get_workflow_store", lambda: store)
+    yield store
+    store.close()
+
+
+def test_speculative_research_reuses_the_index_and_checkpoints(backend, index, store):
+    index.add("indexed report", "research", QUERIES[0], short_summary="indexed summary")
+    workflow = store.open("run-1", TOPIC)
+
+    web_search_plan, reports = asyncio.run(pipeline._speculate(TOPIC, 4, True, workflow=workflow))
+
+    assert [item.query for item in web_search_plan.searches] == QUERIES
+    assert backend.researched == [QUERIES[1]]
+    assert [report.markdown_report for report in reports] == ["indexed report", f"report of {QUERIES[1]}"]
+    assert set(workflow.load_all("research", ResearchReport)) == set(QUERIES)
+    assert index.find_similar(QUERIES[1], "research").text == f"report of {QUERIES[1]}"
+
+
+def test_a_cancelled_run_is_interrupted_and_resumable(backend, index, store):
+    backend.blocked.add(QUERIES[1])
+
+    async def cancel_run():
+        run = asyncio.create_task(pipeline.run_pipeline(TOPIC, run_id="run-1"))
+        while len(backend.researched) < len(QUERIES):
+            await asyncio.sleep(0.01)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    asyncio.run(cancel_run())
+    assert store.get("run-1").status == "interrupted"
+
+    backend.blocked.clear()
+    backend.researched.clear()
+    result = asyncio.run(pipeline.run_pipeline(TOPIC, run_id="run-1"))
+
+    assert backend.researched == [QUERIES[1]]
+    assert len(result.reports) == 2
+    assert store.get("run-1").status == "done"
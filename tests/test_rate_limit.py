@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from common import rate_limit
+from common.rate_limit import AdaptiveLimiter, RateLimit, TokenBucket, rate_limit_for, rate_limited
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+@pytest.fixture(autouse=True)
+def limiter_state(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "retry_delay", lambda attempt, error=None: 0.0)
+    rate_limit.reset_rate_limits()
+    yield
+    rate_limit.reset_rate_limits()
+
+
+def test_rate_limited_calls_are_retried_and_lower_the_concurrency(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "model=6000:0:8")
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    assert asyncio.run(rate_limited("model", call)) == "ok"
+
+    stats = rate_limit.rate_limit_stats()["model"]
+    assert len(attempts) == 3
+    assert stats["throttled"] == 2 and stats["retries"] == 2
+    # Both 429s fell within one round trip, so the concurrency was halved once, then raised by the success.
+    assert stats["concurrency"] == 4 + 1 / 4
+
+
+def test_rate_limited_calls_give_up_after_the_retries(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_MAX_RETRIES", 2)
+
+    async def call():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        asyncio.run(rate_limited("model", call))
+    assert rate_limit.rate_limit_stats()["model"]["throttled"] == 3
+
+
+def test_other_errors_are_not_retried():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(rate_limited("model", call))
+    assert calls == [1]
+
+
+def test_concurrency_grows_additively_and_is_cut_multiplicatively():
+    limiter = AdaptiveLimiter("model", RateLimit(600, max_concurrency=8))
+    limiter.on_throttled()
+    assert limiter.concurrency == 4
+
+    for _ in range(4):
+        limiter.on_success(1.0)
+    assert 4.9 < limiter.concurrency < 5.1
+
+
+def test_concurrent_calls_are_capped():
+    limiter = AdaptiveLimiter("model", RateLimit(6000, max_concurrency=2))
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def calls():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(calls())
+    assert peak == 2
+
+
+def test_limiter_outlives_its_event_loop():
+    limiter = AdaptiveLimiter("model", RateLimit(6000, max_concurrency=1))
+
+    async def call():
+        async with limiter.slot():
+            await asyncio.sleep(0.01)
+
+    async def calls():
+        await asyncio.gather(call(), call())
+
+    # Each run waits for the concurrency limit on its own loop.
+    asyncio.run(calls())
+    asyncio.run(calls())
+
+
+def test_token_bucket_waits_for_a_refill():
+    bucket = TokenBucket(per_minute=600)  # 10 a second, holds 60
+
+    async def take():
+        await bucket.take(60)
+        started = time.monotonic()
+        await bucket.take(2)
+        return time.monotonic() - started
+
+    assert 0.1 < asyncio.run(take()) < 1.0
+
+
+def test_rate_limit_overrides(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "gpt-5-nano=500:200000:4,serper=300")
+
+    assert rate_limit_for("gpt-5-nano") == RateLimit(500, 200000, 4)
+    assert rate_limit_for("serper") == RateLimit(300, None, 16)
+    assert rate_limit_for("gpt-5") == rate_limit.DEFAULT_RATE_LIMITS["gpt-5"]
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from common.report_index import ReportIndex
+
+
+@pytest.fixture
+def index(tmp_path) -> ReportIndex:
+    index = ReportIndex(str(tmp_path / "index"), pending_limit=3)
+    yield index
+    index.close()
+
+
+def _add_reports(index: ReportIndex) -> None:
+    index.add("Gemini 2.5 Pro leads the agentic coding benchmarks.", "research", "agentic coding models",
+              short_summary="Gemini leads")
+    index.add("Vector databases compared on recall and latency.", "research", "vector database benchmarks")
+    index.add("Agentic frameworks orchestrate tools and planning.", "summary", "agentic frameworks")
+    index.add("Serverless GPU pricing in 2025.", "research", "serverless gpu pricing")
+
+
+def test_search_ranks_matching_documents(index):
+    _add_reports(index)
+
+    results = index.search("agentic coding benchmarks")
+
+    assert results[0].topic == "agentic coding models"
+    assert results[0].short_summary == "Gemini leads"
+    assert [report.topic for report in index.search("agentic", source="summary")] == ["agentic frameworks"]
+
+
+def test_documents_survive_a_rebuild_and_reopening(index, tmp_path):
+    _add_reports(index)
+    # The first three documents were built into a generation, the fourth is pending.
+    assert index.stats() == {"documents": 4, "pending": 1, "generation": 1}
+    index.close()
+
+    reopened = ReportIndex(str(tmp_path / "index"), pending_limit=3)
+    try:
+        assert len(reopened) == 4
+        assert reopened.search("vector database")[0].topic == "vector database benchmarks"
+        assert reopened.search("serverless gpu")[0].topic == "serverless gpu pricing"
+        reopened.compact()
+        assert reopened.stats() == {"documents": 4, "pending": 0, "generation": 2}
+        assert reopened.search("serverless gpu")[0].topic == "serverless gpu pricing"
+    finally:
+        reopened.close()
+
+
+def test_find_similar_matches_on_the_topic(index):
+    _add_reports(index)
+
+    assert index.find_similar("Agentic coding models?", "research").topic == "agentic coding models"
+    assert index.find_similar("agentic coding models", "summary") is None
+    assert index.find_similar("pricing of vector databases", "research") is None
+
+
+def test_find_similar_skips_old_documents(index):
+    index.add("Old research.", "research", "agentic coding models")
+
+    assert index.find_similar("agentic coding models", "research", max_age_seconds=60) is not None
+    assert index.find_similar("agentic coding models", "research", max_age_seconds=0) is None
+
+
+def test_sync_reports_indexes_new_summaries_once(index, tmp_path):
+    report_dir = tmp_path / "report"
+    report_dir.mkdir()
+    (report_dir / "Agentic AI-2.md").write_text("# Agentic AI\nFrontier models.", encoding="utf-8")
+
+    assert index.sync_reports(str(report_dir)) == 1
+    assert index.sync_reports(str(report_dir)) == 0
+    found = index.find_similar("Agentic AI", "summary")
+    assert found.path == os.path.join(str(report_dir), "Agentic AI-2.md")
+
+    path = report_dir / "Agentic AI-2.md"
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert index.sync_reports(str(report_dir)) == 1
+
+
+def test_an_edited_report_replaces_its_document(index, tmp_path):
+    path = tmp_path / "Agentic AI.md"
+    path.write_text("# Agentic AI\nFrontier models.", encoding="utf-8")
+    index.sync_reports(str(tmp_path))
+    path.write_text("# Agentic AI\nOpen weight models.", encoding="utf-8")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert index.sync_reports(str(tmp_path)) == 1
+
+    assert [report.text for report in index.search("agentic models")] == ["# Agentic AI\nOpen weight models."]
+    assert index.search("frontier") == []
+    assert index.stats()["documents"] == 1
+
+    index.compact()
+    index.close()
+    reopened = ReportIndex(index.directory)
+    assert [report.text for report in reopened.search("agentic models")] == ["# Agentic AI\nOpen weight models."]
+    assert reopened.search("frontier") == []
+    reopened.close()
@@ -0,0 +1,38 @@
+import os
+import stat
+
+from common.report_sink import LocalDirSink, REPORT_FILE_MODE, sanitize_filename
+
+
+def test_reports_are_not_overwritten(tmp_path):
+    sink = LocalDirSink(str(tmp_path))
+    first = sink.write("Agentic AI?", "# one")
+    second = sink.write("Agentic AI?", "# two")
+    assert os.path.basename(first) == "Agentic AI.md"
+    assert os.path.basename(second) == "Agentic AI-2.md"
+    assert open(first, encoding="utf-8").read() == "# one"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".part")] == []
+
+
+def test_reports_get_the_default_file_mode(tmp_path):
+    path = LocalDirSink(str(tmp_path)).write("report", "# report")
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert REPORT_FILE_MODE == 0o666 & ~umask
+    assert stat.S_IMODE(os.stat(path).st_mode) == REPORT_FILE_MODE
+
+
+def test_aborted_streams_publish_nothing(tmp_path):
+    sink = LocalDirSink(str(tmp_path))
+    try:
+        with sink.open_stream("partial") as stream:
+            stream.write("# partial")
+            raise RuntimeError("summarize failed")
+    except RuntimeError:
+        pass
+    assert os.listdir(tmp_path) == []
+
+
+def test_sanitize_filename():
+    assert sanitize_filename(' a/b:c  "d" ') == "a_b_c _d"
+    assert sanitize_filename("...") == "report"
@@ -0,0 +1,54 @@
+import time
+
+from common.cache_store import SqliteCache
+from common.response_cache import ResponseCache, normalize_semantic
+
+
+def _cache(tmp_path, ttl_seconds: float | None = 60, memory_entries: int = 4) -> ResponseCache:
+    return ResponseCache(SqliteCache(str(tmp_path / "responses.sqlite3"), 1024 * 1024),
+                         memory_entries=memory_entries, ttl_seconds=ttl_seconds)
+
+
+def test_key_is_normalized(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.key("m", "i", {}, "T", "AI agents?") == cache.key("m", "i", {}, "T", "ai  agents")
+    assert normalize_semantic("  AI  Agents?! ") == "ai agents"
+
+
+def test_memory_and_persistent_tiers(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    assert cache.memory_hits == 1
+
+    reopened = ResponseCache(cache.store, ttl_seconds=60)
+    assert reopened.get("k") == "v"
+    assert reopened.get("k") == "v"
+    assert (reopened.persistent_hits, reopened.memory_hits) == (1, 1)
+
+
+def test_entries_expire_from_memory(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.05)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_promoted_entries_keep_the_persistent_expiry(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.05)
+    cache.put("k", "v")
+    reopened = ResponseCache(cache.store, ttl_seconds=3600)
+    assert reopened.get("k") == "v"
+    time.sleep(0.1)
+    assert reopened.get("k") is None
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = _cache(tmp_path, memory_entries=2)
+    for key in "abc":
+        cache.put(key, key)
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("a") == "a"
+    assert cache.persistent_hits == 1
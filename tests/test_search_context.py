@@ -0,0 +1,79 @@
+import asyncio
+
+from common.search_context import NO_RESULTS, PageFetcher, build_search_context, dedupe, normalize_url, \
+    parse_search_results
+
+
+def _result(*links: str) -> dict:
+    return {"organic": [{"link": link, "title": f"Title of {link}", "snippet": f"Snippet of {link}"}
+                        for link in links]}
+
+
+RESULTS = {
+    "agentic models": _result("https://example.com/a", "https://example.com/b?utm_source=x"),
+    "frontier models": _result("https://www.example.com/b/", "https://example.com/c"),
+    "agentic ai": _result("https://example.com/a"),
+    "nothing": {"organic": []},
+}
+
+
+async def _search(query: str) -> dict:
+    if query == "slow":
+        await asyncio.sleep(10)
+    if query == "broken":
+        raise RuntimeError("search failed")
+    return RESULTS[query]
+
+
+def test_context_of_every_query():
+    context = asyncio.run(build_search_context(["agentic models", "frontier models"], _search, fetch_pages=False))
+
+    assert set(context) == {"agentic models", "frontier models"}
+    assert "https://example.com/a" in context["agentic models"]
+    assert "https://example.com/c" in context["frontier models"]
+
+
+def test_pages_are_kept_under_the_query_they_rank_best_for():
+    context = asyncio.run(build_search_context(["agentic models", "frontier models"], _search, fetch_pages=False))
+
+    # /b is second for "agentic models" and first for "frontier models".
+    assert "example.com/b" not in context["agentic models"]
+    assert "example.com/b" in context["frontier models"]
+
+
+def test_failed_and_slow_searches_are_left_out():
+    context = asyncio.run(build_search_context(["agentic models", "broken", "slow"], _search, fetch_pages=False,
+                                               timeout=0.2))
+
+    assert list(context) == ["agentic models"]
+
+
+def test_queries_without_new_results_still_get_sources():
+    context = asyncio.run(build_search_context(["agentic models", "agentic ai", "nothing"], _search,
+                                               fetch_pages=False))
+
+    # Every page of "agentic ai" is kept under "agentic models", so it gets its own results again.
+    assert "https://example.com/a" in context["agentic ai"]
+    assert context["nothing"] == NO_RESULTS
+
+
+def test_unfetchable_pages_have_no_paragraphs():
+    async def fetch(url: str) -> list[str]:
+        fetcher = PageFetcher()
+        try:
+            return await fetcher.fetch(url)
+        finally:
+            await fetcher.close()
+
+    assert asyncio.run(fetch("https://exa mple.com/page")) == []
+    assert asyncio.run(fetch("https://[::1/page")) == []
+
+
+def test_dedupe_compares_normalized_urls():
+    hits = parse_search_results("q1", _result("https://www.example.com/page/?utm_medium=x#top")) + \
+        parse_search_results("q2", _result("https://example.com/page"))
+
+    grouped = dedupe(hits)
+
+    assert len(grouped["q1"]) + len(grouped["q2"]) == 1
+    assert normalize_url("https://www.Example.com/page/?utm_medium=x&b=1#top") == "https://example.com/page?b=1"
@@ -0,0 +1,53 @@
+import asyncio
+
+import service
+from pipeline import PipelineResult
+
+
+def test_stopping_cancels_running_and_queued_jobs(monkeypatch):
+    started = []
+
+    async def run_pipeline(topic: str, **kwargs) -> PipelineResult:
+        started.append(topic)
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(service, "run_pipeline", run_pipeline)
+
+    async def stop_with_jobs():
+        research_service = service.ResearchService(workers=1)
+        await research_service.start()
+        running, _ = research_service.submit("agentic ai", "client")
+        queued, _ = research_service.submit("vector databases", "client")
+        while not started:
+            await asyncio.sleep(0.01)
+        await research_service.stop()
+        return research_service, running, queued
+
+    research_service, running, queued = asyncio.run(stop_with_jobs())
+
+    assert started == ["agentic ai"]
+    assert running.status == queued.status == "cancelled"
+    assert running.finished and queued.finished
+    assert research_service.stats()["in_flight"] == 0
+    assert research_service._client_jobs == {}
+
+
+def test_jobs_of_the_same_topic_are_coalesced(monkeypatch):
+    async def run_pipeline(topic: str, **kwargs) -> PipelineResult:
+        return PipelineResult(topic=topic, is_research_work=False)
+
+    monkeypatch.setattr(service, "run_pipeline", run_pipeline)
+
+    async def run_jobs():
+        research_service = service.ResearchService(workers=1)
+        first, _ = research_service.submit("Agentic  AI", "client")
+        second, coalesced = research_service.submit("agentic ai", "other")
+        await research_service.start()
+        events = [event async for event in first.watch()]
+        await research_service.stop()
+        return first, second, coalesced, events
+
+    first, second, coalesced, events = asyncio.run(run_jobs())
+
+    assert coalesced and first is second and first.subscribers == 2
+    assert [event["status"] for event in events] == ["queued", "running", "done"]
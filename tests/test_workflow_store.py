@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from common.models import ResearchReport, WebSearchItem, WebSearchPlan
+from common.workflow_store import WorkflowStore
+
+
+@pytest.fixture
+def store(tmp_path) -> WorkflowStore:
+    store = WorkflowStore(str(tmp_path / "workflows.sqlite3"))
+    yield store
+    store.close()
+
+
+def _report(query: str) -> ResearchReport:
+    return ResearchReport(short_summary=f"summary of {query}", markdown_report=f"report of {query}")
+
+
+def test_checkpoints_are_loaded_by_stage_and_key(store):
+    workflow = store.open("run-1", "agentic ai")
+    plan = WebSearchPlan(searches=[WebSearchItem(reason="r", query="q1")])
+    workflow.save("plan", plan)
+    workflow.save("research", _report("q1"), key="q1")
+    workflow.save("research", _report("q2"), key="q2")
+
+    assert workflow.load("plan", WebSearchPlan) == plan
+    assert workflow.load("research", ResearchReport, key="q1") == _report("q1")
+    assert workflow.load("research", ResearchReport, key="q3") is None
+    assert workflow.load_all("research", ResearchReport) == {"q1": _report("q1"), "q2": _report("q2")}
+
+    workflow.delete("research", key="q1")
+    assert list(workflow.load_all("research", ResearchReport)) == ["q2"]
+    workflow.delete("research")
+    assert workflow.load_all("research", ResearchReport) == {}
+    assert store.get("run-1").checkpoints == 1
+
+
+def test_reopening_a_run_keeps_its_checkpoints_and_status(store, tmp_path):
+    workflow = store.open("run-1", "agentic ai")
+    workflow.save("research", _report("q1"), key="q1")
+    workflow.finish("failed", "RuntimeError()")
+    store.close()
+
+    reopened = WorkflowStore(str(tmp_path / "workflows.sqlite3"))
+    try:
+        workflow = reopened.open("run-1", "agentic ai")
+        assert workflow.status == "failed"
+        assert workflow.load("research", ResearchReport, key="q1") == _report("q1")
+        assert reopened.get("run-1").error == "RuntimeError()"
+    finally:
+        reopened.close()
+
+
+def test_a_run_id_cannot_be_reused_for_another_topic(store):
+    store.open("run-1", "agentic ai")
+
+    with pytest.raises(ValueError):
+        store.open("run-1", "vector databases")
+
+
+def test_runs_not_updated_within_the_ttl_are_pruned(store):
+    store.open("old", "agentic ai").save("research", _report("q1"), key="q1")
+    store.open("new", "vector databases")
+    store._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = 'old'", (time.time() - 2 * store.ttl_seconds,))
+
+    assert store.prune() == 1
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert store._load_all("old", "research") == []
+
+
+def test_delete_run(store):
+    store.open("run-1", "agentic ai").save("research", _report("q1"), key="q1")
+
+    store.delete_run("run-1")
+
+    assert store.get("run-1") is None
+    assert store._load_all("run-1", "research") == []